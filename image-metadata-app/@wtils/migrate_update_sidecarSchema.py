@@ -19,6 +19,8 @@ Usage example:
         --batch ./static/gallery --recursive
     python @wtils/migrate_update_sidecarSchema.py \
         --use-openai --watch-folder-mode ./static/gallery
+    python @wtils/migrate_update_sidecarSchema.py \
+        --workers 8 --recursive
 
 The script is idempotent and can be run repeatedly. It writes a snapshot of the
 current schema into `@wtils/.latest_schema_snapshot.json` to serve as the
@@ -29,12 +31,17 @@ from __future__ import annotations
 
 import argparse
 import ast
+import copy
 import csv
 import json
+import os
 import sys
 import textwrap
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
+from itertools import repeat
 from pathlib import Path
 from typing import Any, Dict, Iterable, Optional
 
@@ -43,11 +50,28 @@ try:
 except ImportError:  # pragma: no cover - Python < 3.9 is not officially supported
     ast_unparse = None  # type: ignore
 
+# The tool lives in @wtils/ but shares the app's manifest and generator modules.
+APP_ROOT = Path(__file__).resolve().parents[1]
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from core.manifest import ProcessingManifest  # noqa: E402
+from utils.validation import fingerprint_schema  # noqa: E402
+
 SCHEMA_DEFAULT_PATH = Path("schemas") / "ImageSidecarCopy.schema.json"
 SNAPSHOT_PATH = Path("@wtils") / ".latest_schema_snapshot.json"
 GALLERY_PATH = Path("static") / "gallery"
 GENERATOR_PATH = Path("core") / "generator.py"
 IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff", ".heic"}
+# Copies written by core.embedder.embed_metadata; they share the original's metadata.
+EMBED_COPY_SUFFIX = "_with_meta"
+# Upper bound on sidecars sent to a worker process in one task.
+MAX_CHUNK_SIZE = 256
+DEFAULT_OPENAI_WORKERS = 2
+# Added fields of these types are filled in via OpenAI with --use-openai.
+ENRICHABLE_TYPES = {"string", "array", "object"}
+# Same index main.py writes to, so sidecars it created count as current.
+MANIFEST_PATH = APP_ROOT / ".cache" / "manifest.sqlite3"
 
 
 @dataclass(frozen=True)
@@ -86,7 +110,8 @@ def _dump_json(path: Path, payload: Dict[str, Any]) -> None:
 
 def _default_for_spec(spec: Dict[str, Any]) -> Any:
     if "default" in spec:
-        return spec["default"]
+        # Copy so coercing one sidecar never mutates the schema's shared default.
+        return copy.deepcopy(spec["default"])
     spec_type = spec.get("type")
     if isinstance(spec_type, list):
         # Take the first type that has a sensible default
@@ -307,23 +332,108 @@ def _ensure_generator_matches_schema(schema: Dict[str, Any]) -> bool:
     return True
 
 
-def _iter_sidecars_in_dir(directory: Path, recursive: bool) -> Iterable[Path]:
-    iterator = directory.rglob("*.json") if recursive else directory.glob("*.json")
-    for path in iterator:
-        if path.is_file():
-            yield path
+# Probe order when several images share a sidecar's stem.
+IMAGE_PROBE_ORDER = [".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff", ".heic"]
+
+
+@dataclass
+class _Listing:
+    files: set[str]
+    subdirs: list[str]
+    by_stem: Dict[str, list[str]]
+
+
+class DirectoryIndex:
+    """Directory listings taken with one ``os.scandir`` each, queried by stem.
+
+    Companion lookups (the image for a sidecar, the sidecar for an image) are
+    answered from memory. The alternative is probing candidate names with
+    ``exists()``, which costs a round trip per probe on network filesystems.
+    Listings are snapshots; build a new index to see later changes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._listings: Dict[str, _Listing] = {}
+
+    def listing(self, directory: Path | str) -> _Listing:
+        key = os.path.abspath(directory)
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached is not None:
+            return cached
+        listing = _Listing(files=set(), subdirs=[], by_stem={})
+        try:
+            with os.scandir(key) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        listing.subdirs.append(entry.name)
+                    elif entry.is_file():
+                        listing.files.add(entry.name)
+                        listing.by_stem.setdefault(os.path.splitext(entry.name)[0], []).append(entry.name)
+        except OSError:
+            pass
+        listing.subdirs.sort()
+        with self._lock:
+            return self._listings.setdefault(key, listing)
+
+    def iter_files(self, directory: Path, recursive: bool) -> Iterable[Path]:
+        stack = [os.path.abspath(directory)]
+        while stack:
+            current = stack.pop()
+            listing = self.listing(current)
+            for name in listing.files:
+                yield Path(current, name)
+            if recursive:
+                stack.extend(os.path.join(current, name) for name in reversed(listing.subdirs))
+
+    def exists(self, path: Path) -> bool:
+        return path.name in self.listing(path.parent).files
+
+    def add(self, path: Path) -> None:
+        """Record a file this process just created."""
+        listing = self.listing(path.parent)
+        with self._lock:
+            if path.name not in listing.files:
+                listing.files.add(path.name)
+                listing.by_stem.setdefault(path.stem, []).append(path.name)
+
+    def companion_image(self, sidecar_path: Path) -> Optional[Path]:
+        names = self.listing(sidecar_path.parent).by_stem.get(sidecar_path.stem, ())
+        for ext in IMAGE_PROBE_ORDER:
+            name = sidecar_path.stem + ext
+            if name in names:
+                return sidecar_path.with_name(name)
+        return None
+
+    def companion_sidecar(self, image_path: Path) -> Optional[Path]:
+        sidecar = _find_sidecar_for_image(image_path)
+        return sidecar if self.exists(sidecar) else None
+
 
+def _iter_sidecars_in_dir(
+    directory: Path, recursive: bool, dir_index: Optional[DirectoryIndex] = None
+) -> Iterable[Path]:
+    files = (dir_index or DirectoryIndex()).iter_files(directory, recursive)
+    # Sorted so runs (and their output) are reproducible regardless of directory order.
+    yield from sorted(path for path in files if path.name.endswith(".json"))
 
-def _iter_images_in_dir(directory: Path, recursive: bool) -> Iterable[Path]:
-    iterator = directory.rglob("*") if recursive else directory.glob("*")
-    for path in iterator:
-        if path.is_file() and path.suffix.lower() in IMAGE_EXTENSIONS:
+
+def _iter_images_in_dir(
+    directory: Path, recursive: bool, dir_index: Optional[DirectoryIndex] = None
+) -> Iterable[Path]:
+    for path in (dir_index or DirectoryIndex()).iter_files(directory, recursive):
+        if path.stem.endswith(EMBED_COPY_SUFFIX):
+            continue
+        if path.suffix.lower() in IMAGE_EXTENSIONS:
             yield path
 
 
-def _find_image_for_sidecar(sidecar_path: Path) -> Optional[Path]:
+def _find_image_for_sidecar(sidecar_path: Path, dir_index: Optional[DirectoryIndex] = None) -> Optional[Path]:
+    if dir_index is not None:
+        return dir_index.companion_image(sidecar_path)
     stem = sidecar_path.stem
-    for ext in [".png", ".jpg", ".jpeg", ".webp", ".gif", ".bmp", ".tiff", ".heic"]:
+    for ext in IMAGE_PROBE_ORDER:
         candidate = sidecar_path.with_name(stem + ext)
         if candidate.exists():
             return candidate
@@ -348,103 +458,300 @@ def _generate_metadata_for_image(image_path: Path, model: str) -> Optional[Dict[
         return None
 
 
+def _generate_fields_for_image(
+    image_path: Path,
+    model: str,
+    fields: Dict[str, Dict[str, Any]],
+    context: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    try:
+        from core.generator import generate_fields_for_image
+    except Exception as exc:  # pragma: no cover - defensive
+        print(f"⚠️  Unable to import generator: {exc}", file=sys.stderr)
+        return None
+
+    try:
+        return generate_fields_for_image(str(image_path), fields, context, model=model)
+    except Exception as exc:
+        print(f"⚠️  OpenAI generation failed for {image_path.name}: {exc}", file=sys.stderr)
+        return None
+
+
 def _should_use_llm_value(value: Any) -> bool:
     if value is None:
         return True
     if isinstance(value, str) and not value.strip():
         return True
+    if isinstance(value, (list, dict)) and not value:
+        return True
     return False
 
 
-def _migrate_sidecar_file(
+def _is_enrichable(spec: Dict[str, Any]) -> bool:
+    """Whether OpenAI can describe a field of this type (text, lists, objects)."""
+    spec_type = spec.get("type")
+    types = spec_type if isinstance(spec_type, list) else [spec_type]
+    return any(t in ENRICHABLE_TYPES for t in types)
+
+
+@dataclass(frozen=True)
+class MigrationResult:
+    """Outcome for one sidecar, reported back to the parent for in-order printing."""
+
+    path: Path
+    status: str  # "updated", "would_update", "unchanged", "failed" or "needs_enrichment"
+    message: str = ""
+    warnings: tuple[str, ...] = ()
+    # Fields that needed OpenAI values were left empty, so the next run should look again.
+    unenriched: bool = False
+
+
+def _fields_to_enrich(migrated: Dict[str, Any], schema: Dict[str, Any], diff: SchemaDiff) -> Dict[str, Dict[str, Any]]:
+    """Newly added text, array and object fields still empty in this sidecar, with their schemas."""
+    properties = schema.get("properties", {})
+    return {
+        field: properties[field]
+        for field in sorted(diff.added_top_level)
+        if field in properties
+        and _is_enrichable(properties[field])
+        and _should_use_llm_value(migrated.get(field))
+    }
+
+
+def _fields_not_enriched(schema: Dict[str, Any], diff: SchemaDiff) -> list[str]:
+    """Added fields that keep their schema defaults: numbers, booleans and ``ai_details`` entries."""
+    properties = schema.get("properties", {})
+    skipped = [
+        field for field in sorted(diff.added_top_level) if field in properties and not _is_enrichable(properties[field])
+    ]
+    return skipped + [f"ai_details.{field}" for field in sorted(diff.added_ai_details)]
+
+
+def _migrate_one(
     sidecar_path: Path,
     schema: Dict[str, Any],
     diff: SchemaDiff,
-    use_openai: bool,
-    model: str,
     dry_run: bool,
-) -> bool:
-    original_data = _load_json(sidecar_path)
+    use_openai: bool = False,
+    model: str = "gpt-4o-mini",
+    defer_enrichment: bool = False,
+    dir_index: Optional[DirectoryIndex] = None,
+) -> MigrationResult:
+    """Migrate one sidecar and describe what happened instead of printing it.
+
+    With ``defer_enrichment`` a file that would need OpenAI values is left
+    untouched and reported as ``needs_enrichment``. The caller then migrates
+    it again outside the CPU pool, with ``use_openai``.
+    """
+    try:
+        original_data = _load_json(sidecar_path)
+    except (OSError, ValueError) as exc:
+        return MigrationResult(sidecar_path, "failed", f"❌ Failed to read {sidecar_path}: {exc}")
     migrated = json.loads(json.dumps(original_data))  # deep copy
 
     migrated = _coerce_to_schema(migrated, schema)
-
-    llm_payload: Optional[Dict[str, Any]] = None
-    if use_openai and diff.added_top_level:
-        image_path = _find_image_for_sidecar(sidecar_path)
+    warnings: list[str] = []
+    unenriched = False
+
+    fields = _fields_to_enrich(migrated, schema, diff) if use_openai else {}
+    if fields:
+        if defer_enrichment:
+            return MigrationResult(sidecar_path, "needs_enrichment")
+        image_path = _find_image_for_sidecar(sidecar_path, dir_index)
         if image_path:
-            llm_payload = _generate_metadata_for_image(image_path, model)
+            # Only the missing fields are requested; the current text is context.
+            context = {key: migrated.get(key) for key in ("title", "description") if key not in fields}
+            values = _generate_fields_for_image(image_path, model, fields, context) or {}
+            missing = [field for field in fields if _should_use_llm_value(values.get(field))]
+            if missing:
+                # Leave the file alone and out of the index, so the next run retries it.
+                return MigrationResult(
+                    sidecar_path,
+                    "failed",
+                    f"❌ OpenAI returned no {', '.join(missing)} for {sidecar_path}; left unchanged.",
+                    tuple(warnings),
+                )
+            migrated.update((field, values[field]) for field in fields)
         else:
-            print(
-                f"⚠️  No companion image found for {sidecar_path.name}; skipping OpenAI enrichment.",
-                file=sys.stderr,
-            )
-
-    new_fields = diff.added_top_level
-    for field in new_fields:
-        if field == "ai_details":
-            continue
-        spec = schema["properties"][field]
-        if _should_use_llm_value(migrated.get(field)) and llm_payload:
-            candidate = llm_payload.get(field)
-            if candidate not in (None, "", []):
-                migrated[field] = candidate
+            warnings.append(f"⚠️  No companion image found for {sidecar_path.name}; skipping OpenAI enrichment.")
+            unenriched = True
 
     if "ai_details" in schema.get("properties", {}):
         details_spec = schema["properties"]["ai_details"]
-        details_props = details_spec.get("properties", {})
         migrated.setdefault("ai_details", {})
         migrated["ai_details"] = _coerce_to_schema(migrated["ai_details"], details_spec)
 
-        if llm_payload and "ai_details" in llm_payload:
-            for field in diff.added_ai_details:
-                candidate = llm_payload["ai_details"].get(field)
-                if candidate not in (None, "", []):
-                    migrated["ai_details"][field] = candidate
-
     if migrated == original_data:
-        return False
+        return MigrationResult(sidecar_path, "unchanged", warnings=tuple(warnings), unenriched=unenriched)
 
     if dry_run:
-        print(f"🛈 Would update {sidecar_path}")
-        return False
+        return MigrationResult(
+            sidecar_path, "would_update", f"🛈 Would update {sidecar_path}", tuple(warnings), unenriched
+        )
 
-    _dump_json(sidecar_path, migrated)
-    print(f"✅ Updated {sidecar_path}")
-    return True
+    try:
+        _dump_json(sidecar_path, migrated)
+    except OSError as exc:
+        return MigrationResult(sidecar_path, "failed", f"❌ Failed to write {sidecar_path}: {exc}", tuple(warnings))
+    return MigrationResult(sidecar_path, "updated", f"✅ Updated {sidecar_path}", tuple(warnings), unenriched)
+
+
+def _report(result: MigrationResult) -> None:
+    for warning in result.warnings:
+        print(warning, file=sys.stderr)
+    if result.message:
+        print(result.message, file=sys.stderr if result.status == "failed" else sys.stdout)
+
+
+def _migrate_sidecar_file(
+    sidecar_path: Path,
+    schema: Dict[str, Any],
+    diff: SchemaDiff,
+    use_openai: bool,
+    model: str,
+    dry_run: bool,
+) -> bool:
+    result = _migrate_one(sidecar_path, schema, diff, dry_run, use_openai=use_openai, model=model)
+    _report(result)
+    return result.status == "updated"
+
+
+def _migrate_chunk(
+    paths: list[Path],
+    schema: Dict[str, Any],
+    diff: SchemaDiff,
+    dry_run: bool,
+    defer_enrichment: bool,
+) -> list[MigrationResult]:
+    """Process-pool entry point: the CPU-bound rewrite for a slice of sidecars."""
+    return [
+        _migrate_one(path, schema, diff, dry_run, use_openai=defer_enrichment, defer_enrichment=defer_enrichment)
+        for path in paths
+    ]
+
+
+def _chunks(paths: list[Path], workers: int) -> list[list[Path]]:
+    # A few chunks per worker balances load without paying pickling costs per file.
+    size = max(1, min(MAX_CHUNK_SIZE, -(-len(paths) // (workers * 4))))
+    return [paths[i : i + size] for i in range(0, len(paths), size)]
+
+
+def _run_migrations(
+    sidecar_paths: list[Path],
+    schema: Dict[str, Any],
+    diff: SchemaDiff,
+    use_openai: bool,
+    model: str,
+    dry_run: bool,
+    workers: int = 1,
+    openai_workers: int = DEFAULT_OPENAI_WORKERS,
+    index: Optional[ProcessingManifest] = None,
+    dir_index: Optional[DirectoryIndex] = None,
+) -> Dict[str, int]:
+    """Rewrite sidecars on ``workers`` processes, then enrich the ones that need OpenAI.
+
+    Results are printed in input order, so the output is the same for any
+    worker count. Enrichment is network-bound and runs on its own small thread
+    pool of ``openai_workers``, so it is throttled independently of the rewrite.
+    Sidecars that end up matching the schema are recorded in ``index``, unless
+    they still lack values OpenAI was asked to fill.
+    """
+    counts = {"updated": 0, "would_update": 0, "unchanged": 0, "failed": 0}
+    enrich: list[Path] = []
+    current: list[Path] = []
+    fingerprint = fingerprint_schema(schema)
+
+    def flush_index() -> None:
+        if index is not None and current:
+            index.record_sidecars(current, fingerprint)
+        current.clear()
+
+    def tally(result: MigrationResult) -> None:
+        if result.status == "needs_enrichment":
+            enrich.append(result.path)
+            return
+        _report(result)
+        counts[result.status] += 1
+        if result.status in ("updated", "unchanged") and not result.unenriched and not dry_run:
+            current.append(result.path)
+            if len(current) >= MAX_CHUNK_SIZE:
+                flush_index()
+
+    chunks = _chunks(sidecar_paths, max(1, workers))
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for results in pool.map(
+                _migrate_chunk,
+                chunks,
+                repeat(schema),
+                repeat(diff),
+                repeat(dry_run),
+                repeat(use_openai),
+            ):
+                for result in results:
+                    tally(result)
+    else:
+        for chunk in chunks:
+            for result in _migrate_chunk(chunk, schema, diff, dry_run, use_openai):
+                tally(result)
+
+    if enrich:
+        print(f"Enriching {len(enrich)} sidecar(s) via OpenAI ({openai_workers} at a time)...")
+        with ThreadPoolExecutor(max_workers=max(1, openai_workers)) as pool:
+            for result in pool.map(
+                lambda path: _migrate_one(
+                    path, schema, diff, dry_run, use_openai=True, model=model, dir_index=dir_index
+                ),
+                enrich,
+            ):
+                tally(result)
+    flush_index()
+    return counts
+
+
+def _print_migration_summary(counts: Dict[str, int], dry_run: bool, skipped: int) -> None:
+    changed = f"{counts['would_update']} would update" if dry_run else f"{counts['updated']} updated"
+    print(
+        f"Summary: {changed}, {counts['unchanged']} unchanged, "
+        f"{skipped} already current, {counts['failed']} failed"
+    )
 
 
 def _resolve_sidecar_targets(
     gallery_path: Path,
     batch_inputs: Optional[Iterable[Path]],
     recursive: bool,
+    dir_index: Optional[DirectoryIndex] = None,
 ) -> list[Path]:
+    dir_index = dir_index or DirectoryIndex()
     targets: list[Path] = []
     seen: set[Path] = set()
 
     def add_target(path: Path) -> None:
-        resolved = path.resolve()
-        if resolved not in seen:
-            targets.append(resolved)
-            seen.add(resolved)
+        # Entries are resolved once below; files found under them only need
+        # lexical normalisation, which costs no filesystem round trip.
+        absolute = Path(os.path.abspath(path))
+        if absolute not in seen:
+            targets.append(absolute)
+            seen.add(absolute)
 
     def handle_entry(entry_path: Path) -> None:
         if entry_path.is_dir():
-            for candidate in _iter_sidecars_in_dir(entry_path, recursive):
+            for candidate in _iter_sidecars_in_dir(entry_path, recursive, dir_index):
                 add_target(candidate)
             return
 
         suffix = entry_path.suffix.lower()
         if suffix == ".json":
-            if entry_path.exists():
+            if dir_index.exists(entry_path):
                 add_target(entry_path)
             else:
                 print(f"⚠️  Sidecar file not found: {entry_path}", file=sys.stderr)
             return
 
         if suffix in IMAGE_EXTENSIONS:
-            sidecar = _find_sidecar_for_image(entry_path)
-            if sidecar.exists():
+            sidecar = dir_index.companion_sidecar(entry_path)
+            if sidecar is not None:
                 add_target(sidecar)
             else:
                 print(
@@ -477,7 +784,7 @@ def _resolve_sidecar_targets(
             handle_entry(path.resolve())
 
     if not targets:
-        for sidecar in _iter_sidecars_in_dir(gallery_path, recursive):
+        for sidecar in _iter_sidecars_in_dir(gallery_path.resolve(), recursive, dir_index):
             add_target(sidecar)
 
     return targets
@@ -521,21 +828,20 @@ def watch_directory_for_new_images(
     try:
         while True:
             now = time.monotonic()
-            for image_path in _iter_images_in_dir(directory, recursive):
-                resolved_image = image_path.resolve()
-                if resolved_image in processed:
+            # A fresh snapshot per poll: one scandir per directory instead of a stat per image.
+            dir_index = DirectoryIndex()
+            for image_path in _iter_images_in_dir(directory, recursive, dir_index):
+                if image_path in processed:
                     continue
-                sidecar_path = _find_sidecar_for_image(resolved_image)
-                if sidecar_path.exists():
-                    processed.add(resolved_image)
-                    pending.pop(resolved_image, None)
+                if dir_index.companion_sidecar(image_path) is not None:
+                    processed.add(image_path)
+                    pending.pop(image_path, None)
                     continue
-                pending.setdefault(resolved_image, now)
+                pending.setdefault(image_path, now)
 
             ready_to_process: list[Path] = []
             for image_path, first_seen in list(pending.items()):
-                sidecar_path = _find_sidecar_for_image(image_path)
-                if sidecar_path.exists():
+                if dir_index.companion_sidecar(image_path) is not None:
                     processed.add(image_path)
                     pending.pop(image_path, None)
                     continue
@@ -582,6 +888,10 @@ def migrate(
     dry_run: bool,
     batch_inputs: Optional[Iterable[Path]] = None,
     recursive: bool = False,
+    workers: int = 1,
+    openai_workers: int = DEFAULT_OPENAI_WORKERS,
+    manifest_path: Optional[Path] = MANIFEST_PATH,
+    force: bool = False,
 ) -> Dict[str, Any]:
     if not schema_path.exists():
         raise FileNotFoundError(f"Schema file not found: {schema_path}")
@@ -590,15 +900,20 @@ def migrate(
     previous = _load_json(snapshot_path) if snapshot_path.exists() else None
     diff = _diff_schemas(previous, schema)
     _print_diff_summary(diff)
+    not_enriched = _fields_not_enriched(schema, diff) if use_openai else []
+    if not_enriched:
+        print(f"🛈 Not filled via OpenAI (schema defaults kept): {', '.join(not_enriched)}")
 
     generator_modified = _ensure_generator_matches_schema(schema)
     if generator_modified:
         print("✅ Updated core/generator.py with new schema fields.")
 
+    dir_index = DirectoryIndex()
     sidecar_paths = _resolve_sidecar_targets(
         gallery_path=gallery_path,
         batch_inputs=batch_inputs,
         recursive=recursive,
+        dir_index=dir_index,
     )
     if not sidecar_paths:
         if batch_inputs:
@@ -608,8 +923,33 @@ def migrate(
     else:
         print(f"Scanning {len(sidecar_paths)} existing sidecar file(s)...")
 
-    for sidecar in sidecar_paths:
-        _migrate_sidecar_file(sidecar, schema, diff, use_openai, model, dry_run)
+    # A dry run leaves every file alone, the index included.
+    index = ProcessingManifest(manifest_path) if manifest_path and not dry_run else None
+    try:
+        stale = sidecar_paths
+        if index is not None and not force and sidecar_paths:
+            # A stat and an index lookup per file; current sidecars are never parsed.
+            current = index.current_sidecars(sidecar_paths, fingerprint_schema(schema))
+            if current:
+                stale = [path for path in sidecar_paths if str(path) not in current]
+                print(f"Skipping {len(sidecar_paths) - len(stale)} sidecar(s) already at the current schema.")
+        counts = _run_migrations(
+            stale,
+            schema,
+            diff,
+            use_openai=use_openai,
+            model=model,
+            dry_run=dry_run,
+            workers=workers,
+            openai_workers=openai_workers,
+            index=index,
+            dir_index=dir_index,
+        )
+    finally:
+        if index is not None:
+            index.close()
+    if sidecar_paths:
+        _print_migration_summary(counts, dry_run, skipped=len(sidecar_paths) - len(stale))
 
     if not dry_run:
         _dump_json(snapshot_path, schema)
@@ -625,7 +965,7 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
         epilog=textwrap.dedent(
             """
             OpenAI usage:
-              Supply --use-openai to populate new textual fields via the Responses API.
+              Supply --use-openai to populate new text, array and object fields via the Responses API.
               Ensure OPENAI_API_KEY is present in the environment and that the model
               you specify is available to your account.
             """
@@ -689,6 +1029,29 @@ def parse_args(argv: Optional[Iterable[str]] = None) -> argparse.Namespace:
             "Continues running until interrupted."
         ),
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes used to rewrite sidecars in parallel (default: 1).",
+    )
+    parser.add_argument(
+        "--openai-workers",
+        type=int,
+        default=DEFAULT_OPENAI_WORKERS,
+        help=f"Concurrent OpenAI requests when --use-openai fills new fields (default: {DEFAULT_OPENAI_WORKERS}).",
+    )
+    parser.add_argument(
+        "--manifest",
+        type=Path,
+        default=MANIFEST_PATH,
+        help="SQLite index of sidecars already at the current schema (default: .cache/manifest.sqlite3).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-check every sidecar, even those the index lists as current.",
+    )
     parser.add_argument(
         "--dry-run",
         action="store_true",
@@ -709,6 +1072,10 @@ def main(argv: Optional[Iterable[str]] = None) -> None:
             dry_run=args.dry_run,
             batch_inputs=args.batch,
             recursive=args.recursive,
+            workers=args.workers,
+            openai_workers=args.openai_workers,
+            manifest_path=args.manifest,
+            force=args.force,
         )
         if args.watch_folder_mode:
             if not args.use_openai:
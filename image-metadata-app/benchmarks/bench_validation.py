@@ -0,0 +1,90 @@
+"""Documents/second for the generated sidecar validator vs. jsonschema.
+
+    python benchmarks/bench_validation.py --count 200000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from jsonschema import Draft202012Validator  # noqa: E402
+
+from utils.schema_codegen import compile_schema  # noqa: E402
+from utils.validation import SCHEMA_PATH  # noqa: E402
+
+
+def make_documents(count: int, invalid_ratio: float, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        doc = {
+            "title": f"Image {i}",
+            "description": "A generated description of the picture. " * 3,
+            "ai_generated": True,
+            "ai_details": {
+                "provider": "openai",
+                "model": "gpt-4o-mini",
+                "prompt": "Describe the image.",
+                "response_id": f"resp_{i}",
+                "finish_reason": "completed",
+                "created": 1700000000 + i,
+                "status": "ok",
+                "raw_response": {"id": f"resp_{i}", "output": []},
+            },
+            "reviewed": False,
+            "detected_at": 1700000000 + i,
+        }
+        if rng.random() < invalid_ratio:
+            doc[rng.choice(["title", "reviewed", "detected_at"])] = None
+        docs.append(doc)
+    return docs
+
+
+def rate(fn, docs: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for doc in docs:
+            fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return len(docs) / best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=50_000, help="Documents per run (default: 50000)")
+    parser.add_argument("--invalid-ratio", type=float, default=0.05, help="Share of invalid documents (default: 0.05)")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per validator; the best is reported (default: 3)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
+        schema = json.load(f)
+    docs = make_documents(args.count, args.invalid_ratio)
+    reference = Draft202012Validator(schema).is_valid
+    fast = compile_schema(schema)
+    if [fast(d) for d in docs] != [reference(d) for d in docs]:
+        raise SystemExit("❌ Generated validator disagrees with jsonschema")
+
+    results = {
+        "documents": len(docs),
+        "jsonschema_docs_per_sec": rate(reference, docs, args.repeat),
+        "generated_docs_per_sec": rate(fast, docs, args.repeat),
+    }
+    results["speedup"] = results["generated_docs_per_sec"] / results["jsonschema_docs_per_sec"]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"Documents:   {results['documents']}")
+    print(f"jsonschema:  {results['jsonschema_docs_per_sec']:,.0f} docs/s")
+    print(f"generated:   {results['generated_docs_per_sec']:,.0f} docs/s")
+    print(f"Speedup:     {results['speedup']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
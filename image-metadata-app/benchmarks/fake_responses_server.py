@@ -0,0 +1,246 @@
+"""Local stand-in for the OpenAI Responses API, for benchmarks.
+
+Answers ``POST /v1/responses`` with JSON that fits the requested
+``json_schema`` after a configurable latency. A share of requests can fail
+with 500s or 429s (with ``retry-after-ms``). ``GET /stats`` returns counters,
+and the first-request time per uploaded image (by SHA-256 of the decoded
+bytes), so callers can measure end-to-end latency per image.
+
+    python benchmarks/fake_responses_server.py --port 8765 --latency-ms 300 --rate-limit-rate 0.02
+    OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=bench python main.py -d gallery -a -j
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class ServerConfig:
+    latency_ms: float = 200.0
+    jitter_ms: float = 50.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    retry_after_ms: int = 200
+    seed: Optional[int] = None
+
+
+class _State:
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.ok = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.request_bytes = 0
+        self.first_seen: Dict[str, float] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "ok": self.ok,
+                "errors": self.errors,
+                "rate_limited": self.rate_limited,
+                "request_bytes": self.request_bytes,
+                "first_seen": dict(self.first_seen),
+            }
+
+
+def _value_for(spec: Dict[str, Any], name: str) -> Any:
+    kind = spec.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "string":
+        return f"Synthetic {name.replace('_', ' ')}"
+    if kind in ("number", "integer"):
+        return 0
+    if kind == "boolean":
+        return False
+    if kind == "array":
+        return []
+    if kind == "object":
+        return {key: _value_for(sub, key) for key, sub in (spec.get("properties") or {}).items()}
+    return None
+
+
+def _payload_for(body: Dict[str, Any]) -> Dict[str, Any]:
+    schema = ((body.get("text") or {}).get("format") or {}).get("schema")
+    if not schema:
+        # The SDK fallback drops the schema; answer with the sidecar basics.
+        return {"title": "Synthetic title", "description": "Synthetic description"}
+    return _value_for(schema, "item")
+
+
+def _image_digest(body: Dict[str, Any]) -> Optional[str]:
+    for message in body.get("input") or []:
+        for part in message.get("content") or []:
+            url = part.get("image_url") if isinstance(part, dict) else None
+            if isinstance(url, str) and url.startswith("data:") and "," in url:
+                return hashlib.sha256(base64.b64decode(url.split(",", 1)[1])).hexdigest()
+    return None
+
+
+def _make_handler(state: _State):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # noqa: A002 - silence per-request logging
+            pass
+
+        def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path.rstrip("/") == "/stats":
+                self._send_json(200, state.snapshot())
+            else:
+                self._send_json(404, {"error": {"message": "not found"}})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if not self.path.rstrip("/").endswith("/responses"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+            arrived = time.time()
+            body = json.loads(raw or b"{}")
+            digest = _image_digest(body)
+            config = state.config
+            with state.lock:
+                state.requests += 1
+                state.request_bytes += len(raw)
+                if digest:
+                    state.first_seen.setdefault(digest, arrived)
+                roll = state.random.random()
+                delay = max(0.0, state.random.gauss(config.latency_ms, config.jitter_ms)) / 1000.0
+
+            if roll < config.rate_limit_rate:
+                with state.lock:
+                    state.rate_limited += 1
+                self._send_json(
+                    429,
+                    {"error": {"message": "Rate limit reached", "type": "rate_limit_error"}},
+                    {"retry-after-ms": str(config.retry_after_ms)},
+                )
+                return
+            time.sleep(delay)
+            if roll < config.rate_limit_rate + config.error_rate:
+                with state.lock:
+                    state.errors += 1
+                self._send_json(500, {"error": {"message": "Synthetic server error", "type": "server_error"}})
+                return
+
+            text = json.dumps(_payload_for(body))
+            with state.lock:
+                state.ok += 1
+                response_id = f"resp_fake_{state.ok}"
+            self._send_json(
+                200,
+                {
+                    "id": response_id,
+                    "object": "response",
+                    "created_at": int(arrived),
+                    "status": "completed",
+                    "model": body.get("model", "gpt-4o-mini"),
+                    "output": [
+                        {
+                            "type": "message",
+                            "id": f"msg_{response_id}",
+                            "status": "completed",
+                            "role": "assistant",
+                            "content": [{"type": "output_text", "text": text, "annotations": []}],
+                        }
+                    ],
+                    "usage": {
+                        "input_tokens": len(raw) // 4,
+                        "output_tokens": len(text) // 4,
+                        "total_tokens": len(raw) // 4 + len(text) // 4,
+                    },
+                },
+            )
+
+    return Handler
+
+
+class FakeResponsesServer:
+    """Threaded fake API server; use as a context manager or call ``start``/``stop``."""
+
+    def __init__(self, config: Optional[ServerConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.state = _State(config or ServerConfig())
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self.state))
+        self.httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def stats(self) -> Dict[str, Any]:
+        return self.state.snapshot()
+
+    def start(self) -> "FakeResponsesServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-responses", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "FakeResponsesServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fake OpenAI Responses API for benchmarks.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Mean response latency (default: 200)")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Latency standard deviation (default: 50)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--retry-after-ms", type=int, default=200, help="retry-after-ms sent with 429s")
+    parser.add_argument("--seed", type=int, help="Seed for latency and failure sampling")
+    args = parser.parse_args()
+
+    config = ServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        retry_after_ms=args.retry_after_ms,
+        seed=args.seed,
+    )
+    server = FakeResponsesServer(config, args.host, args.port)
+    print(f"🧪 Fake Responses API listening on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping fake server.")
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
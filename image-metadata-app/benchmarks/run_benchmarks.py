@@ -0,0 +1,342 @@
+"""End-to-end throughput benchmarks against a local fake Responses API.
+
+Builds synthetic galleries and runs the real entry points as subprocesses:
+
+- ``main``: ``main.py -d GALLERY -a -j`` (batch mode)
+- ``watch``: ``main.py --watch-folder-mode`` while images are moved in
+- ``migrate``: ``@wtils/migrate_update_sidecarSchema.py`` over legacy sidecars,
+  then a second run that should skip every already-current sidecar
+
+Each run reports images/sec, p50/p95/p99 per-image latency and peak RSS.
+Results are saved as JSON so runs on different commits can be compared.
+
+    python benchmarks/run_benchmarks.py --sizes 1000 10000 --latency-ms 300 --rate-limit-rate 0.02
+    python benchmarks/run_benchmarks.py --scenarios migrate --sizes 100000 --workers 8
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/OLD.json
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from fake_responses_server import FakeResponsesServer, ServerConfig
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = APP_ROOT / "benchmarks" / "results"
+MIGRATION_TOOL = APP_ROOT / "@wtils" / "migrate_update_sidecarSchema.py"
+SCENARIOS = ("main", "watch", "migrate")
+# Images per sub-folder in synthetic galleries, to keep directories realistic.
+FILES_PER_DIR = 1000
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile; None for an empty sample."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(round(pct / 100.0 * len(ordered) + 0.5))))
+    return ordered[rank - 1]
+
+
+def latency_summary(seconds: List[float]) -> Dict[str, Optional[float]]:
+    millis = [s * 1000.0 for s in seconds]
+    return {f"p{p}": percentile(millis, p) for p in (50, 95, 99)}
+
+
+def make_images(directory: Path, count: int) -> Dict[str, Path]:
+    """Write ``count`` distinct tiny PNGs; returns SHA-256 of the bytes -> path.
+
+    PNGs this small are uploaded unchanged, so the fake server sees the same
+    bytes and can time each image by its digest.
+    """
+    from PIL import Image
+
+    digests: Dict[str, Path] = {}
+    for i in range(count):
+        folder = directory / f"part{i // FILES_PER_DIR:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / f"img{i:06d}.png"
+        Image.new("RGB", (32, 32), (i % 256, (i // 256) % 256, (i // 65536) % 256)).save(path, "PNG")
+        digests[hashlib.sha256(path.read_bytes()).hexdigest()] = path
+    return digests
+
+
+def make_legacy_sidecars(directory: Path, count: int) -> None:
+    for i in range(count):
+        folder = directory / f"part{i // FILES_PER_DIR:04d}"
+        folder.mkdir(parents=True, exist_ok=True)
+        legacy = {"title": f"Image {i}", "description": "Legacy sidecar", "obsolete_field": True}
+        (folder / f"img{i:06d}.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+
+def _env(server: Optional[FakeResponsesServer]) -> Dict[str, str]:
+    env = {k: v for k, v in os.environ.items() if not k.startswith("OPENAI_")}
+    env["PYTHONUNBUFFERED"] = "1"
+    if server is not None:
+        env["OPENAI_BASE_URL"] = server.base_url
+        env["OPENAI_API_KEY"] = "benchmark"
+    return env
+
+
+def _wait(proc: subprocess.Popen) -> float:
+    """Reap ``proc`` and return its peak RSS in MiB (Linux reports KiB, macOS bytes)."""
+    _, status, usage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return usage.ru_maxrss / divisor
+
+
+def run_command(cmd: List[str], env: Dict[str, str], log_path: Path) -> Dict[str, Any]:
+    with open(log_path, "w", encoding="utf-8") as log:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=APP_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+        peak_rss = _wait(proc)
+        wall = time.perf_counter() - start
+    return {"wall_seconds": wall, "returncode": proc.returncode, "peak_rss_mb": peak_rss}
+
+
+def _image_latencies(digests: Dict[str, Path], first_seen: Dict[str, float]) -> List[float]:
+    """Seconds from an image's first API request to its sidecar landing on disk."""
+    latencies = []
+    for digest, image in digests.items():
+        sidecar = image.with_suffix(".json")
+        if digest in first_seen and sidecar.exists():
+            latencies.append(sidecar.stat().st_mtime - first_seen[digest])
+    return latencies
+
+
+def bench_main(size: int, args, workdir: Path) -> Dict[str, Any]:
+    gallery = workdir / "gallery"
+    digests = make_images(gallery, size)
+    with FakeResponsesServer(_server_config(args)) as server:
+        cmd = [
+            sys.executable, str(APP_ROOT / "main.py"),
+            "-d", str(gallery), "--recursive", "-a", "-j",
+            "--concurrency", str(args.concurrency),
+            "--max-retries", str(args.max_retries),
+            "--no-cache", "--manifest", str(workdir / "manifest.sqlite3"),
+            "--runs-dir", str(workdir / "runs"),
+        ]  # fmt: skip
+        run = run_command(cmd, _env(server), workdir / "main.log")
+        stats = server.stats()
+    latencies = _image_latencies(digests, stats.pop("first_seen"))
+    return _result("main", size, run, len(latencies), latencies, stats)
+
+
+def bench_watch(size: int, args, workdir: Path) -> Dict[str, Any]:
+    staging = workdir / "staging"
+    watched = workdir / "watched"
+    watched.mkdir(parents=True)
+    digests = make_images(staging, size)
+    log_path = workdir / "watch.log"
+    with FakeResponsesServer(_server_config(args)) as server, open(log_path, "w", encoding="utf-8") as log:
+        cmd = [
+            sys.executable, str(APP_ROOT / "main.py"),
+            "--watch-folder-mode", str(watched), "-a", "-j",
+            "--watch-delay", str(args.watch_delay),
+            "--max-retries", str(args.max_retries),
+            "--no-cache", "--manifest", str(workdir / "manifest.sqlite3"),
+        ]  # fmt: skip
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=APP_ROOT, env=_env(server), stdout=log, stderr=subprocess.STDOUT)
+        _wait_for_text(log_path, "Watching", timeout=30)
+
+        arrived: Dict[Path, float] = {}
+        for image in digests.values():
+            target = watched / image.name
+            os.replace(image, target)
+            arrived[target] = time.time()
+
+        deadline = time.monotonic() + args.watch_timeout
+        while time.monotonic() < deadline:
+            if sum(1 for t in arrived if t.with_suffix(".json").exists()) >= size:
+                break
+            time.sleep(0.25)
+        proc.send_signal(signal.SIGINT)
+        peak_rss = _wait(proc)
+        wall = time.perf_counter() - start
+        stats = server.stats()
+    stats.pop("first_seen")
+
+    done = [(t.with_suffix(".json").stat().st_mtime, seen) for t, seen in arrived.items() if t.with_suffix(".json").exists()]
+    latencies = [finished - seen for finished, seen in done]
+    run = {"wall_seconds": wall, "returncode": proc.returncode, "peak_rss_mb": peak_rss}
+    result = _result("watch", size, run, len(done), latencies, stats)
+    if done:
+        # Throughput from the first arrival to the last sidecar, excluding startup and shutdown.
+        span = max(f for f, _ in done) - min(arrived.values())
+        result["images_per_sec"] = len(done) / span if span > 0 else None
+    return result
+
+
+def bench_migrate(size: int, args, workdir: Path) -> List[Dict[str, Any]]:
+    gallery = workdir / "sidecars"
+    make_legacy_sidecars(gallery, size)
+    cmd = [
+        sys.executable, str(MIGRATION_TOOL),
+        "--gallery", str(gallery), "--recursive",
+        "--snapshot", str(workdir / "snapshot.json"),
+        "--manifest", str(workdir / "manifest.sqlite3"),
+        "--workers", str(args.workers),
+    ]  # fmt: skip
+    results = []
+    for name in ("migrate", "migrate-rerun"):
+        run = run_command(cmd, _env(None), workdir / f"{name}.log")
+        results.append(_result(name, size, run, size, [], {}))
+    return results
+
+
+def _result(
+    scenario: str,
+    size: int,
+    run: Dict[str, Any],
+    completed: int,
+    latencies: List[float],
+    server_stats: Dict[str, Any],
+) -> Dict[str, Any]:
+    wall = run["wall_seconds"]
+    return {
+        "scenario": scenario,
+        "images": size,
+        "completed": completed,
+        "wall_seconds": round(wall, 3),
+        "images_per_sec": completed / wall if wall > 0 else None,
+        "latency_ms": latency_summary(latencies),
+        "peak_rss_mb": round(run["peak_rss_mb"], 1),
+        "returncode": run["returncode"],
+        "server": server_stats,
+    }
+
+
+def _wait_for_text(path: Path, text: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if path.exists() and text in path.read_text(encoding="utf-8", errors="replace"):
+            return
+        time.sleep(0.1)
+    raise RuntimeError(f"Timed out waiting for {text!r} in {path}")
+
+
+def _server_config(args) -> ServerConfig:
+    return ServerConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        seed=args.seed,
+    )
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=APP_ROOT, capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _fmt(value: Optional[float], spec: str = ".1f") -> str:
+    return "—" if value is None else format(value, spec)
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    print(f"{'scenario':<14}{'images':>8}{'img/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MiB':>10}")
+    for r in results:
+        lat = r["latency_ms"]
+        print(
+            f"{r['scenario']:<14}{r['images']:>8}{_fmt(r['images_per_sec']):>10}"
+            f"{_fmt(lat['p50'], '.0f'):>10}{_fmt(lat['p95'], '.0f'):>10}{_fmt(lat['p99'], '.0f'):>10}"
+            f"{_fmt(r['peak_rss_mb']):>10}"
+        )
+
+
+def compare(current: List[Dict[str, Any]], baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {(r["scenario"], r["images"]): r for r in baseline["results"]}
+    print(f"\nCompared with {baseline_path.name} (commit {baseline.get('commit', '?')}):")
+    for r in current:
+        old = previous.get((r["scenario"], r["images"]))
+        if not old or not old.get("images_per_sec") or not r.get("images_per_sec"):
+            continue
+        change = (r["images_per_sec"] / old["images_per_sec"] - 1) * 100
+        p95_old, p95_new = old["latency_ms"].get("p95"), r["latency_ms"].get("p95")
+        p95 = f", p95 {p95_old:.0f} -> {p95_new:.0f} ms" if p95_old and p95_new else ""
+        print(f"  {r['scenario']:<14}{r['images']:>8}: img/s {change:+.1f}%{p95}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000], help="Gallery sizes (default: 1000)")
+    parser.add_argument("--watch-size", type=int, default=200, help="Images for the watch scenario (default: 200)")
+    parser.add_argument("--watch-delay", type=float, default=0.0, help="--watch-delay passed to main.py (default: 0)")
+    parser.add_argument("--watch-timeout", type=float, default=600.0, help="Give up on watch mode after this long")
+    parser.add_argument("--concurrency", type=int, default=8, help="main.py --concurrency (default: 8)")
+    parser.add_argument("--max-retries", type=int, default=4, help="main.py --max-retries (default: 4)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Migration --workers")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Fake API mean latency (default: 200)")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Fake API latency std-dev (default: 50)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Share of 429 responses")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the fake API (default: 1)")
+    parser.add_argument("--output", type=Path, help="Results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic galleries and logs")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    root = Path(tempfile.mkdtemp(prefix="imgmeta-bench-"))
+    try:
+        for scenario in args.scenarios:
+            sizes = [args.watch_size] if scenario == "watch" else args.sizes
+            for size in sizes:
+                workdir = root / f"{scenario}-{size}"
+                workdir.mkdir()
+                print(f"⏱️  {scenario} with {size} images...")
+                if scenario == "main":
+                    results.append(bench_main(size, args, workdir))
+                elif scenario == "watch":
+                    results.append(bench_watch(size, args, workdir))
+                else:
+                    results.extend(bench_migrate(size, args, workdir))
+    finally:
+        if args.keep:
+            print(f"Artifacts kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    commit = _git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: (str(v) if isinstance(v, Path) else v) for k, v in vars(args).items()},
+        "results": results,
+    }
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    print()
+    print_table(results)
+    print(f"\n[✓] Results saved to: {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,268 @@
+"""``python main.py validate DIR``: audit every JSON sidecar under a directory tree.
+
+Sidecars are checked in a process pool with the compiled sidecar schema
+(``utils.validation``). Each result is cached in the processing manifest by
+path, size, mtime and schema fingerprint, so a re-audit only reads files that
+changed since the last one. A JSON report lists every invalid or unreadable
+sidecar. The exit status is 1 if there are any.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from core.manifest import ProcessingManifest
+from utils.validation import schema_fingerprint
+
+APP_ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_PATH = APP_ROOT / ".cache" / "manifest.sqlite3"
+REPORT_PATH = APP_ROOT / "logs" / "validation_report.json"
+MAX_CHUNK_SIZE = 256
+# Below this many files to check, starting worker processes costs more than it saves.
+MIN_PARALLEL_FILES = 512
+
+
+@dataclass(frozen=True)
+class SidecarFile:
+    path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class FileResult:
+    path: str
+    size: int
+    mtime_ns: int
+    valid: bool
+    issues: list[dict] = field(default_factory=list)
+    # Set when the file could not be read; such results are not cached.
+    error: str = ""
+    cached: bool = False
+
+
+@dataclass
+class AuditSummary:
+    sidecars: int = 0
+    valid: int = 0
+    invalid: int = 0
+    unreadable: int = 0
+    cached: int = 0
+    validated: int = 0
+
+
+def iter_sidecar_files(root: Path) -> Iterator[SidecarFile]:
+    """Yield every ``*.json`` under ``root`` with the size/mtime seen while walking.
+
+    Hidden files and directories (``.cache``, ``.git``, temp files) are skipped.
+    """
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                listing = list(entries)
+        except OSError:
+            continue
+        for entry in listing:
+            if entry.name.startswith("."):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                    continue
+                if not entry.name.endswith(".json") or not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            yield SidecarFile(os.path.abspath(entry.path), stat.st_size, stat.st_mtime_ns)
+
+
+def validate_sidecar_file(sidecar: SidecarFile) -> FileResult:
+    """Validate one sidecar file; runs in the worker processes."""
+    from utils.validation import is_valid, validation_issues
+
+    def result(valid: bool, issues: Optional[list[dict]] = None, error: str = "") -> FileResult:
+        return FileResult(sidecar.path, sidecar.size, sidecar.mtime_ns, valid, issues or [], error)
+
+    try:
+        with open(sidecar.path, "rb") as f:
+            raw = f.read()
+    except OSError as exc:
+        return result(False, error=f"{type(exc).__name__}: {exc}")
+    try:
+        data = json.loads(raw)
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        return result(False, [{"path": "$", "message": f"Invalid JSON: {exc}", "validator": "json"}])
+    if is_valid(data):
+        return result(True)
+    return result(False, [asdict(issue) for issue in validation_issues(data)])
+
+
+def _validate_chunk(chunk: list[SidecarFile]) -> list[FileResult]:
+    return [validate_sidecar_file(sidecar) for sidecar in chunk]
+
+
+def _chunks(files: list[SidecarFile], workers: int) -> list[list[SidecarFile]]:
+    # A few chunks per worker balances load without paying pickling costs per file.
+    size = max(1, min(MAX_CHUNK_SIZE, -(-len(files) // (workers * 4))))
+    return [files[i : i + size] for i in range(0, len(files), size)]
+
+
+def _validate_files(files: list[SidecarFile], workers: int) -> Iterator[list[FileResult]]:
+    """Yield results chunk by chunk, in input order."""
+    if workers <= 1 or len(files) < MIN_PARALLEL_FILES:
+        for chunk in _chunks(files, 1):
+            yield _validate_chunk(chunk)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_validate_chunk, _chunks(files, workers))
+
+
+def audit(
+    root: Path,
+    workers: int = 1,
+    manifest: Optional[ProcessingManifest] = None,
+) -> tuple[AuditSummary, list[FileResult]]:
+    """Validate the sidecars under ``root``, reusing cached results from ``manifest``.
+
+    Returns the counts and the failing results (invalid or unreadable), sorted by path.
+    """
+    fingerprint = schema_fingerprint()
+    files = sorted(iter_sidecar_files(root), key=lambda sidecar: sidecar.path)
+    summary = AuditSummary(sidecars=len(files))
+    failures: list[FileResult] = []
+
+    def count(result: FileResult) -> None:
+        if result.error:
+            summary.unreadable += 1
+            failures.append(result)
+        elif result.valid:
+            summary.valid += 1
+        else:
+            summary.invalid += 1
+            failures.append(result)
+
+    cached = manifest.cached_validations((sidecar.path for sidecar in files), fingerprint) if manifest else {}
+    todo: list[SidecarFile] = []
+    for sidecar in files:
+        hit = cached.get(sidecar.path)
+        if hit is not None and hit[0] == sidecar.size and hit[1] == sidecar.mtime_ns:
+            count(FileResult(sidecar.path, sidecar.size, sidecar.mtime_ns, hit[2], json.loads(hit[3]), cached=True))
+            summary.cached += 1
+        else:
+            todo.append(sidecar)
+
+    for results in _validate_files(todo, workers):
+        for result in results:
+            count(result)
+        summary.validated += len(results)
+        if manifest is not None:
+            manifest.record_validations(
+                (
+                    (r.path, r.size, r.mtime_ns, r.valid, json.dumps(r.issues, ensure_ascii=False))
+                    for r in results
+                    if not r.error
+                ),
+                fingerprint,
+            )
+
+    failures.sort(key=lambda result: result.path)
+    return summary, failures
+
+
+def build_report(root: Path, summary: AuditSummary, failures: Iterable[FileResult]) -> dict:
+    invalid = []
+    unreadable = []
+    for result in failures:
+        if result.error:
+            unreadable.append({"path": result.path, "error": result.error})
+        else:
+            invalid.append({"path": result.path, "issues": result.issues, "cached": result.cached})
+    return {
+        "root": os.path.abspath(root),
+        "schema_fingerprint": schema_fingerprint(),
+        "generated_at": int(time.time()),
+        "totals": asdict(summary),
+        "invalid": invalid,
+        "unreadable": unreadable,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="main.py validate",
+        description="Validate every JSON sidecar under a directory against the sidecar schema.",
+    )
+    parser.add_argument("directory", help="Gallery directory to walk (recursively)")
+    parser.add_argument(
+        "--report",
+        default=str(REPORT_PATH),
+        help="Where to write the JSON report; '-' for stdout (default: logs/validation_report.json)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(MANIFEST_PATH),
+        help="SQLite manifest holding cached results (default: .cache/manifest.sqlite3 in the app folder)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Validate every sidecar again and do not update cached results",
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    root = Path(args.directory).expanduser()
+    if not root.is_dir():
+        print(f"❌ Not a directory: {root}")
+        return 2
+
+    manifest = ProcessingManifest(Path(args.manifest).expanduser()) if args.use_cache else None
+    try:
+        summary, failures = audit(root, workers=args.workers, manifest=manifest)
+    finally:
+        if manifest is not None:
+            manifest.close()
+
+    report = json.dumps(build_report(root, summary, failures), indent=2, ensure_ascii=False) + "\n"
+    if args.report == "-":
+        sys.stdout.write(report)
+        out = sys.stderr
+    else:
+        report_path = Path(args.report).expanduser()
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(report, encoding="utf-8")
+        out = sys.stdout
+
+    print(
+        f"🔎 Checked {summary.sidecars} sidecar{'s' if summary.sidecars != 1 else ''} under {root}: "
+        f"{summary.validated} validated, {summary.cached} from cache.",
+        file=out,
+    )
+    if summary.invalid or summary.unreadable:
+        print(f"⚠️  Invalid: {summary.invalid}. Unreadable: {summary.unreadable}.", file=out)
+    else:
+        print("✅ All sidecars are valid.", file=out)
+    if args.report != "-":
+        print(f"📝 Report written to: {args.report}", file=out)
+    return 1 if summary.invalid or summary.unreadable else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Offline bulk generation through a Batch-style JSONL submission.
+
+Requests are the same bodies ``generate_metadata_from_image`` sends. They
+are packed one per line into JSONL files, submitted to a ``BatchProvider``,
+and later collected into sidecars. ``OpenAIBatchProvider`` talks to the
+OpenAI Batch API. ``LocalBatchProvider`` is a file-based stand-in for tests
+and dry runs.
+"""
+
+import json
+import secrets
+import shutil
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Protocol
+
+from core.generator import DEFAULT_MAX_EDGE, build_metadata_request, get_client, sidecar_from_response
+
+BATCH_ENDPOINT = "/v1/responses"
+# OpenAI Batch API input limits are 50k requests and 200 MB per file; files
+# are cut at 190 MB to leave headroom below the hard limit.
+MAX_REQUESTS_PER_BATCH = 50_000
+MAX_BYTES_PER_BATCH = 190 * 1024 * 1024
+# Batches that will never complete; their images have to be submitted again.
+FAILED_STATUSES = frozenset({"expired", "failed", "cancelled"})
+
+
+class BatchProvider(Protocol):
+    name: str
+
+    def submit(self, jsonl_path: Path) -> str:
+        """Upload a JSONL request file and return the provider's batch id."""
+
+    def status(self, batch_id: str) -> str:
+        """Return the batch status; ``"completed"`` means results are ready."""
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        """Yield result lines: ``{"custom_id", "response": {"status_code", "body"}, "error"}``."""
+
+
+class OpenAIBatchProvider:
+    name = "openai"
+
+    def __init__(self, client: Any = None):
+        self.client = client or get_client()
+
+    def submit(self, jsonl_path: Path) -> str:
+        with open(jsonl_path, "rb") as f:
+            uploaded = self.client.files.create(file=f, purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=uploaded.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        batch = self.client.batches.retrieve(batch_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            content = self.client.files.content(file_id).text
+            for line in content.splitlines():
+                if line.strip():
+                    yield json.loads(line)
+
+
+class LocalBatchProvider:
+    """Keeps batches under ``directory/<batch_id>/`` instead of calling a service.
+
+    If a ``responder`` is given, it maps each request body to a response body
+    and the batch completes at submit time. Without one, a test or external
+    process can drop an ``output.jsonl`` into the batch folder later.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: Path, responder: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None):
+        self.directory = Path(directory)
+        self.responder = responder
+
+    def submit(self, jsonl_path: Path) -> str:
+        batch_id = f"local_batch_{secrets.token_hex(6)}"
+        batch_dir = self.directory / batch_id
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(jsonl_path, batch_dir / "input.jsonl")
+        if self.responder is not None:
+            with open(batch_dir / "input.jsonl", "r", encoding="utf-8") as src, open(
+                batch_dir / "output.jsonl", "w", encoding="utf-8"
+            ) as dst:
+                for line in src:
+                    request = json.loads(line)
+                    body = self.responder(request["body"])
+                    result = {
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                    dst.write(json.dumps(result) + "\n")
+        return batch_id
+
+    def status(self, batch_id: str) -> str:
+        batch_dir = self.directory / batch_id
+        if not batch_dir.exists():
+            raise ValueError(f"Unknown local batch: {batch_id}")
+        return "completed" if (batch_dir / "output.jsonl").exists() else "in_progress"
+
+    def results(self, batch_id: str) -> Iterator[Dict[str, Any]]:
+        with open(self.directory / batch_id / "output.jsonl", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+@dataclass
+class BatchSubmission:
+    batch_id: str
+    provider: str
+    model: str
+    submitted_at: float
+    items: Dict[str, str] = field(default_factory=dict)
+
+    def save(self, state_dir: Path) -> Path:
+        state_dir.mkdir(parents=True, exist_ok=True)
+        path = state_dir / f"{self.batch_id}.json"
+        path.write_text(json.dumps(asdict(self), indent=2), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, state_dir: Path, batch_id: str) -> "BatchSubmission":
+        path = state_dir / f"{batch_id}.json"
+        if not path.exists():
+            raise ValueError(f"No submission record for batch {batch_id} in {state_dir}")
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+
+@dataclass
+class CollectSummary:
+    status: str
+    written: int = 0
+    failed: int = 0
+    missing: int = 0
+
+
+def _write_batch_files(
+    images: Iterable[Path],
+    model: str,
+    work_dir: Path,
+    max_edge: int,
+    upload_format: str,
+) -> list[tuple[Path, Dict[str, str]]]:
+    """Pack requests into JSONL files that each respect the provider's limits."""
+    work_dir.mkdir(parents=True, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    chunks: list[tuple[Path, Dict[str, str]]] = []
+    handle = None
+    size = 0
+    items: Dict[str, str] = {}
+
+    def open_chunk():
+        nonlocal handle, size, items
+        path = work_dir / f"requests-{stamp}-{len(chunks):03d}.jsonl"
+        handle = open(path, "w", encoding="utf-8")
+        size = 0
+        items = {}
+        chunks.append((path, items))
+
+    try:
+        for index, image_path in enumerate(images):
+            try:
+                body = build_metadata_request(
+                    str(image_path), model=model, max_edge=max_edge, upload_format=upload_format
+                )
+            except OSError as exc:
+                # Deleted or unreadable since it was listed; the rest of the batch still goes out.
+                print(f"⚠️  Skipping {image_path}: {exc}")
+                continue
+            custom_id = f"img-{index:07d}"
+            line = json.dumps(
+                {"custom_id": custom_id, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                ensure_ascii=False,
+            ) + "\n"
+            encoded_size = len(line.encode("utf-8"))
+            if handle is None or len(items) >= MAX_REQUESTS_PER_BATCH or size + encoded_size > MAX_BYTES_PER_BATCH:
+                if handle is not None:
+                    handle.close()
+                open_chunk()
+            handle.write(line)
+            size += encoded_size
+            items[custom_id] = str(image_path)
+    finally:
+        if handle is not None:
+            handle.close()
+    return chunks
+
+
+def submit_batch(
+    images: Iterable[Path],
+    provider: BatchProvider,
+    state_dir: Path,
+    model: str = "gpt-4o-mini",
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+) -> list[BatchSubmission]:
+    """Write and submit batch request files; returns one submission per file."""
+    submissions: list[BatchSubmission] = []
+    for jsonl_path, items in _write_batch_files(images, model, state_dir / "requests", max_edge, upload_format):
+        batch_id = provider.submit(jsonl_path)
+        submission = BatchSubmission(
+            batch_id=batch_id,
+            provider=provider.name,
+            model=model,
+            submitted_at=time.time(),
+            items=items,
+        )
+        submission.save(state_dir)
+        submissions.append(submission)
+    return submissions
+
+
+def collect_batch(
+    batch_id: str,
+    provider: BatchProvider,
+    state_dir: Path,
+    write_sidecar: Callable[[str, dict], None],
+) -> CollectSummary:
+    """Turn a completed batch's results into sidecars via ``write_sidecar``."""
+    submission = BatchSubmission.load(state_dir, batch_id)
+    status = provider.status(batch_id)
+    summary = CollectSummary(status=status)
+    if status != "completed":
+        return summary
+
+    seen: set[str] = set()
+    for result in provider.results(batch_id):
+        custom_id = result.get("custom_id")
+        image_path = submission.items.get(custom_id or "")
+        if image_path is None:
+            continue
+        seen.add(custom_id)
+        response = result.get("response") or {}
+        if result.get("error") or response.get("status_code") != 200:
+            print(f"❌ Batch request failed for {image_path}: {result.get('error') or response.get('body')}")
+            summary.failed += 1
+            continue
+        try:
+            sidecar = sidecar_from_response(response.get("body") or {}, submission.model)
+        except RuntimeError as exc:
+            print(f"❌ Unusable batch result for {image_path}: {exc}")
+            summary.failed += 1
+            continue
+        write_sidecar(image_path, sidecar)
+        summary.written += 1
+
+    summary.missing = len(set(submission.items) - seen)
+    return summary
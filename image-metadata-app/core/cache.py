@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_MAX_AGE_SECONDS = 90 * 24 * 3600
+_HASH_CHUNK = 1024 * 1024
+
+
+def hash_file(path: str | os.PathLike) -> str:
+    """Return the SHA-256 hex digest of a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def make_cache_key(
+    image_hash: str, model: str, prompt: str, schema_hash: str, max_edge: int, upload_format: str
+) -> str:
+    """Combine everything that influences a generated sidecar into one key.
+
+    ``max_edge`` and ``upload_format`` decide which pixels the model sees.
+    """
+    digest = hashlib.sha256()
+    for part in (image_hash, model, prompt, schema_hash, str(max_edge), upload_format):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """Content-addressed on-disk store of generated sidecar payloads.
+
+    Entries live at ``<directory>/<key[:2]>/<key>.json``. An entry's mtime is
+    when it was stored and never changes, so ``max_age_seconds`` bounds how old
+    a reused response can be. A hit sets the atime instead, and ``evict()``
+    drops the least recently used entries first when over ``max_bytes``.
+    With ``refresh=True`` every lookup is a miss but results are still stored.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        max_bytes: Optional[int] = DEFAULT_MAX_BYTES,
+        max_age_seconds: Optional[float] = DEFAULT_MAX_AGE_SECONDS,
+        refresh: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if self.refresh:
+            self._count(False)
+            return None
+        path = self._entry_path(key)
+        try:
+            stat = path.stat()
+            if self.max_age_seconds is not None and time.time() - stat.st_mtime > self.max_age_seconds:
+                self._count(False)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            os.utime(path, (time.time(), stat.st_mtime))  # mark as used, keep the creation time
+        except (OSError, json.JSONDecodeError):
+            self._count(False)
+            return None
+        self._count(True)
+        return payload
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_name, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def evict(self) -> int:
+        """Drop expired entries, then the least recently used until under ``max_bytes``.
+
+        Returns the number of entries removed.
+        """
+        if not self.directory.exists():
+            return 0
+        now = time.time()
+        entries: list[tuple[float, int, Path]] = []
+        removed = 0
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if self.max_age_seconds is not None and now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+
+        if self.max_bytes is not None:
+            total = sum(size for _, size, _ in entries)
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                path.unlink(missing_ok=True)
+                total -= size
+                removed += 1
+        return removed
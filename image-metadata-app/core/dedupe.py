@@ -0,0 +1,214 @@
+"""Near-duplicate detection so burst shots, crops and exports share one API call.
+
+Each image gets a 64-bit difference hash (dHash): the image is shrunk to 9x8
+grayscale and each bit records whether a pixel is brighter than its right
+neighbour. Similar pictures differ in few bits, so the Hamming distance
+between hashes measures similarity. A BK-tree answers "every hash within
+distance d" without comparing against the whole gallery.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional
+
+from core import metrics
+
+HASH_SIZE = 8
+# dHash bits that may differ for two images to count as the same shot.
+DEFAULT_DISTANCE = 6
+REUSED_STATUS = "reused"
+
+
+def dhash(image_path: str | os.PathLike, size: int = HASH_SIZE) -> Optional[int]:
+    """Difference hash of an image as an int, or None if Pillow cannot decode it."""
+    from PIL import Image, ImageOps
+
+    try:
+        with Image.open(image_path) as img:
+            # Let the JPEG decoder downscale while decoding; the hash only needs a thumbnail.
+            img.draft("L", (size * 16, size * 16))
+            small = ImageOps.exif_transpose(img).convert("L").resize((size + 1, size), Image.Resampling.BOX)
+    except Exception:
+        return None
+    pixels = small.tobytes()
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """Burkhard-Keller tree over hashes with Hamming distance.
+
+    Each child edge is labelled with its distance to the parent, so a query
+    for radius ``r`` around ``h`` only descends into edges within ``r`` of
+    ``distance(h, node)`` (triangle inequality).
+    """
+
+    def __init__(self):
+        self._root: Optional[list] = None  # [hash, items, {distance: child}]
+        self.size = 0
+
+    def add(self, value: int, item: Any) -> None:
+        self.size += 1
+        if self._root is None:
+            self._root = [value, [item], {}]
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, [item], {}]
+                return
+            node = child
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, Any]]:
+        """``(distance, item)`` for every item within ``max_distance``, nearest first."""
+        if self._root is None:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            distance = hamming(value, node[0])
+            if distance <= max_distance:
+                found.extend((distance, item) for item in node[1])
+            for edge, child in node[2].items():
+                if distance - max_distance <= edge <= distance + max_distance:
+                    stack.append(child)
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+
+def image_hashes(
+    paths: Iterable[Path],
+    manifest: Any = None,
+    workers: int = 4,
+) -> Dict[Path, int]:
+    """dHash per image, reusing hashes the manifest holds for unchanged files.
+
+    Undecodable images are left out. Hashing runs on a thread pool; Pillow
+    releases the GIL while decoding.
+    """
+    paths = list(paths)
+    stats: Dict[Path, os.stat_result] = {}
+    for path in paths:
+        try:
+            stats[path] = os.stat(path)
+        except OSError:
+            continue
+    cached = manifest.cached_phashes(stats) if manifest is not None else {}
+    hashes: Dict[Path, int] = {}
+    todo: list[Path] = []
+    for path, stat in stats.items():
+        hit = cached.get(os.path.abspath(path))
+        if hit is not None and hit[0] == stat.st_size and hit[1] == stat.st_mtime_ns:
+            hashes[path] = hit[2]
+        else:
+            todo.append(path)
+
+    def timed_dhash(path: Path) -> Optional[int]:
+        with metrics.timer("phash"):
+            return dhash(path)
+
+    fresh = []
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="phash") as executor:
+        for path, value in zip(todo, executor.map(timed_dhash, todo)):
+            if value is not None:
+                hashes[path] = value
+                fresh.append((path, stats[path].st_size, stats[path].st_mtime_ns, value))
+    if manifest is not None and fresh:
+        manifest.record_phashes(fresh)
+    return hashes
+
+
+@dataclass(frozen=True)
+class Reuse:
+    source: Path
+    distance: int
+
+
+def plan_reuse(
+    images: list[Path],
+    described: Iterable[Path],
+    hashes: Dict[Path, int],
+    max_distance: int = DEFAULT_DISTANCE,
+) -> tuple[list[Path], Dict[Path, Reuse]]:
+    """Split ``images`` into representatives to describe and near-duplicates to reuse.
+
+    ``described`` images already have sidecars and are preferred as sources.
+    Otherwise the first image of each cluster, in input order, becomes its
+    representative. Returns ``(representatives, {image: Reuse})``; images
+    without a hash are always representatives.
+    """
+    tree = BKTree()
+    for path in described:
+        if path in hashes:
+            tree.add(hashes[path], path)
+    representatives: list[Path] = []
+    reuse: Dict[Path, Reuse] = {}
+    for path in images:
+        value = hashes.get(path)
+        if value is None:
+            representatives.append(path)
+            continue
+        matches = tree.search(value, max_distance)
+        if matches:
+            distance, source = matches[0]
+            reuse[path] = Reuse(source, distance)
+            continue
+        tree.add(value, path)
+        representatives.append(path)
+    return representatives, reuse
+
+
+def reusable_sidecar(image_path: Path) -> Optional[dict]:
+    """The image's sidecar if it holds a successful description worth reusing."""
+    try:
+        with open(Path(image_path).with_suffix(".json"), "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(sidecar, dict) or not sidecar.get("title"):
+        return None
+    details = sidecar.get("ai_details")
+    if isinstance(details, dict) and details.get("status") == "error":
+        return None
+    return sidecar
+
+
+def reused_sidecar(source_sidecar: dict, source_path: Path, distance: int) -> dict:
+    """Copy of ``source_sidecar`` for a near-duplicate, with provenance in ``ai_details``."""
+    now = int(time.time())
+    details = dict(source_sidecar.get("ai_details") or {})
+    details.update(
+        {
+            "attempted_at": now,
+            "status": REUSED_STATUS,
+            "error": "",
+            "error_body": "",
+            "raw_response": {"reused_from": str(source_path), "phash_distance": distance},
+        }
+    )
+    return {
+        "title": source_sidecar.get("title", ""),
+        "description": source_sidecar.get("description", ""),
+        "ai_generated": bool(source_sidecar.get("ai_generated", False)),
+        "ai_details": details,
+        "reviewed": False,
+        "detected_at": now,
+    }
@@ -1,36 +1,576 @@
+import atexit
+import io
 import json
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import time
+import zlib
 from pathlib import Path
-from PIL import Image
+from typing import Any, BinaryIO
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape
 
-def embed_metadata(image_path: str, metadata: dict):
-    """Embed simple key/value metadata using Pillow (limited for JPEG).
-    Saves a new file with _with_meta suffix.
+from core import metrics
+
+JPEG_SOI = b"\xff\xd8"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+XMP_NAMESPACE = b"http://ns.adobe.com/xap/1.0/\x00"
+XMP_PNG_KEYWORD = "XML:com.adobe.xmp"
+RDF_NS = "http://www.w3.org/1999/02/22-rdf-syntax-ns#"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+_XML_LANG = "{http://www.w3.org/XML/1998/namespace}lang"
+_XPACKET_BEGIN = "<?xpacket begin=\"\ufeff\" id=\"W5M0MpCehiHzreSzNTczkc9d\"?>\n"
+_XPACKET_END = "\n<?xpacket end=\"w\"?>"
+# Suffix of the copies written when not embedding in place; discovery skips them.
+EMBED_COPY_SUFFIX = "_with_meta"
+# A JPEG segment length field is 16 bits and counts itself.
+_MAX_APP1_PAYLOAD = 0xFFFF - 2
+_COPY_CHUNK = 1024 * 1024
+# Directory fsyncs after sidecar renames are batched; see SidecarWriter.
+DIR_FSYNC_EVERY = 64
+DIR_FSYNC_INTERVAL = 2.0
+# Read once at import; os.umask() can only be queried by setting it, which is not thread-safe.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _build_xmp(metadata: dict) -> bytes:
+    """Minimal XMP packet carrying dc:title and dc:description."""
+
+    def alt(tag: str, value: str) -> str:
+        return (
+            f"   <dc:{tag}><rdf:Alt><rdf:li xml:lang=\"x-default\">{escape(value)}</rdf:li></rdf:Alt></dc:{tag}>\n"
+        )
+
+    body = "".join(
+        alt(tag, str(metadata.get(key) or ""))
+        for tag, key in (("title", "title"), ("description", "description"))
+        if metadata.get(key)
+    )
+    packet = (
+        f"{_XPACKET_BEGIN}"
+        "<x:xmpmeta xmlns:x=\"adobe:ns:meta/\">\n"
+        f" <rdf:RDF xmlns:rdf=\"{RDF_NS}\">\n"
+        f"  <rdf:Description rdf:about=\"\" xmlns:dc=\"{DC_NS}\">\n"
+        f"{body}"
+        "  </rdf:Description>\n"
+        " </rdf:RDF>\n"
+        "</x:xmpmeta>"
+        f"{_XPACKET_END}"
+    )
+    return packet.encode("utf-8")
+
+
+def _set_alt_text(description: ET.Element, tag: str, value: str) -> None:
+    """Set the x-default entry of ``dc:<tag>``, keeping other languages."""
+    qname = f"{{{DC_NS}}}{tag}"
+    description.attrib.pop(qname, None)
+    prop = description.find(qname)
+    if prop is None:
+        prop = ET.SubElement(description, qname)
+    alt = prop.find(f"{{{RDF_NS}}}Alt")
+    if alt is None:
+        prop.clear()
+        alt = ET.SubElement(prop, f"{{{RDF_NS}}}Alt")
+    items = alt.findall(f"{{{RDF_NS}}}li")
+    default = next((li for li in items if li.get(_XML_LANG, "x-default") == "x-default"), None)
+    if default is None:
+        default = ET.Element(f"{{{RDF_NS}}}li", {_XML_LANG: "x-default"})
+        alt.insert(0, default)
+    default.text = value
+
+
+def _merge_xmp(existing: bytes | None, metadata: dict) -> bytes:
+    """XMP packet with our dc:title/dc:description and every other property of ``existing``.
+
+    Falls back to a fresh packet when there is none or it cannot be parsed.
     """
+    if not existing:
+        return _build_xmp(metadata)
+    try:
+        events = ET.iterparse(io.BytesIO(existing.strip(b"\x00 \t\r\n")), events=("start-ns",))
+        for _, (prefix, uri) in events:
+            try:
+                ET.register_namespace(prefix, uri)  # keep the file's own prefixes
+            except ValueError:
+                pass
+        root = events.root
+    except ET.ParseError:
+        return _build_xmp(metadata)
+    rdf = root if root.tag == f"{{{RDF_NS}}}RDF" else root.find(f".//{{{RDF_NS}}}RDF")
+    if rdf is None:
+        return _build_xmp(metadata)
+
+    descriptions = rdf.findall(f"{{{RDF_NS}}}Description")
+    if not descriptions:
+        descriptions = [ET.SubElement(rdf, f"{{{RDF_NS}}}Description", {f"{{{RDF_NS}}}about": ""})]
+    for tag in ("title", "description"):
+        if not metadata.get(tag):
+            continue
+        qname = f"{{{DC_NS}}}{tag}"
+        # Properties may sit in any rdf:Description; keep a single copy.
+        holder = next((d for d in descriptions if d.find(qname) is not None), descriptions[0])
+        for other in descriptions:
+            if other is not holder:
+                other.attrib.pop(qname, None)
+                for stale in other.findall(qname):
+                    other.remove(stale)
+        _set_alt_text(holder, tag, str(metadata[tag]))
+    return (_XPACKET_BEGIN + ET.tostring(root, encoding="unicode") + _XPACKET_END).encode("utf-8")
+
+
+def _read_exact(src: BinaryIO, size: int) -> bytes:
+    data = src.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file while reading image headers")
+    return data
+
+
+def _write_jpeg_with_xmp(src: BinaryIO, dst: BinaryIO, metadata: dict) -> None:
+    """Copy a JPEG, merging our fields into its XMP APP1 segment, without touching scan data.
+
+    Only the header segments before SOS are parsed; everything from SOS on is
+    streamed through unchanged.
+    """
+    if _read_exact(src, 2) != JPEG_SOI:
+        raise ValueError("Not a JPEG file")
+
+    segments: list[tuple[bool, bytes]] = []  # (JFIF/Exif, raw segment)
+    existing = None
+    while True:
+        byte = _read_exact(src, 1)
+        if byte != b"\xff":
+            raise ValueError("Corrupt JPEG marker stream")
+        marker = _read_exact(src, 1)[0]
+        while marker == 0xFF:  # fill bytes
+            marker = _read_exact(src, 1)[0]
+
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            segments.append((False, bytes((0xFF, marker))))
+            continue
+
+        length_bytes = _read_exact(src, 2)
+        length = struct.unpack(">H", length_bytes)[0]
+        segment_body = _read_exact(src, length - 2)
+
+        if marker == 0xE1 and segment_body.startswith(XMP_NAMESPACE):
+            if existing is None:
+                existing = segment_body[len(XMP_NAMESPACE):]
+            continue  # replaced by the merged packet
+        leading = marker == 0xE0 or (marker == 0xE1 and segment_body.startswith(b"Exif\x00"))
+        segments.append((leading, bytes((0xFF, marker)) + length_bytes + segment_body))
+        if marker == 0xDA:  # SOS: entropy-coded data follows
+            break
+
+    payload = XMP_NAMESPACE + _merge_xmp(existing, metadata)
+    if len(payload) > _MAX_APP1_PAYLOAD:
+        raise ValueError("XMP packet too large for a single JPEG APP1 segment")
+    dst.write(JPEG_SOI)
+    inserted = False
+    for leading, segment in segments:
+        if not inserted and not leading:
+            # XMP goes after JFIF/Exif, which readers expect to come first.
+            dst.write(b"\xff\xe1" + struct.pack(">H", len(payload) + 2) + payload)
+            inserted = True
+        dst.write(segment)
+    shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(chunk_type + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def _itxt(keyword: str, text: str) -> bytes:
+    # keyword, NUL, compression flag, compression method, language, NUL, translated keyword, NUL, text
+    data = keyword.encode("latin-1") + b"\x00\x00\x00" + b"\x00" + b"\x00" + text.encode("utf-8")
+    return _png_chunk(b"iTXt", data)
+
+
+def _text_keyword(chunk_type: bytes, data: bytes) -> str | None:
+    if chunk_type not in (b"iTXt", b"tEXt", b"zTXt"):
+        return None
+    return data.split(b"\x00", 1)[0].decode("latin-1", "replace")
+
+
+def _itxt_text(data: bytes) -> bytes:
+    """Text of an iTXt chunk, inflated if compressed."""
+    _, rest = data.split(b"\x00", 1)
+    compressed, rest = rest[0], rest[2:]
+    _, rest = rest.split(b"\x00", 1)  # language tag
+    _, text = rest.split(b"\x00", 1)  # translated keyword
+    return zlib.decompress(text) if compressed else text
+
+
+def _write_png_with_itxt(src: BinaryIO, dst: BinaryIO, metadata: dict) -> None:
+    """Copy a PNG, inserting iTXt chunks before the first IDAT and streaming the rest.
+
+    The XMP chunk is merged with the existing one. Title/Description chunks are
+    only replaced when ``metadata`` has a value for them.
+    """
+    if _read_exact(src, 8) != PNG_SIGNATURE:
+        raise ValueError("Not a PNG file")
+    dst.write(PNG_SIGNATURE)
+
+    replaced = {XMP_PNG_KEYWORD}
+    text_chunks = []
+    for keyword, key in (("Title", "title"), ("Description", "description")):
+        if metadata.get(key):
+            replaced.add(keyword)
+            text_chunks.append(_itxt(keyword, str(metadata[key])))
+    existing = None
+
+    while True:
+        header = _read_exact(src, 8)
+        length, chunk_type = struct.unpack(">I4s", header)
+        if chunk_type == b"IDAT":
+            xmp = _merge_xmp(existing, metadata)
+            dst.write(_itxt(XMP_PNG_KEYWORD, xmp.decode("utf-8")) + b"".join(text_chunks))
+            dst.write(header)
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
+            return
+        data = _read_exact(src, length)
+        crc = _read_exact(src, 4)
+        keyword = _text_keyword(chunk_type, data)
+        if keyword in replaced:
+            if keyword == XMP_PNG_KEYWORD and chunk_type == b"iTXt" and existing is None:
+                try:
+                    existing = _itxt_text(data)
+                except (ValueError, IndexError, zlib.error):
+                    pass  # unreadable packet; ours replaces it
+            continue
+        dst.write(header + data + crc)
+        if chunk_type == b"IEND":
+            raise ValueError("PNG has no image data")
+
+
+def _write_webp_with_xmp(src: BinaryIO, dst: BinaryIO, metadata: dict) -> None:
+    """Copy a WebP with a merged XMP chunk (and a VP8X header if needed) without decoding.
+
+    Chunk headers are read to plan the output. Image chunks are then streamed
+    through unchanged.
+    """
+    header = _read_exact(src, 12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WEBP":
+        raise ValueError("Not a WebP file")
+
+    chunks: list[tuple[bytes, int, int]] = []  # (fourcc, size, data offset)
+    vp8x_data = None
+    bitstream = None
+    existing = None
+    while True:
+        chunk_header = src.read(8)
+        if len(chunk_header) < 8:
+            break
+        fourcc, size = struct.unpack("<4sI", chunk_header)
+        offset = src.tell()
+        if fourcc == b"VP8X":
+            vp8x_data = bytearray(_read_exact(src, size))
+        elif fourcc in (b"VP8 ", b"VP8L") and bitstream is None:
+            bitstream = (fourcc, _read_exact(src, min(size, 10)))
+        elif fourcc == b"XMP " and existing is None:
+            existing = src.read(size)
+        if fourcc not in (b"VP8X", b"XMP "):
+            chunks.append((fourcc, size, offset))
+        src.seek(offset + size + (size & 1))
+
+    if vp8x_data is None:
+        # Simple-format file: build the extended header from the bitstream.
+        if bitstream is None:
+            raise ValueError("WebP has no image data")
+        fourcc, data = bitstream
+        flags = 0
+        if fourcc == b"VP8 ":
+            width = struct.unpack("<H", data[6:8])[0] & 0x3FFF
+            height = struct.unpack("<H", data[8:10])[0] & 0x3FFF
+        else:
+            bits = int.from_bytes(data[1:5], "little")
+            width = (bits & 0x3FFF) + 1
+            height = ((bits >> 14) & 0x3FFF) + 1
+            if (bits >> 28) & 1:
+                flags |= 0x10  # alpha
+        vp8x_data = bytearray(10)
+        vp8x_data[0] = flags
+        vp8x_data[4:7] = (width - 1).to_bytes(3, "little")
+        vp8x_data[7:10] = (height - 1).to_bytes(3, "little")
+    vp8x_data[0] |= 0x04  # XMP present
+
+    xmp = _merge_xmp(existing, metadata)
+    xmp_chunk = b"XMP " + struct.pack("<I", len(xmp)) + xmp + (b"\x00" if len(xmp) & 1 else b"")
+    vp8x_chunk = b"VP8X" + struct.pack("<I", len(vp8x_data)) + bytes(vp8x_data)
+    body_size = 4 + len(vp8x_chunk) + len(xmp_chunk) + sum(8 + size + (size & 1) for _, size, _ in chunks)
+
+    dst.write(b"RIFF" + struct.pack("<I", body_size) + b"WEBP")
+    dst.write(vp8x_chunk)
+    for fourcc, size, offset in chunks:
+        padded = size + (size & 1)
+        dst.write(fourcc + struct.pack("<I", size))
+        src.seek(offset)
+        remaining = padded
+        while remaining:
+            block = src.read(min(_COPY_CHUNK, remaining))
+            if not block:
+                # Some writers omit the final pad byte.
+                dst.write(b"\x00" * remaining)
+                break
+            dst.write(block)
+            remaining -= len(block)
+    dst.write(xmp_chunk)
+
+
+def _tiff_entry(order: str, tag: int, field_type: int, count: int, value: bytes, offset: int) -> bytes:
+    # Values of up to 4 bytes live in the entry itself; longer ones at ``offset``.
+    inline = value.ljust(4, b"\x00") if len(value) <= 4 else struct.pack(order + "I", offset)
+    return struct.pack(order + "HHI", tag, field_type, count) + inline
+
+
+def _write_tiff_with_xmp(src: BinaryIO, dst: BinaryIO, metadata: dict) -> None:
+    """Copy a TIFF byte for byte and append a new first IFD with XMP (700) and ImageDescription (270).
+
+    Every other entry of the original first IFD, including EXIF and GPS
+    pointers, is kept. Their values stay at their original offsets, so no
+    pixel data is decoded or re-compressed. Only the header's pointer to the
+    first IFD changes. The old IFD stays in the file, unreferenced.
+    """
+    header = _read_exact(src, 8)
+    order = "<" if header[:2] == b"II" else ">"
+    magic, ifd_offset = struct.unpack(order + "HI", header[2:])
+    if magic != 42:
+        raise ValueError("BigTIFF is not supported")
+    src.seek(ifd_offset)
+    count = struct.unpack(order + "H", _read_exact(src, 2))[0]
+    entries = {}
+    for _ in range(count):
+        raw = _read_exact(src, 12)
+        entries[struct.unpack(order + "H", raw[:2])[0]] = raw
+    next_ifd = _read_exact(src, 4)
+
+    existing = None
+    if 700 in entries:
+        _, field_type, length, value = struct.unpack(order + "HHI4s", entries[700])
+        if field_type in (1, 7):  # BYTE / UNDEFINED
+            if length <= 4:
+                existing = value[:length]
+            else:
+                src.seek(struct.unpack(order + "I", value)[0])
+                existing = src.read(length)
+
+    values = [(700, 1, _merge_xmp(existing, metadata))]
+    if metadata.get("description"):
+        values.append((270, 2, str(metadata["description"]).encode("utf-8") + b"\x00"))
+
+    src.seek(0)
+    shutil.copyfileobj(src, dst, _COPY_CHUNK)
+    for tag, field_type, value in values:
+        offset = 0
+        if len(value) > 4:
+            dst.write(b"\x00" * (dst.tell() & 1))  # values and IFDs start on a word boundary
+            offset = dst.tell()
+            dst.write(value)
+        entries[tag] = _tiff_entry(order, tag, field_type, len(value), value, offset)
+    dst.write(b"\x00" * (dst.tell() & 1))
+    new_ifd = dst.tell()
+    if new_ifd + 6 + 12 * len(entries) > 0xFFFFFFFF:
+        raise ValueError("TIFF too large to add metadata")
+    dst.write(struct.pack(order + "H", len(entries)))
+    dst.write(b"".join(entries[tag] for tag in sorted(entries)))
+    dst.write(next_ifd)
+    dst.seek(4)
+    dst.write(struct.pack(order + "I", new_ifd))
+
+
+def _detect_format(magic: bytes) -> str | None:
+    if magic.startswith(JPEG_SOI):
+        return "jpeg"
+    if magic.startswith(PNG_SIGNATURE):
+        return "png"
+    if magic[:4] == b"RIFF" and magic[8:12] == b"WEBP":
+        return "webp"
+    if magic[:4] in (b"II*\x00", b"MM\x00*"):
+        return "tiff"
+    return None
+
+
+def is_embedded_copy(image_path: Path) -> bool:
+    """True for ``<stem>_with_meta.<ext>`` files written by ``embed_metadata``."""
+    return Path(image_path).stem.endswith(EMBED_COPY_SUFFIX)
+
+
+@metrics.timer("embed")
+def embed_metadata(image_path: str, metadata: dict, in_place: bool = False) -> Path | None:
+    """Embed title/description as XMP using a writer for the file's real format.
+
+    JPEG (APP1), PNG (iTXt), WebP (XMP chunk) and TIFF (an appended first IFD)
+    are written without decoding pixels. Output goes to a temp file
+    in the same directory and is moved into place with ``os.replace``. With
+    ``in_place=True`` that replaces the original; otherwise it writes a
+    ``_with_meta`` copy. Returns the written path, or None on failure.
+    """
+    tmp_name = None
     try:
         p = Path(image_path)
-        img = Image.open(p)
-        meta = img.info.copy()
-
-        # Flatten lists (e.g., tags) to a comma-separated string
-        for key, value in metadata.items():
-            if isinstance(value, list):
-                meta[key] = ", ".join(map(str, value))
-            elif value is not None:
-                meta[key] = str(value)
-
-        out_path = p.with_stem(p.stem + "_with_meta")
-        img.save(out_path, "JPEG", **meta)
+        out_path = p if in_place else p.with_stem(p.stem + EMBED_COPY_SUFFIX)
+        with open(p, "rb") as src:
+            fmt = _detect_format(src.read(12))
+            src.seek(0)
+            if fmt is None:
+                print(f"[!] Embedding not supported for {p.name}; use the JSON sidecar instead.")
+                return None
+            fd, tmp_name = tempfile.mkstemp(dir=out_path.parent, prefix=f".{out_path.name}.", suffix=".tmp")
+            # Seekable both ways: the TIFF writer patches the header at the end.
+            with os.fdopen(fd, "w+b") as dst:
+                if fmt == "jpeg":
+                    _write_jpeg_with_xmp(src, dst, metadata)
+                elif fmt == "png":
+                    _write_png_with_itxt(src, dst, metadata)
+                elif fmt == "webp":
+                    _write_webp_with_xmp(src, dst, metadata)
+                else:
+                    _write_tiff_with_xmp(src, dst, metadata)
+        shutil.copymode(p, tmp_name)
+        os.replace(tmp_name, out_path)
+        tmp_name = None
         print(f"[✓] Metadata embedded in: {out_path.name}")
+        return out_path
     except Exception as e:
         print(f"[!] Failed to embed metadata: {e}")
+        return None
+    finally:
+        if tmp_name is not None:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+
+
+class SidecarWriter:
+    """Atomic JSON sidecar writes with grouped directory fsyncs.
 
-def create_json_sidecar(image_path: str, metadata: dict):
+    Each sidecar is written to a temp file in the same directory, fsynced and
+    renamed over the target, so readers never see a truncated file. If the
+    new bytes match the file on disk, nothing is written. That keeps mtimes
+    stable for sync tools. The rename is made durable by an fsync of the
+    directory. Those are deferred until ``fsync_every`` renames or
+    ``fsync_interval`` seconds have accumulated, or ``flush()`` is called.
+    """
+
+    def __init__(self, fsync_every: int = DIR_FSYNC_EVERY, fsync_interval: float = DIR_FSYNC_INTERVAL):
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._dirty_dirs: set[str] = set()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def write(self, json_path: Path, payload: bytes) -> bool:
+        """Write ``payload`` to ``json_path``; returns False when it was already identical."""
+        json_path = Path(json_path)
+        if _same_contents(json_path, payload):
+            return False
+        directory = json_path.parent
+        try:
+            mode = json_path.stat().st_mode & 0o7777
+        except OSError:
+            mode = 0o666 & ~_UMASK  # what open() would have created
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{json_path.name}.", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_name, mode)  # mkstemp creates 0600
+            os.replace(tmp_name, json_path)
+        except BaseException:
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+        self._mark_dirty(str(directory))
+        return True
+
+    def _mark_dirty(self, directory: str) -> None:
+        with self._lock:
+            self._dirty_dirs.add(directory)
+            self._pending += 1
+            due = (
+                self._pending >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        """fsync every directory that has had a rename since the last flush."""
+        with self._lock:
+            dirs, self._dirty_dirs = self._dirty_dirs, set()
+            self._pending = 0
+            self._last_sync = time.monotonic()
+        for directory in dirs:
+            _fsync_directory(directory)
+
+
+def _same_contents(path: Path, payload: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(payload):
+            return False
+        return path.read_bytes() == payload
+    except OSError:
+        return False
+
+
+def _fsync_directory(directory: str) -> None:
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return  # e.g. Windows, where directories cannot be opened
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_default_writer = SidecarWriter()
+atexit.register(_default_writer.flush)
+
+
+def flush_sidecars() -> None:
+    """Make all sidecar renames so far durable; called at exit as well."""
+    _default_writer.flush()
+
+
+def sidecar_bytes(metadata: dict) -> bytes:
+    return json.dumps(metadata, indent=4, ensure_ascii=False).encode("utf-8")
+
+
+@metrics.timer("write")
+def create_json_sidecar(
+    image_path: str,
+    metadata: dict,
+    writer: SidecarWriter | None = None,
+    index: Any = None,
+) -> bool:
     """Write a JSON sidecar next to the image.
 
     Expects `metadata` to already conform to the ImageSidecarCopy schema.
+    If an `index` (a ProcessingManifest) is given, the sidecar is recorded as
+    current for the schema fingerprint, so migrations can skip it.
+    Returns False when an identical sidecar was already on disk.
     """
     p = Path(image_path)
     json_path = p.with_suffix(".json")
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(metadata, f, indent=4, ensure_ascii=False)
+    written = (writer or _default_writer).write(json_path, sidecar_bytes(metadata))
+    if index is not None:
+        from utils.validation import schema_fingerprint
+
+        index.record_sidecar(json_path, schema_fingerprint())
+    if not written:
+        print(f"[=] JSON sidecar unchanged: {json_path.name}")
+        return False
     print(f"[✓] JSON sidecar saved as: {json_path.name}")
+    return True
@@ -0,0 +1,163 @@
+import json
+import queue
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional, TextIO
+
+# How often the progress line may be redrawn on a terminal, and printed when piped.
+PROGRESS_INTERVAL_TTY = 0.5
+PROGRESS_INTERVAL_PIPE = 10.0
+# Records written per batch before the writer thread flushes.
+_MAX_BATCH = 512
+_STOP = object()
+
+_current = threading.local()
+
+
+@contextmanager
+def current_image(path: Any) -> Iterator[None]:
+    """Attribute stage events recorded on this thread to ``path``."""
+    previous = getattr(_current, "path", None)
+    _current.path = str(path)
+    try:
+        yield
+    finally:
+        _current.path = previous
+
+
+class EventLog:
+    """JSONL event stream written by a background thread.
+
+    ``emit`` only puts a dict on a queue, so worker threads never wait on
+    the file or a slow console. The writer drains whatever has queued up,
+    writes it in one go and flushes once per batch. ``close`` writes what is
+    left and stops the thread.
+    """
+
+    def __init__(self, stream: TextIO, close_stream: bool = False):
+        self.stream = stream
+        self._close_stream = close_stream
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="event-log", daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def open(cls, path: Path) -> "EventLog":
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return cls(open(path, "a", encoding="utf-8"), close_stream=True)
+
+    def emit(self, event: str, **fields: Any) -> None:
+        self._queue.put({"ts": round(time.time(), 3), "event": event, **fields})
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        """Metrics listener: one ``stage`` event per timed stage of the current image."""
+        self.emit("stage", path=getattr(_current, "path", None), stage=stage, seconds=round(seconds, 6))
+
+    def _run(self) -> None:
+        while True:
+            record = self._queue.get()
+            lines = []
+            stop = False
+            while True:
+                if record is _STOP:
+                    stop = True
+                    break
+                lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+                if len(lines) >= _MAX_BATCH:
+                    break
+                try:
+                    record = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                self.stream.write("".join(lines))
+                self.stream.flush()
+            if stop:
+                return
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._thread.join()
+        if self._close_stream:
+            self.stream.close()
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+class ProgressReporter:
+    """Single progress line with throughput, ETA and error count.
+
+    On a terminal the line is redrawn in place at most every
+    ``PROGRESS_INTERVAL_TTY`` seconds; otherwise a line is printed every
+    ``PROGRESS_INTERVAL_PIPE`` seconds. ``total`` may be None (watch mode),
+    in which case no ETA is shown.
+    """
+
+    def __init__(self, total: Optional[int], stream: Optional[TextIO] = None, interval: Optional[float] = None):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.tty = bool(getattr(self.stream, "isatty", lambda: False)())
+        if interval is None:
+            interval = PROGRESS_INTERVAL_TTY if self.tty else PROGRESS_INTERVAL_PIPE
+        self.interval = interval
+        self.done = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._last_render = self._started
+
+    def update(self, success: bool, excluded: bool = False) -> None:
+        with self._lock:
+            self.done += 1
+            if not success and not excluded:
+                self.errors += 1
+            now = time.monotonic()
+            if now - self._last_render < self.interval:
+                return
+            self._last_render = now
+            self._render(now)
+
+    def note(self, message: str) -> None:
+        """Print a line of its own (e.g. a failure) above the progress line."""
+        with self._lock:
+            self.stream.write(("\r\033[K" if self.tty else "") + message + "\n")
+            if self.tty:
+                self.stream.write(self.line())
+            self.stream.flush()
+
+    def line(self, now: Optional[float] = None) -> str:
+        elapsed = max((now or time.monotonic()) - self._started, 1e-9)
+        rate = self.done / elapsed
+        text = f"⏳ {self.done}"
+        if self.total is not None:
+            text += f"/{self.total}"
+            if rate > 0:
+                text += f" images | {rate:.1f} img/s | ETA {_format_duration((self.total - self.done) / rate)}"
+            else:
+                text += " images"
+        else:
+            text += f" images | {rate:.1f} img/s"
+        return text + f" | errors {self.errors}"
+
+    def _render(self, now: float) -> None:
+        if self.tty:
+            self.stream.write("\r\033[K" + self.line(now))
+        else:
+            self.stream.write(self.line(now) + "\n")
+        self.stream.flush()
+
+    def finish(self) -> None:
+        """Draw the final state and end the line."""
+        with self._lock:
+            line = self.line()
+            self.stream.write(("\r\033[K" + line if self.tty else line) + "\n")
+            self.stream.flush()
@@ -1,30 +1,265 @@
 import os
 import base64
+import io
 import json
+import mimetypes
+import threading
 import time
+from dataclasses import dataclass
 from pathlib import Path
-from openai import OpenAI
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
+
+from core import metrics
+from core.cache import ResponseCache, hash_file, make_cache_key
+from core.retry import CircuitBreaker, RetryPolicy, call_with_retry, error_body
+from utils.validation import load_schema, schema_fingerprint
+
+METADATA_INSTRUCTION = (
+    "Analyze this image and produce STRICT JSON matching the schema. "
+    "Focus on high-quality `title` and `description` suitable for a gallery item."
+)
+FIELD_INSTRUCTION = (
+    "Analyze this image and produce STRICT JSON containing only the fields in the schema. "
+    "They extend an existing gallery item; keep them consistent with its current metadata."
+)
+# Output budget per requested field for targeted enrichment.
+FIELD_OUTPUT_TOKENS = 150
+
+# Process-wide OpenAI clients keyed by (api_key, base_url, timeout, pool size).
+# Reusing a client keeps its HTTP keep-alive connections across images.
+_CLIENTS: Dict[Tuple[Any, ...], Any] = {}
+_CLIENTS_LOCK = threading.Lock()
+_POOL_MAX_CONNECTIONS: Optional[int] = None
+
+# Retries are handled here (with a shared circuit breaker) rather than by the
+# SDK, so every worker thread backs off together when the API is struggling.
+_RETRY_POLICY = RetryPolicy()
+_BREAKER = CircuitBreaker()
+
+
+def __getattr__(name: str) -> Any:
+    # The SDK pulls in httpx and pydantic; import it only when a client is built.
+    if name == "OpenAI":
+        from openai import OpenAI
+
+        return OpenAI
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _openai_class():
+    """``OpenAI``, honouring a replacement set on this module (e.g. by tests)."""
+    return globals().get("OpenAI") or __getattr__("OpenAI")
+
+
+class GenerationError(RuntimeError):
+    """Metadata generation failed for good; ``sidecar`` records why."""
+
+    def __init__(self, message: str, sidecar: dict):
+        super().__init__(message)
+        self.sidecar = sidecar
+
+
+def configure_retries(policy: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None) -> None:
+    """Replace the process-wide retry policy and/or circuit breaker."""
+    global _RETRY_POLICY, _BREAKER
+    if policy is not None:
+        _RETRY_POLICY = policy
+    if breaker is not None:
+        _BREAKER = breaker
+
+
+def configure_client_pool(max_connections: Optional[int]) -> None:
+    """Size the HTTP connection pool used by clients created after this call.
+
+    Batch runs should pass their concurrency so every in-flight request can hold
+    a keep-alive connection. ``None`` keeps the SDK's default pool.
+    """
+    global _POOL_MAX_CONNECTIONS
+    _POOL_MAX_CONNECTIONS = max_connections
+
+
+def _client_key(api_key: Optional[str], base_url: Optional[str], timeout: Optional[float]) -> Tuple[Any, ...]:
+    return (
+        api_key or os.getenv("OPENAI_API_KEY"),
+        base_url or os.getenv("OPENAI_BASE_URL"),
+        timeout,
+        _POOL_MAX_CONNECTIONS,
+    )
+
+
+def _pooled_http_client(max_connections: int):
+    try:
+        import httpx
+        from openai import DefaultHttpxClient
+    except ImportError:
+        return None
+    limits = httpx.Limits(
+        max_connections=max_connections,
+        max_keepalive_connections=max_connections,
+    )
+    return DefaultHttpxClient(limits=limits)
+
+
+def get_client(
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+):
+    """Return the shared OpenAI client for these settings, creating it once."""
+    key = _client_key(api_key, base_url, timeout)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            resolved_key, resolved_url, resolved_timeout, pool_size = key
+            kwargs: Dict[str, Any] = {"api_key": resolved_key, "max_retries": 0}
+            if resolved_url:
+                kwargs["base_url"] = resolved_url
+            if resolved_timeout is not None:
+                kwargs["timeout"] = resolved_timeout
+            if pool_size:
+                http_client = _pooled_http_client(pool_size)
+                if http_client is not None:
+                    kwargs["http_client"] = http_client
+            client = _openai_class()(**kwargs)
+            _CLIENTS[key] = client
+        return client
+
+
+def register_client(
+    client: Any,
+    api_key: Optional[str] = None,
+    base_url: Optional[str] = None,
+    timeout: Optional[float] = None,
+) -> None:
+    """Install a pre-built (or fake) client for these settings."""
+    with _CLIENTS_LOCK:
+        _CLIENTS[_client_key(api_key, base_url, timeout)] = client
+
+
+def reset_clients() -> None:
+    """Drop every cached client, closing the ones that support it."""
+    with _CLIENTS_LOCK:
+        clients = list(_CLIENTS.values())
+        _CLIENTS.clear()
+    for client in clients:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
+
+
+# The model only needs a modest edge length to title and describe an image;
+# anything larger costs upload bytes, latency and input tokens for nothing.
+DEFAULT_MAX_EDGE = 1536
+# Images whose longest edge fits in a single low-detail tile go up as "low".
+LOW_DETAIL_MAX_EDGE = 512
+UPLOAD_FORMATS = {"jpeg": ("JPEG", "image/jpeg"), "webp": ("WEBP", "image/webp")}
+# Formats the Responses API accepts as-is, so small files can skip re-encoding.
+_PASSTHROUGH_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+
+@dataclass
+class PreparedImage:
+    data_url: str
+    mime: str
+    detail: str
+    width: int
+    height: int
+    original_bytes: int
+    upload_bytes: int
+    reencoded: bool
+
+    @property
+    def bytes_saved(self) -> int:
+        return max(0, self.original_bytes - self.upload_bytes)
+
+
+def _to_data_url(raw: bytes, mime: str) -> str:
+    with metrics.timer("encode"):
+        b64 = base64.b64encode(raw).decode("utf-8")
+        return f"data:{mime};base64,{b64}"
+
+
+def _detail_for(width: int, height: int) -> str:
+    return "low" if max(width, height) <= LOW_DETAIL_MAX_EDGE else "high"
+
+
+def prepare_image_for_upload(
+    image_path: str,
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+) -> PreparedImage:
+    """Downscale and re-encode an image so only what the model needs is sent.
+
+    Small JPEG/PNG/WebP/GIF files are sent untouched with their real MIME type.
+    Anything larger than ``max_edge`` (or in another format, e.g. TIFF/BMP) is
+    resized and re-encoded as ``upload_format`` (``"jpeg"`` or ``"webp"``).
+    """
+    from PIL import Image, ImageOps
 
-def _image_to_data_url(image_path: str) -> str:
     p = Path(image_path)
-    ext = p.suffix.lower()
-    if ext in [".jpg", ".jpeg"]:
-        mime = "image/jpeg"
-    elif ext in [".png"]:
-        mime = "image/png"
-    else:
-        # Default to jpeg; many models accept generic data URLs regardless
-        mime = "image/jpeg"
-    with open(p, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return f"data:{mime};base64,{b64}"
+    with metrics.timer("read"):
+        raw = p.read_bytes()
+    original_bytes = len(raw)
+    target_format, target_mime = UPLOAD_FORMATS[upload_format]
+
+    try:
+        img = Image.open(io.BytesIO(raw))
+    except Exception:
+        # Not decodable by Pillow (e.g. HEIC without a plugin); send as-is.
+        mime = mimetypes.guess_type(p.name)[0] or "application/octet-stream"
+        return PreparedImage(_to_data_url(raw, mime), mime, "auto", 0, 0, original_bytes, original_bytes, False)
+
+    with img:
+        width, height = img.size
+        source_format = img.format or ""
+        if source_format in _PASSTHROUGH_FORMATS and max(width, height) <= max_edge:
+            mime = Image.MIME.get(source_format, target_mime)
+            return PreparedImage(
+                _to_data_url(raw, mime), mime, _detail_for(width, height),
+                width, height, original_bytes, original_bytes, False,
+            )
+
+        with metrics.timer("resize"):
+            img.seek(0)
+            frame = ImageOps.exif_transpose(img)
+            frame.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+            has_alpha = frame.mode in ("RGBA", "LA") or (frame.mode == "P" and "transparency" in frame.info)
+            if target_format == "JPEG" or not has_alpha:
+                if has_alpha:
+                    rgba = frame.convert("RGBA")
+                    background = Image.new("RGB", rgba.size, (255, 255, 255))
+                    background.paste(rgba, mask=rgba.getchannel("A"))
+                    frame = background
+                else:
+                    frame = frame.convert("RGB")
+            else:
+                frame = frame.convert("RGBA")
+
+            buffer = io.BytesIO()
+            frame.save(buffer, target_format, quality=85)
+            encoded = buffer.getvalue()
+            new_width, new_height = frame.size
+
+    if source_format in _PASSTHROUGH_FORMATS and len(encoded) >= original_bytes:
+        # Re-encoding did not help; keep the original bytes.
+        mime = Image.MIME.get(source_format, target_mime)
+        return PreparedImage(
+            _to_data_url(raw, mime), mime, _detail_for(width, height),
+            width, height, original_bytes, original_bytes, False,
+        )
+
+    return PreparedImage(
+        _to_data_url(encoded, target_mime), target_mime, _detail_for(new_width, new_height),
+        new_width, new_height, original_bytes, len(encoded), True,
+    )
+
 
 def _load_metadata_schema() -> dict:
-    """Load the ImageSidecarCopy JSON Schema used by the target app."""
-    schema_path = Path(__file__).resolve().parent.parent / "schemas" / "ImageSidecarCopy.schema.json"
-    with open(schema_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    """Return the ImageSidecarCopy JSON Schema used by the target app (shared, read-only)."""
+    return load_schema()
 
 
 def _parse_json_or_raise(text: str) -> Dict[str, Any]:
@@ -36,77 +271,118 @@ def _parse_json_or_raise(text: str) -> Dict[str, Any]:
         )
 
 
-def generate_metadata_from_image(image_path: str, model: str = "gpt-4o-mini") -> dict:
-    """Generate image sidecar metadata using OpenAI Responses API only.
+def _json_schema_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """``text`` parameter of the Responses API asking for JSON matching ``schema``."""
+    return {"format": {"type": "json_schema", "name": name, "schema": schema, "strict": True}}
 
-    Returns an object conforming to ImageSidecarCopy.schema.json.
+
+def build_metadata_request(
+    image_path: str,
+    model: str = "gpt-4o-mini",
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+) -> Dict[str, Any]:
+    """Return the Responses API request body used to describe one image.
+
+    Shared by the interactive path and batch submission so both send the same
+    prompt, schema and image encoding.
     """
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-    data_url = _image_to_data_url(image_path)
     schema = _load_metadata_schema()
-
-    instruction = (
-        "Analyze this image and produce STRICT JSON matching the schema. "
-        "Focus on high-quality `title` and `description` suitable for a gallery item."
-    )
+    prepared = prepare_image_for_upload(image_path, max_edge=max_edge, upload_format=upload_format)
+    if prepared.reencoded:
+        metrics.count("upload_bytes_saved", prepared.bytes_saved)
 
     input_payload = [
         {
             "role": "user",
             "content": [
-                {"type": "input_text", "text": instruction},
-                {"type": "input_image", "image_url": data_url},
+                {"type": "input_text", "text": METADATA_INSTRUCTION},
+                {"type": "input_image", "image_url": prepared.data_url, "detail": prepared.detail},
             ],
         }
     ]
 
-    create_fn = client.responses.create
-
     call_kwargs: Dict[str, Any] = {
         "model": model,
         "input": input_payload,
         "temperature": 0.4,
     }
 
-    call_kwargs["response_format"] = {
-        "type": "json_schema",
-        "json_schema": {
-            "name": schema.get("title", "ImageSidecar"),
-            "schema": schema,
-            "strict": True,
-        },
-    }
+    call_kwargs["text"] = _json_schema_format(schema.get("title", "ImageSidecar"), schema)
     call_kwargs["max_output_tokens"] = 500
+    return call_kwargs
+
+
+def build_field_request(
+    image_path: str,
+    fields: Dict[str, Dict[str, Any]],
+    context: Optional[Dict[str, Any]] = None,
+    model: str = "gpt-4o-mini",
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+) -> Dict[str, Any]:
+    """Request body asking only for ``fields`` (name -> JSON Schema).
 
+    Non-empty ``context`` values (e.g. the current title and description) go
+    into the prompt, so the model extends the item instead of re-describing it.
+    The field names are in the prompt too, so the request still makes sense
+    if an SDK cannot send the schema.
+    """
+    prepared = prepare_image_for_upload(image_path, max_edge=max_edge, upload_format=upload_format)
+    instruction = FIELD_INSTRUCTION + " Fields: " + ", ".join(fields) + "."
+    known = {key: value for key, value in (context or {}).items() if value}
+    if known:
+        instruction += " Current metadata: " + json.dumps(known, ensure_ascii=False)
+    return {
+        "model": model,
+        "input": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "input_text", "text": instruction},
+                    {"type": "input_image", "image_url": prepared.data_url, "detail": prepared.detail},
+                ],
+            }
+        ],
+        "temperature": 0.4,
+        "text": _json_schema_format(
+            "ImageSidecarFields",
+            {
+                "type": "object",
+                "properties": fields,
+                "required": list(fields),
+                "additionalProperties": False,
+            },
+        ),
+        "max_output_tokens": FIELD_OUTPUT_TOKENS * len(fields),
+    }
+
+
+def _get(obj: Any, name: str, default: Any = None) -> Any:
+    """Read a field from an SDK response object or its plain-JSON form."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _extract_output_text(resp: Any) -> Optional[str]:
+    text = _get(resp, "output_text")
+    if text:
+        return text
     try:
-        resp = create_fn(**call_kwargs)
-    except TypeError as exc:
-        message = str(exc).lower()
-        retried = False
-        if "response_format" in message:
-            call_kwargs.pop("response_format", None)
-            input_payload[0]["content"][0]["text"] += (
-                " Your reply must be raw JSON (no backticks, no commentary)."
-            )
-            retried = True
-        if "max_output_tokens" in message:
-            call_kwargs.pop("max_output_tokens", None)
-            call_kwargs["max_tokens"] = 500
-            retried = True
-        if retried:
-            resp = create_fn(**call_kwargs)
-        else:
-            raise
-
-    # Extract text content
-    text = None
-    if hasattr(resp, "output_text") and resp.output_text:
-        text = resp.output_text
-    else:
-        try:
-            text = resp.output[0].content[0].text  # type: ignore[attr-defined]
-        except Exception:
-            text = None
+        for item in _get(resp, "output") or []:
+            for part in _get(item, "content") or []:
+                part_text = _get(part, "text")
+                if part_text:
+                    return part_text
+    except Exception:
+        return None
+    return None
+
+
+def sidecar_from_response(resp: Any, model: str, instruction: str = METADATA_INSTRUCTION) -> dict:
+    """Build a sidecar from a Responses API result (SDK object or JSON body)."""
+    text = _extract_output_text(resp)
     if not text:
         raise RuntimeError("No text output received from Responses API.")
 
@@ -117,7 +393,7 @@ def generate_metadata_from_image(image_path: str, model: str = "gpt-4o-mini") ->
     # Some SDKs expose finish_reason differently; try best-effort extraction
     finish_reason = None
     try:
-        finish_reason = getattr(resp, "output", [])[0].finish_reason  # type: ignore[attr-defined]
+        finish_reason = _get((_get(resp, "output") or [])[0], "finish_reason")
     except Exception:
         finish_reason = None
 
@@ -129,9 +405,9 @@ def generate_metadata_from_image(image_path: str, model: str = "gpt-4o-mini") ->
             "provider": "openai",
             "model": model,
             "prompt": instruction,
-            "response_id": getattr(resp, "id", ""),
+            "response_id": _get(resp, "id", "") or "",
             "finish_reason": finish_reason or "",
-            "created": getattr(resp, "created", 0) or 0,
+            "created": _get(resp, "created", 0) or _get(resp, "created_at", 0) or 0,
             "attempted_at": now,
             "status": "ok",
             "error": "",
@@ -141,5 +417,199 @@ def generate_metadata_from_image(image_path: str, model: str = "gpt-4o-mini") ->
         "reviewed": False,
         "detected_at": now,
     }
+    return sidecar
+
+
+def failure_sidecar(exc: BaseException, model: str, instruction: str = METADATA_INSTRUCTION) -> dict:
+    """Sidecar recording a failed generation in ``ai_details.status/error/error_body``."""
+    now = int(time.time())
+    return {
+        "title": "",
+        "description": "",
+        "ai_generated": False,
+        "ai_details": {
+            "provider": "openai",
+            "model": model,
+            "prompt": instruction,
+            "response_id": "",
+            "finish_reason": "",
+            "created": 0,
+            "attempted_at": now,
+            "status": "error",
+            "error": f"{type(exc).__name__}: {exc}",
+            "error_body": error_body(exc),
+            "raw_response": {},
+        },
+        "reviewed": False,
+        "detected_at": now,
+    }
+
+
+def _request_size(call_kwargs: Dict[str, Any]) -> int:
+    """``len(json.dumps(call_kwargs))`` without serializing the base64 image again.
+
+    Data URLs are plain ASCII with nothing to escape, so their JSON length is
+    known; only the small remainder of the request is dumped.
+    """
+    image_chars = 0
+    messages = []
+    for message in call_kwargs["input"]:
+        parts = []
+        for part in message.get("content") or []:
+            url = part.get("image_url") if isinstance(part, dict) else None
+            if isinstance(url, str):
+                image_chars += len(url)
+                part = {**part, "image_url": ""}
+            parts.append(part)
+        messages.append({**message, "content": parts} if "content" in message else message)
+    return len(json.dumps({**call_kwargs, "input": messages})) + image_chars
+
+
+def _counted_create(create_fn, call_kwargs: Dict[str, Any]):
+    """One ``create`` call, counted as a request with the bytes actually sent."""
+    request_bytes = _request_size(call_kwargs)
+    sent = True
+    try:
+        return create_fn(**call_kwargs)
+    except TypeError:
+        sent = False  # the SDK rejected the arguments before sending anything
+        raise
+    finally:
+        if sent:
+            metrics.count("api_requests")
+            metrics.count("request_bytes", request_bytes)
+
+
+def _create_response(create_fn, call_kwargs: Dict[str, Any]):
+    input_payload = call_kwargs["input"]
+    try:
+        return _counted_create(create_fn, call_kwargs)
+    except TypeError as exc:
+        message = str(exc).lower()
+        retried = False
+        # Older SDKs know neither ``text`` nor ``max_output_tokens``.
+        for format_key in ("response_format", "'text'"):
+            if format_key in message:
+                call_kwargs.pop(format_key.strip("'"), None)
+                input_payload[0]["content"][0]["text"] += (
+                    " Your reply must be raw JSON (no backticks, no commentary)."
+                )
+                retried = True
+        if "max_output_tokens" in message:
+            call_kwargs["max_tokens"] = call_kwargs.pop("max_output_tokens", 500)
+            retried = True
+        if retried:
+            return _counted_create(create_fn, call_kwargs)
+        raise
+
+
+def _record_usage(resp: Any) -> None:
+    usage = _get(resp, "usage")
+    if usage is None:
+        return
+    for name in ("input_tokens", "output_tokens", "total_tokens"):
+        value = _get(usage, name)
+        if isinstance(value, int):
+            metrics.count(name, value)
+
+
+def _send_request(create_fn, call_kwargs: Dict[str, Any]):
+    """Call the API with retries, recording requests, request bytes, wait time and token usage."""
+    with metrics.timer("api"):
+        resp = call_with_retry(lambda: _create_response(create_fn, call_kwargs), _RETRY_POLICY, _BREAKER)
+    _record_usage(resp)
+    return resp
+
+
+def generate_metadata_from_image(
+    image_path: str,
+    model: str = "gpt-4o-mini",
+    client: Any = None,
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+    cache: Optional[ResponseCache] = None,
+    image_hash: Optional[str] = None,
+) -> dict:
+    """Generate image sidecar metadata using OpenAI Responses API only.
+
+    Uses the shared client from ``get_client()`` unless ``client`` is given.
+    The image is downscaled to ``max_edge`` before upload. When ``cache`` is
+    given, a previously generated payload for identical image bytes, model,
+    prompt and schema is returned without calling the API. ``image_hash`` is
+    the file's SHA-256 when the caller already has it.
+
+    Rate limits, 5xx errors and timeouts are retried with backoff. If the call
+    still fails, ``GenerationError`` is raised. Its ``sidecar`` has
+    ``ai_details.status == "error"``.
+    Returns an object conforming to ImageSidecarCopy.schema.json.
+    """
+    instruction = METADATA_INSTRUCTION
+
+    cache_key = None
+    if cache is not None:
+        with metrics.timer("cache_lookup"):
+            cache_key = make_cache_key(
+                image_hash or hash_file(image_path),
+                model,
+                instruction,
+                schema_fingerprint(),
+                max_edge,
+                upload_format,
+            )
+            cached = cache.get(cache_key)
+        if cached is not None:
+            cached["detected_at"] = int(time.time())
+            return cached
+
+    if client is None:
+        client = get_client()
+    call_kwargs = build_metadata_request(image_path, model=model, max_edge=max_edge, upload_format=upload_format)
+    create_fn = client.responses.create
+
+    try:
+        resp = _send_request(create_fn, call_kwargs)
+        sidecar = sidecar_from_response(resp, model, instruction)
+    except Exception as exc:
+        raise GenerationError(f"OpenAI generation failed: {exc}", failure_sidecar(exc, model, instruction)) from exc
+
+    if cache is not None and cache_key is not None:
+        cache.put(cache_key, sidecar)
 
     return sidecar
+
+
+def generate_fields_for_image(
+    image_path: str,
+    fields: Dict[str, Dict[str, Any]],
+    context: Optional[Dict[str, Any]] = None,
+    model: str = "gpt-4o-mini",
+    client: Any = None,
+    max_edge: int = DEFAULT_MAX_EDGE,
+    upload_format: str = "jpeg",
+) -> Dict[str, Any]:
+    """Generate values for just ``fields``, e.g. ones a schema change added.
+
+    Output tokens and latency scale with the number of fields rather than a
+    full title and description. Returns ``{field: value}`` for the fields the
+    model filled. Failures raise ``GenerationError`` like
+    ``generate_metadata_from_image``.
+    """
+    if not fields:
+        return {}
+    if client is None:
+        client = get_client()
+    call_kwargs = build_field_request(
+        image_path, fields, context, model=model, max_edge=max_edge, upload_format=upload_format
+    )
+    create_fn = client.responses.create
+    instruction = call_kwargs["input"][0]["content"][0]["text"]
+
+    try:
+        resp = _send_request(create_fn, call_kwargs)
+        text = _extract_output_text(resp)
+        if not text:
+            raise RuntimeError("No text output received from Responses API.")
+        values = _parse_json_or_raise(text)
+    except Exception as exc:
+        raise GenerationError(f"OpenAI field generation failed: {exc}", failure_sidecar(exc, model, instruction)) from exc
+    return {name: values[name] for name in fields if name in values}
@@ -0,0 +1,129 @@
+import json
+import os
+import secrets
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_FSYNC_EVERY = 64
+DEFAULT_FSYNC_INTERVAL = 2.0
+
+
+def _new_run_id() -> str:
+    return time.strftime("%Y%m%d-%H%M%S") + "-" + secrets.token_hex(3)
+
+
+def journal_key(image_path: os.PathLike | str) -> str:
+    return os.path.abspath(image_path)
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def read_journal(path: Path) -> Tuple[Dict[str, Any], Dict[str, str]]:
+    """Return (start record, last status per image) from a journal file.
+
+    A torn final line from a crash is ignored.
+    """
+    header: Dict[str, Any] = {}
+    statuses: Dict[str, str] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            event = record.get("event")
+            if event == "start" and not header:
+                header = record
+            elif event == "image":
+                statuses[record["path"]] = record["status"]
+    if not header:
+        raise ValueError(f"Run journal has no start record: {path}")
+    return header, statuses
+
+
+class RunJournal:
+    """Append-only JSONL log of a batch run's per-image outcomes.
+
+    Every record is flushed to the OS immediately, so a crash of this process
+    loses nothing. fsync runs every ``fsync_every`` records or
+    ``fsync_interval`` seconds, whichever comes first. That bounds both the
+    fsync cost and how much an OS crash can lose.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        run_id: str,
+        fsync_every: int = DEFAULT_FSYNC_EVERY,
+        fsync_interval: float = DEFAULT_FSYNC_INTERVAL,
+    ):
+        self.path = Path(path)
+        self.run_id = run_id
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @classmethod
+    def start(cls, directory: Path, inputs: Dict[str, Any], **kwargs) -> "RunJournal":
+        run_id = _new_run_id()
+        journal = cls(Path(directory) / f"{run_id}.jsonl", run_id, **kwargs)
+        journal._write({"event": "start", "run_id": run_id, "at": time.time(), "inputs": inputs}, sync=True)
+        return journal
+
+    @classmethod
+    def resume(cls, directory: Path, run_id: str, **kwargs) -> Tuple["RunJournal", Dict[str, Any], set[str]]:
+        """Reopen a run's journal; returns it with the stored inputs and completed image keys."""
+        path = Path(directory) / f"{run_id}.jsonl"
+        if not path.exists():
+            raise ValueError(f"No journal found for run {run_id} in {directory}")
+        header, statuses = read_journal(path)
+        completed = {key for key, status in statuses.items() if status == "ok"}
+        journal = cls(path, run_id, **kwargs)
+        if not _ends_with_newline(path):
+            # Terminate a line torn by a crash so new records parse cleanly.
+            journal._file.write("\n")
+        journal._write({"event": "resume", "at": time.time(), "completed": len(completed)}, sync=True)
+        return journal, header.get("inputs", {}), completed
+
+    def _write(self, record: Dict[str, Any], sync: bool = False) -> None:
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if sync or self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+                self._last_sync = now
+
+    def record(self, image_path: os.PathLike | str, status: str, error: Optional[str] = None) -> None:
+        record: Dict[str, Any] = {
+            "event": "image",
+            "path": journal_key(image_path),
+            "status": status,
+            "at": time.time(),
+        }
+        if error:
+            record["error"] = error
+        self._write(record)
+
+    def close(self, interrupted: bool = False) -> None:
+        if self._file.closed:
+            return
+        self._write({"event": "end", "at": time.time(), "interrupted": interrupted}, sync=True)
+        with self._lock:
+            self._file.close()
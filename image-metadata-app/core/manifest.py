@@ -0,0 +1,301 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.cache import hash_file
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT,
+    model TEXT NOT NULL,
+    actions TEXT NOT NULL,
+    status TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+# Which schema each sidecar was last written or migrated under. The strict
+# schema forbids stamping this into the file, so it lives here instead.
+_SIDECAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sidecars (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+# Pass/fail of `main.py validate` per sidecar version and schema, so
+# re-audits only read files that changed. ``issues`` is a JSON list.
+_VALIDATION_SCHEMA = """
+CREATE TABLE IF NOT EXISTS validations (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    valid INTEGER NOT NULL,
+    issues TEXT NOT NULL,
+    checked_at REAL NOT NULL
+)
+"""
+# Perceptual hashes for near-duplicate detection, as 16 hex digits (SQLite
+# integers are signed, so 64-bit values do not fit).
+_PHASH_SCHEMA = """
+CREATE TABLE IF NOT EXISTS phashes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    hash TEXT NOT NULL
+)
+"""
+# Stay well below SQLite's bound-parameter limit in IN (...) lookups.
+_LOOKUP_CHUNK = 500
+
+
+def _key(image_path: Path) -> str:
+    # abspath is purely lexical, so lookups cost no extra syscalls.
+    return os.path.abspath(image_path)
+
+
+class ProcessingManifest:
+    """SQLite record of every image handled, used to skip unchanged work on re-runs.
+
+    An image counts as current when its last run succeeded with the same model
+    and actions, and its size and mtime are unchanged. If only the mtime changed
+    (touch, copy), the stored content hash decides.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.execute(_SIDECAR_SCHEMA)
+        self._conn.execute(_VALIDATION_SCHEMA)
+        self._conn.execute(_PHASH_SCHEMA)
+        self._conn.commit()
+
+    def is_current(self, image_path: Path, model: str, actions: str) -> bool:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return False
+        if "json" in actions.split(",") and not os.path.exists(Path(image_path).with_suffix(".json")):
+            return False  # the sidecar was deleted since
+        key = _key(image_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, model, actions, status FROM images WHERE path = ?",
+                (key,),
+            ).fetchone()
+        if row is None:
+            return False
+        size, mtime_ns, content_hash, row_model, row_actions, status = row
+        if status != "ok" or row_model != model or row_actions != actions or size != stat.st_size:
+            return False
+        if mtime_ns == stat.st_mtime_ns:
+            return True
+        if not content_hash:
+            return False
+        try:
+            unchanged = hash_file(image_path) == content_hash
+        except OSError:
+            return False
+        if unchanged:
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE images SET mtime_ns = ?, updated_at = ? WHERE path = ?",
+                    (stat.st_mtime_ns, time.time(), key),
+                )
+                self._conn.commit()
+        return unchanged
+
+    def last_failed(self, image_path: Path) -> bool:
+        """True if the last recorded run for this image ended in an error."""
+        with self._lock:
+            row = self._conn.execute("SELECT status FROM images WHERE path = ?", (_key(image_path),)).fetchone()
+        return row is not None and row[0] == "error"
+
+    def record(
+        self,
+        image_path: Path,
+        status: str,
+        model: str,
+        actions: str,
+        content_hash: Optional[str] = None,
+    ) -> None:
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return
+        if content_hash is None and status == "ok":
+            try:
+                content_hash = hash_file(image_path)
+            except OSError:
+                content_hash = None
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO images (path, size, mtime_ns, content_hash, model, actions, status, first_seen, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    content_hash = excluded.content_hash,
+                    model = excluded.model,
+                    actions = excluded.actions,
+                    status = excluded.status,
+                    updated_at = excluded.updated_at
+                """,
+                (_key(image_path), stat.st_size, stat.st_mtime_ns, content_hash, model, actions, status, now, now),
+            )
+            self._conn.commit()
+
+    def record_sidecars(self, sidecar_paths: Iterable[Path], fingerprint: str) -> None:
+        """Note that these sidecars, as they are on disk now, match schema ``fingerprint``."""
+        now = time.time()
+        rows = []
+        for path in sidecar_paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            rows.append((_key(path), stat.st_size, stat.st_mtime_ns, fingerprint, now))
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO sidecars (path, size, mtime_ns, fingerprint, updated_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    fingerprint = excluded.fingerprint,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+            self._conn.commit()
+
+    def record_sidecar(self, sidecar_path: Path, fingerprint: str) -> None:
+        self.record_sidecars([sidecar_path], fingerprint)
+
+    def current_sidecars(self, sidecar_paths: Iterable[Path], fingerprint: str) -> set[str]:
+        """Keys of the sidecars unchanged (size and mtime) since they were recorded under ``fingerprint``."""
+        keys = [_key(path) for path in sidecar_paths]
+        recorded: dict[str, tuple[int, int]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for path, size, mtime_ns in self._conn.execute(
+                    f"SELECT path, size, mtime_ns FROM sidecars WHERE fingerprint = ? AND path IN ({placeholders})",
+                    (fingerprint, *chunk),
+                ):
+                    recorded[path] = (size, mtime_ns)
+        current: set[str] = set()
+        for key, (size, mtime_ns) in recorded.items():
+            try:
+                stat = os.stat(key)
+            except OSError:
+                continue
+            if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+                current.add(key)
+        return current
+
+    def record_validations(self, results: Iterable[tuple[str, int, int, bool, str]], fingerprint: str) -> None:
+        """Store ``(path, size, mtime_ns, valid, issues_json)`` results checked against ``fingerprint``."""
+        now = time.time()
+        rows = [
+            (_key(path), size, mtime_ns, fingerprint, int(valid), issues, now)
+            for path, size, mtime_ns, valid, issues in results
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO validations (path, size, mtime_ns, fingerprint, valid, issues, checked_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    fingerprint = excluded.fingerprint,
+                    valid = excluded.valid,
+                    issues = excluded.issues,
+                    checked_at = excluded.checked_at
+                """,
+                rows,
+            )
+            self._conn.commit()
+
+    def cached_validations(
+        self, sidecar_paths: Iterable[Path | str], fingerprint: str
+    ) -> dict[str, tuple[int, int, bool, str]]:
+        """Stored ``(size, mtime_ns, valid, issues_json)`` per key for results under ``fingerprint``.
+
+        Callers compare size and mtime with their own stat, so nothing is
+        re-stat'ed here.
+        """
+        keys = [_key(path) for path in sidecar_paths]
+        cached: dict[str, tuple[int, int, bool, str]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for path, size, mtime_ns, valid, issues in self._conn.execute(
+                    "SELECT path, size, mtime_ns, valid, issues FROM validations "
+                    f"WHERE fingerprint = ? AND path IN ({placeholders})",
+                    (fingerprint, *chunk),
+                ):
+                    cached[path] = (size, mtime_ns, bool(valid), issues)
+        return cached
+
+    def record_phashes(self, hashes: Iterable[tuple[Path, int, int, int]]) -> None:
+        """Store ``(image_path, size, mtime_ns, hash)`` perceptual hashes."""
+        rows = [(_key(path), size, mtime_ns, f"{value:016x}") for path, size, mtime_ns, value in hashes]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO phashes (path, size, mtime_ns, hash) VALUES (?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    size = excluded.size,
+                    mtime_ns = excluded.mtime_ns,
+                    hash = excluded.hash
+                """,
+                rows,
+            )
+            self._conn.commit()
+
+    def cached_phashes(self, image_paths: Iterable[Path | str]) -> dict[str, tuple[int, int, int]]:
+        """Stored ``(size, mtime_ns, hash)`` per key; callers compare size and mtime."""
+        keys = [_key(path) for path in image_paths]
+        cached: dict[str, tuple[int, int, int]] = {}
+        with self._lock:
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                for path, size, mtime_ns, value in self._conn.execute(
+                    f"SELECT path, size, mtime_ns, hash FROM phashes WHERE path IN ({placeholders})",
+                    chunk,
+                ):
+                    cached[path] = (size, mtime_ns, int(value, 16))
+        return cached
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
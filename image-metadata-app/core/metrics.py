@@ -0,0 +1,213 @@
+"""Per-stage timings and API usage counters for a run.
+
+Code paths wrap their work in ``with timer("stage"):`` (or decorate a
+function with ``@timer("stage")``) and bump counters with
+``count(name, amount)``. Both go to one process-wide registry guarded by a
+lock, so worker threads can record concurrently. Recording costs a
+``perf_counter`` call and a bucket lookup. Nothing is written unless
+``write_metrics`` is called (``main.py --metrics-out``).
+"""
+
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Upper bounds in seconds; one bucket each from 1 ms local work to slow API calls.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+PROMETHEUS_PREFIX = "image_metadata"
+
+STAGE_HELP = "Seconds spent per processing stage."
+COUNTER_HELP = {
+    "api_requests": "Responses API requests sent, retries included.",
+    "request_bytes": "Serialized Responses API request bytes sent, retries included.",
+    "upload_bytes_saved": "Image bytes saved by downscaling and re-encoding before upload.",
+    "input_tokens": "Input tokens reported by the Responses API.",
+    "output_tokens": "Output tokens reported by the Responses API.",
+    "total_tokens": "Total tokens reported by the Responses API.",
+}
+
+
+class Histogram:
+    """Fixed-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile by linear interpolation inside its bucket."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, n in zip(self.buckets + (self.max,), self.counts):
+            if n and seen + n >= rank:
+                upper = min(bound, self.max)
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+            lower = bound
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, n in zip(self.buckets, self.counts):
+            cumulative += n
+            buckets[_format_bound(bound)] = cumulative
+        buckets["+Inf"] = self.count
+        return {
+            "count": self.count,
+            "total_seconds": round(self.sum, 6),
+            "mean_seconds": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50_seconds": round(self.quantile(0.5), 6),
+            "p95_seconds": round(self.quantile(0.95), 6),
+            "max_seconds": round(self.max, 6),
+            "buckets": buckets,
+        }
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+class MetricsRegistry:
+    """Thread-safe stage histograms and counters."""
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._stages: Dict[str, Histogram] = {}
+        self._counters: Dict[str, float] = {}
+        self._listeners: tuple[Callable[[str, float], None], ...] = ()
+        self._started = time.time()
+
+    def add_listener(self, listener: Callable[[str, float], None]) -> None:
+        """Also pass every observation to ``listener(stage, seconds)``, e.g. an event log."""
+        with self._lock:
+            self._listeners += (listener,)
+
+    def remove_listener(self, listener: Callable[[str, float], None]) -> None:
+        with self._lock:
+            self._listeners = tuple(item for item in self._listeners if item is not listener)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            histogram = self._stages.get(stage)
+            if histogram is None:
+                histogram = self._stages[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            listeners = self._listeners
+        for listener in listeners:
+            listener(stage, seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the ``with`` block into ``stage``, also when it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name: str, amount: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": int(self._started),
+                "wall_seconds": round(time.time() - self._started, 3),
+                "stages": {name: h.summary() for name, h in sorted(self._stages.items())},
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def prometheus_text(self, prefix: str = PROMETHEUS_PREFIX) -> str:
+        """Render the registry in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        name = f"{prefix}_stage_seconds"
+        lines = [f"# HELP {name} {STAGE_HELP}", f"# TYPE {name} histogram"]
+        for stage, summary in snapshot["stages"].items():
+            for bound, cumulative in summary["buckets"].items():
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {summary["total_seconds"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {summary["count"]}')
+        for counter, value in snapshot["counters"].items():
+            metric = f"{prefix}_{counter}_total"
+            lines.append(f"# HELP {metric} {COUNTER_HELP.get(counter, counter.replace('_', ' ') + '.')}")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")  # exact; :g would turn large counts into 1.2e+07
+        return "\n".join(lines) + "\n"
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
+    # The textfile collector may read at any moment; never let it see a partial file.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.chmod(tmp_name, 0o644)  # mkstemp creates 0600; node_exporter usually runs as another user
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+METRICS = MetricsRegistry()
+
+
+def timer(stage: str):
+    """``with timer("api"):`` records into the process-wide registry."""
+    return METRICS.timer(stage)
+
+
+def observe(stage: str, seconds: float) -> None:
+    METRICS.observe(stage, seconds)
+
+
+def count(name: str, amount: float = 1) -> None:
+    METRICS.count(name, amount)
+
+
+def write_metrics(path: str | os.PathLike, registry: Optional[MetricsRegistry] = None) -> tuple[Path, Path]:
+    """Write a JSON summary to ``path`` and a Prometheus ``.prom`` file next to it.
+
+    Returns ``(json_path, prom_path)``. A ``path`` ending in ``.prom`` gets its
+    JSON summary at the same name with a ``.json`` suffix.
+    """
+    registry = registry or METRICS
+    path = Path(path)
+    if path.suffix == ".prom":
+        json_path, prom_path = path.with_suffix(".json"), path
+    else:
+        json_path, prom_path = path, path.with_suffix(".prom")
+    _atomic_write_text(json_path, json.dumps(registry.snapshot(), indent=2) + "\n")
+    _atomic_write_text(prom_path, registry.prometheus_text())
+    return json_path, prom_path
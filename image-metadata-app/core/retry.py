@@ -0,0 +1,178 @@
+import email.utils
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS_CODES = {408, 409, 429}
+_TRANSIENT_ERRORS = (TimeoutError, ConnectionError)
+
+
+def _transient_errors() -> tuple:
+    # An SDK exception can only exist once ``openai`` is imported, so never import it here.
+    openai = sys.modules.get("openai")
+    if openai is None:
+        return _TRANSIENT_ERRORS
+    return (openai.APIConnectionError,) + _TRANSIENT_ERRORS  # includes APITimeoutError
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for rate limits, server errors, timeouts and dropped connections."""
+    if isinstance(exc, _transient_errors()):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and (status in RETRYABLE_STATUS_CODES or status >= 500)
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    """Read Retry-After / retry-after-ms from an API error's response headers."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    millis = headers.get("retry-after-ms")
+    if millis:
+        try:
+            return max(0.0, float(millis) / 1000.0)
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at ``max_delay``."""
+
+    max_attempts: int = 5
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay_for(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Delay before retry number ``attempt`` (1-based); Retry-After wins when present."""
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        ceiling = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+
+class CircuitBreaker:
+    """Pause every caller while the API is failing hard.
+
+    After ``failure_threshold`` consecutive transient failures the breaker opens
+    for ``cooldown`` seconds. Every thread that calls ``wait_until_closed()``
+    blocks until then. After the cooldown one caller is let through as a
+    trial while the others keep waiting: success closes the breaker, failure
+    re-opens it immediately.
+    """
+
+    # How often callers queued behind a trial call check whether it finished.
+    TRIAL_POLL_INTERVAL = 0.25
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._open_until = 0.0
+        self._half_open = False
+        self._trial_running = False
+
+    @property
+    def is_open(self) -> bool:
+        return time.monotonic() < self._open_until
+
+    def wait_until_closed(self, sleep: Callable[[float], None] = time.sleep) -> None:
+        while True:
+            with self._lock:
+                remaining = self._open_until - time.monotonic()
+                if remaining <= 0:
+                    if not self._half_open:
+                        return
+                    if not self._trial_running:
+                        self._trial_running = True
+                        return
+                    remaining = self.TRIAL_POLL_INTERVAL
+            sleep(remaining)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive_failures = 0
+            self._open_until = 0.0
+            self._half_open = False
+            self._trial_running = False
+
+    def release_trial(self) -> None:
+        """Let another caller make the trial call, leaving the failure count as it is."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures < self.failure_threshold:
+                return
+            now = time.monotonic()
+            if now < self._open_until:
+                return
+            self._open_until = now + self.cooldown
+            self._half_open = True
+            self._trial_running = False
+        print(f"⏸️  OpenAI API failing repeatedly; pausing requests for {self.cooldown:.0f}s.")
+
+
+def call_with_retry(
+    fn: Callable[[], T],
+    policy: RetryPolicy,
+    breaker: Optional[CircuitBreaker] = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> T:
+    """Call ``fn`` until it succeeds, a non-retryable error occurs, or attempts run out."""
+    attempt = 0
+    while True:
+        attempt += 1
+        if breaker is not None:
+            breaker.wait_until_closed(sleep)
+        try:
+            result = fn()
+        except Exception as exc:
+            if not is_retryable(exc):
+                if breaker is not None:
+                    breaker.release_trial()  # proves nothing either way, but must not leave a trial hanging
+                raise
+            if breaker is not None:
+                breaker.record_failure()
+            if attempt >= policy.max_attempts:
+                raise
+            sleep(policy.delay_for(attempt, retry_after_seconds(exc)))
+            continue
+        if breaker is not None:
+            breaker.record_success()
+        return result
+
+
+def error_body(exc: BaseException) -> str:
+    """Best-effort text of the provider's error response, for ``ai_details.error_body``."""
+    body: Any = getattr(exc, "body", None)
+    if body is not None:
+        if isinstance(body, (dict, list)):
+            return json.dumps(body, ensure_ascii=False)
+        return str(body)
+    response = getattr(exc, "response", None)
+    text = getattr(response, "text", None)
+    return text if isinstance(text, str) else ""
@@ -0,0 +1,171 @@
+"""Event-driven directory watching backed by Linux inotify (via ctypes).
+
+Only the paths that changed are reported, so an idle watch costs nothing
+regardless of gallery size. Callers should fall back to polling when
+``inotify_available()`` is False or ``InotifyWatcher`` raises ``OSError``.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, "O_CLOEXEC", 0o2000000)
+
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+_libc = None
+
+
+def _load_libc():
+    global _libc
+    if _libc is None:
+        _libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        _libc.inotify_init1.argtypes = [ctypes.c_int]
+        _libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return _libc
+
+
+def inotify_available() -> bool:
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        libc = _load_libc()
+    except OSError:
+        return False
+    return hasattr(libc, "inotify_init1") and hasattr(libc, "inotify_add_watch")
+
+
+@dataclass(frozen=True)
+class WatchEvent:
+    path: Path
+    is_dir: bool = False
+    removed: bool = False
+
+
+class InotifyWatcher:
+    """Report files finished writing or moved into a directory tree.
+
+    Files are reported on IN_CLOSE_WRITE/IN_MOVED_TO, so half-written images are
+    never seen. New sub-directories are watched as they appear, and any files
+    already inside them are reported too. If the kernel queue overflows,
+    ``overflowed`` is set and the caller should rescan the tree once.
+    """
+
+    def __init__(self, root: Path, recursive: bool = True):
+        self.root = Path(root)
+        self.recursive = recursive
+        self.overflowed = False
+        self._libc = _load_libc()
+        self._dirs: dict[int, Path] = {}
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        try:
+            self._add_tree(self.root)
+        except BaseException:
+            self.close()
+            raise
+
+    def _add_dir(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch failed for {directory}: {os.strerror(err)}")
+        self._dirs[wd] = directory
+
+    def _add_tree(self, directory: Path) -> list[WatchEvent]:
+        """Watch ``directory`` (and sub-directories) and list the files it already holds."""
+        existing: list[WatchEvent] = []
+        self._add_dir(directory)
+        if not self.recursive and directory != self.root:
+            return existing
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            return existing
+        for entry in entries:
+            entry_path = directory / entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive:
+                        existing.extend(self._add_tree(entry_path))
+                elif entry.is_file():
+                    existing.append(WatchEvent(entry_path))
+            except OSError:
+                continue
+        return existing
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def read_events(self, timeout: float) -> list[WatchEvent]:
+        """Wait up to ``timeout`` seconds and return the events that arrived."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buffer = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return []
+
+        events: list[WatchEvent] = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            raw_name = buffer[offset:offset + length].split(b"\0", 1)[0]
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            directory = self._dirs.get(wd)
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if directory is None or mask & IN_DELETE_SELF:
+                continue
+
+            path = directory / os.fsdecode(raw_name)
+            is_dir = bool(mask & IN_ISDIR)
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                events.append(WatchEvent(path, is_dir=is_dir, removed=True))
+            elif is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                if self.recursive:
+                    try:
+                        events.extend(self._add_tree(path))
+                    except OSError:
+                        # Directory vanished again before we could watch it.
+                        continue
+            elif not is_dir and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                events.append(WatchEvent(path))
+        return events
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self) -> "InotifyWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
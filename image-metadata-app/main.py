@@ -1,15 +1,36 @@
 import argparse
 import csv
+import io
+import json
 import os
+import sys
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import nullcontext, redirect_stdout
 from dataclasses import dataclass
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from core.embedder import create_json_sidecar, embed_metadata
-from core.generator import generate_metadata_from_image
-from utils.validation import validate_file_and_log, validate_or_print
+from core.batch import FAILED_STATUSES, LocalBatchProvider, OpenAIBatchProvider, collect_batch, submit_batch
+from core.cache import ResponseCache, hash_file
+from core.dedupe import DEFAULT_DISTANCE, image_hashes, plan_reuse, reusable_sidecar, reused_sidecar
+from core.embedder import create_json_sidecar, embed_metadata, flush_sidecars, is_embedded_copy
+from core.events import EventLog, ProgressReporter, current_image
+from core.journal import RunJournal, journal_key
+from core.manifest import ProcessingManifest
+from core.metrics import METRICS, observe, write_metrics
+from core.retry import RetryPolicy
+from core.generator import (
+    DEFAULT_MAX_EDGE,
+    UPLOAD_FORMATS,
+    GenerationError,
+    configure_client_pool,
+    configure_retries,
+    generate_metadata_from_image,
+)
+from core.watcher import InotifyWatcher, inotify_available
+from utils.validation import log_validation_issues, validate_or_print
 
 # Load environment variables
 load_dotenv()
@@ -26,6 +47,11 @@ SUPPORTED_IMAGE_EXTENSIONS = {
 }
 WATCH_DELAY_SECONDS = 60
 WATCH_POLL_SECONDS = 5
+CACHE_DIR = Path(__file__).resolve().parent / ".cache"
+RUNS_DIR = Path(__file__).resolve().parent / "logs" / "runs"
+BATCHES_DIR = Path(__file__).resolve().parent / "logs" / "batches"
+# Settings stored in a run journal so --resume repeats the same work.
+JOURNAL_FIELDS = ("image_path", "batch", "csv_path", "directory", "recursive", "auto", "embed", "write_json", "model")
 
 
 def parse_csv_for_images(csv_path: str) -> list[Path]:
@@ -88,14 +114,32 @@ def find_images_in_directory(directory: Path, recursive: bool) -> list[Path]:
     iterator = directory.rglob("*") if recursive else directory.iterdir()
     files = []
     for candidate in iterator:
-        if candidate.is_file() and candidate.suffix.lower() in SUPPORTED_IMAGE_EXTENSIONS:
+        if candidate.suffix.lower() not in SUPPORTED_IMAGE_EXTENSIONS or is_embedded_copy(candidate):
+            continue
+        if candidate.is_file():
             files.append(candidate)
 
     return files
 
 
-def has_sidecar(image_path: Path) -> bool:
-    return image_path.with_suffix(".json").exists()
+def has_sidecar(image_path: Path, manifest: ProcessingManifest | None = None) -> bool:
+    """True if the image has a sidecar.
+
+    With a ``manifest``, a sidecar recording a failed generation does not
+    count. Only images whose last run failed are read to check for one.
+    """
+    sidecar_path = image_path.with_suffix(".json")
+    if not sidecar_path.exists():
+        return False
+    if manifest is None or not manifest.last_failed(image_path):
+        return True
+    try:
+        with open(sidecar_path, "r", encoding="utf-8") as f:
+            sidecar = json.load(f)
+    except (OSError, ValueError):
+        return True  # not ours to judge; leave it alone
+    details = sidecar.get("ai_details") if isinstance(sidecar, dict) else None
+    return not (isinstance(details, dict) and details.get("status") == "error")
 
 
 @dataclass
@@ -103,9 +147,28 @@ class ProcessResult:
     success: bool
     sidecar_written: bool
     excluded: bool = False
+    error: str = ""
+    reused: bool = False
+    # SHA-256 of the image when it was already computed, so the manifest need not re-read it.
+    content_hash: str = ""
 
 
-def process_image(image_path: Path, args, log_path: Path) -> ProcessResult:
+def _can_submit(image_path: Path) -> bool:
+    """Same checks as ``process_image``, for images packed into a batch file."""
+    if not image_path.exists():
+        print(f"❌ File not found: {image_path}")
+        return False
+    if not image_path.is_file() or not os.access(image_path, os.R_OK):
+        print(f"⚠️  Skipping unreadable or non-file: {image_path}")
+        return False
+    return True
+
+
+def process_image(image_path: Path, args, log_path: Path, metadata: dict | None = None) -> ProcessResult:
+    """Generate (or prompt for) metadata, then validate, embed and write it.
+
+    ``metadata`` skips generation, e.g. when reusing a near-duplicate's sidecar.
+    """
     if not image_path.exists():
         print(f"❌ File not found: {image_path}")
         return ProcessResult(success=False, sidecar_written=False, excluded=True)
@@ -114,9 +177,35 @@ def process_image(image_path: Path, args, log_path: Path) -> ProcessResult:
         return ProcessResult(success=False, sidecar_written=False, excluded=True)
 
     image_str = str(image_path)
-    if args.auto:
+    reused = metadata is not None
+    content_hash = ""
+    if reused:
+        source = metadata["ai_details"]["raw_response"].get("reused_from", "")
+        print(f"♻️  Reusing metadata of near-duplicate {source} -> {image_path}")
+    elif args.auto:
         print(f"🔮 Generating metadata using OpenAI -> {image_path}")
-        metadata = generate_metadata_from_image(image_str, model=args.model)
+        cache = getattr(args, "response_cache", None)
+        if cache is not None or getattr(args, "manifest", None) is not None:
+            # Hashed once, for both the cache key and the manifest.
+            content_hash = hash_file(image_path)
+        try:
+            metadata = generate_metadata_from_image(
+                image_str,
+                model=args.model,
+                max_edge=args.max_edge,
+                upload_format=args.upload_format,
+                cache=cache,
+                image_hash=content_hash or None,
+            )
+        except GenerationError as err:
+            print(f"❌ {err}")
+            sidecar_written = False
+            if args.write_json and not has_sidecar(image_path, getattr(args, "manifest", None)):
+                # Record the failure where the metadata would have gone,
+                # never replacing metadata that already exists.
+                create_json_sidecar(image_str, err.sidecar)
+                sidecar_written = True
+            return ProcessResult(success=False, sidecar_written=sidecar_written, error=str(err))
     else:
         print(f"⚙️  Manual mode for {image_path}: please enter metadata fields.")
         now = int(time.time())
@@ -129,26 +218,224 @@ def process_image(image_path: Path, args, log_path: Path) -> ProcessResult:
             "detected_at": now,
         }
 
-    validate_or_print(metadata)
+    issues = validate_or_print(metadata)
 
     sidecar_written = False
     if args.embed:
         print(f"🧷 Embedding metadata into {image_path}...")
-        embed_metadata(image_str, metadata)
+        embed_metadata(image_str, metadata, in_place=getattr(args, "in_place", False))
+        if getattr(args, "in_place", False):
+            content_hash = ""  # the file changed; let the manifest hash what it stats
 
     if args.write_json:
         print(f"💾 Writing JSON sidecar for {image_path}...")
-        create_json_sidecar(image_str, metadata)
+        # Only schema-valid sidecars are indexed as current for migrations.
+        create_json_sidecar(image_str, metadata, index=None if issues else getattr(args, "manifest", None))
         sidecar_written = True
 
-        json_path = image_path.with_suffix(".json")
-        ok, _ = validate_file_and_log(str(json_path), str(log_path))
-        if not ok:
+        if issues:
+            log_validation_issues(str(log_path), str(image_path.with_suffix(".json")), issues)
             print("⚠️  Sidecar failed schema validation; kept file.")
             print(f"   Logged to: {log_path}")
 
     print(f"✅ Finished {image_path}")
-    return ProcessResult(success=True, sidecar_written=sidecar_written)
+    return ProcessResult(success=True, sidecar_written=sidecar_written, reused=reused, content_hash=content_hash)
+
+
+def _manifest_signature(args) -> tuple[str, str]:
+    model = args.model if args.auto else "manual"
+    actions = ",".join(
+        name
+        for name, enabled in (("auto", args.auto), ("embed", args.embed), ("json", args.write_json))
+        if enabled
+    )
+    return model, actions
+
+
+def _is_unchanged(image_path: Path, args) -> bool:
+    """True when the manifest shows this exact image already succeeded with these settings.
+
+    Manual mode and an image named on the command line are always processed.
+    """
+    manifest = getattr(args, "manifest", None)
+    if manifest is None or not getattr(args, "only_changed", True) or not args.auto:
+        return False
+    explicit = getattr(args, "image_path", None)
+    if explicit and Path(explicit).expanduser() == image_path:
+        return False
+    model, actions = _manifest_signature(args)
+    return manifest.is_current(image_path, model, actions)
+
+
+def _record_outcome(image_path: Path, args, result: ProcessResult) -> None:
+    status = "excluded" if result.excluded else ("ok" if result.success else "error")
+    journal = getattr(args, "journal", None)
+    if journal is not None:
+        journal.record(image_path, status, result.error)
+    manifest = getattr(args, "manifest", None)
+    if manifest is None or result.excluded:
+        return
+    model, actions = _manifest_signature(args)
+    manifest.record(image_path, status, model, actions, content_hash=result.content_hash or None)
+
+
+def _wants_journal(args) -> bool:
+    # A single image is quicker to run again than to resume.
+    return bool(args.directory or args.csv_path or args.batch)
+
+
+def _journal_inputs(args) -> dict:
+    def absolute(value):
+        return os.path.abspath(os.path.expanduser(value)) if value else value
+
+    inputs = {name: getattr(args, name) for name in JOURNAL_FIELDS}
+    inputs["image_path"] = absolute(args.image_path)
+    inputs["csv_path"] = absolute(args.csv_path)
+    inputs["directory"] = absolute(args.directory)
+    inputs["batch"] = [absolute(item) for item in args.batch] if args.batch else None
+    return inputs
+
+
+def _report_outcome(image_path: Path, args, result: ProcessResult, seconds: float) -> None:
+    events = getattr(args, "events", None)
+    if events is not None:
+        status = "excluded" if result.excluded else ("ok" if result.success else "error")
+        events.emit(
+            "image",
+            path=str(image_path),
+            status=status,
+            sidecar_written=result.sidecar_written,
+            seconds=round(seconds, 6),
+            error=result.error,
+        )
+    progress = getattr(args, "progress", None)
+    if progress is not None:
+        if not result.success and not result.excluded:
+            # Per-image output is muted; failures still have to be visible.
+            progress.note(f"❌ {image_path}: {result.error or 'failed'}")
+        progress.update(result.success, result.excluded)
+
+
+def _process_safely(image_path: Path, args, log_path: Path, metadata: dict | None = None) -> ProcessResult:
+    start = time.perf_counter()
+    with current_image(image_path):
+        try:
+            if metadata is None:
+                result = process_image(image_path, args, log_path)
+            else:
+                result = process_image(image_path, args, log_path, metadata=metadata)
+        except Exception as exc:  # noqa: BLE001
+            print(f"❌ Unexpected error while processing {image_path}: {exc}")
+            result = ProcessResult(success=False, sidecar_written=False, excluded=False, error=str(exc))
+        seconds = time.perf_counter() - start
+        observe("image", seconds)
+    _record_outcome(image_path, args, result)
+    _report_outcome(image_path, args, result, seconds)
+    return result
+
+
+class _DiscardOutput(io.TextIOBase):
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def _quiet_console(args):
+    """Mute per-image prints while a progress line stands in for them."""
+    if getattr(args, "progress", None) is None:
+        return nullcontext()
+    return redirect_stdout(_DiscardOutput())
+
+
+def _wants_progress(args) -> bool:
+    # Manual mode prompts on stdout, so it always keeps the per-image output.
+    return bool(args.auto and (args.quiet or args.log_format == "json"))
+
+
+def process_batch(images: list[Path], args, log_path: Path) -> list[ProcessResult]:
+    """Process images keeping up to ``args.concurrency`` of them in flight.
+
+    On Ctrl+C no new images are started; work already in flight is drained so
+    its results are still counted. Images never started get no result. With a
+    progress line (``--quiet``/``--log-format json``) per-image output is muted.
+    """
+    with _quiet_console(args):
+        return _process_images(images, args, log_path)
+
+
+def _process_images(images: list[Path], args, log_path: Path) -> list[ProcessResult]:
+    concurrency = max(1, getattr(args, "concurrency", 1) or 1)
+    if concurrency > 1 and not args.auto:
+        print("⚠️  Manual mode prompts for input; ignoring --concurrency and processing one image at a time.")
+        concurrency = 1
+
+    results: list[ProcessResult] = []
+    if concurrency == 1:
+        try:
+            for path in images:
+                results.append(_process_safely(path, args, log_path))
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted; stopping after the current image.")
+        return results
+
+    in_flight: set[Future] = set()
+
+    def collect(done: set[Future]) -> None:
+        for future in done:
+            results.append(future.result())
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="image") as executor:
+        try:
+            for path in images:
+                in_flight.add(executor.submit(_process_safely, path, args, log_path))
+                if len(in_flight) >= concurrency:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            done, in_flight = wait(in_flight)
+            collect(done)
+        except KeyboardInterrupt:
+            print(f"\n🛑 Interrupted; draining {len(in_flight)} in-flight image(s)...")
+            done, in_flight = wait(in_flight)
+            collect(done)
+
+    return results
+
+
+def process_batch_with_reuse(
+    images: list[Path], described: list[Path], args, log_path: Path
+) -> list[ProcessResult]:
+    """Describe one image per cluster of near-duplicates and reuse its sidecar for the rest.
+
+    ``described`` images already have sidecars and can serve as sources too.
+    Duplicates whose source ends up without a usable sidecar are described
+    individually after all.
+    """
+    hashes = image_hashes(images + described, getattr(args, "manifest", None), workers=args.concurrency)
+    representatives, reuse = plan_reuse(images, described, hashes, args.dedupe_distance)
+    print(
+        f"🧬 {len(reuse)} near-duplicate image{'s' if len(reuse) != 1 else ''} will reuse metadata; "
+        f"{len(representatives)} to describe."
+    )
+    results = process_batch(representatives, args, log_path)
+    if len(results) < len(representatives):
+        return results  # interrupted
+
+    fallback: list[Path] = []
+    with _quiet_console(args):
+        try:
+            for path, match in reuse.items():
+                source_sidecar = reusable_sidecar(match.source)
+                if source_sidecar is None:
+                    fallback.append(path)
+                    continue
+                metadata = reused_sidecar(source_sidecar, match.source, match.distance)
+                results.append(_process_safely(path, args, log_path, metadata=metadata))
+        except KeyboardInterrupt:
+            print("\n🛑 Interrupted; stopping after the current image.")
+            return results
+    if fallback:
+        print(f"⚠️  {len(fallback)} near-duplicate(s) have no usable source sidecar; describing them individually.")
+        results.extend(process_batch(fallback, args, log_path))
+    return results
 
 
 def collect_images(args) -> list[Path]:
@@ -180,57 +467,208 @@ def collect_images(args) -> list[Path]:
     return images
 
 
+def _consider_watch_candidates(
+    candidates: list[Path],
+    pending: dict[Path, float],
+    processed: set[Path],
+    args,
+    log_path: Path,
+) -> None:
+    with _quiet_console(args):
+        _consider_candidates(candidates, pending, processed, args, log_path)
+
+
+def _consider_candidates(
+    candidates: list[Path],
+    pending: dict[Path, float],
+    processed: set[Path],
+    args,
+    log_path: Path,
+) -> None:
+    manifest = getattr(args, "manifest", None)
+    for image_path in candidates:
+        if image_path in processed:
+            continue
+        if has_sidecar(image_path, manifest):
+            processed.add(image_path)
+            pending.pop(image_path, None)
+            continue
+
+        now = time.time()
+        first_seen = pending.get(image_path)
+        if first_seen is None:
+            if _is_unchanged(image_path, args):
+                processed.add(image_path)
+                continue
+            pending[image_path] = now
+            print(f"📸 Detected new image: {image_path}")
+            continue
+
+        if now - first_seen < getattr(args, "watch_delay", WATCH_DELAY_SECONDS):
+            continue
+
+        if has_sidecar(image_path, manifest):
+            processed.add(image_path)
+            pending.pop(image_path, None)
+            continue
+
+        print(f"⚙️  Processing {image_path} after wait period")
+        result = _process_safely(image_path, args, log_path)
+        if result.success:
+            processed.add(image_path)
+            pending.pop(image_path, None)
+        elif result.excluded:
+            pending.pop(image_path, None)
+        else:
+            # Try again once the delay has passed, as the polling loop always did.
+            pending[image_path] = time.time()
+
+
+def _rescan_watch_directory(
+    directory: Path,
+    pending: dict[Path, float],
+    processed: set[Path],
+    args,
+    log_path: Path,
+) -> None:
+    current_images = find_images_in_directory(directory, recursive=True)
+    observed = set(current_images)
+
+    # Drop pending entries for files that disappeared
+    for tracked in list(pending.keys()):
+        if tracked not in observed:
+            pending.pop(tracked, None)
+
+    _consider_watch_candidates(current_images, pending, processed, args, log_path)
+
+
+def _open_inotify_watcher(directory: Path, backend: str) -> InotifyWatcher | None:
+    if backend == "poll":
+        return None
+    if not inotify_available():
+        if backend == "inotify":
+            raise ValueError("inotify is not available on this platform; use --watch-backend poll.")
+        return None
+    try:
+        return InotifyWatcher(directory, recursive=True)
+    except OSError as exc:
+        if backend == "inotify":
+            raise ValueError(f"Unable to start inotify watcher: {exc}") from exc
+        print(f"⚠️  inotify unavailable ({exc}); falling back to polling every {WATCH_POLL_SECONDS}s.")
+        return None
+
+
 def watch_folder(directory: Path, args, log_path: Path) -> None:
+    if not directory.exists():
+        raise ValueError(f"Directory not found: {directory}")
+    if not directory.is_dir():
+        raise ValueError(f"Not a directory: {directory}")
+
     pending: dict[Path, float] = {}
     processed: set[Path] = set()
+    watcher = _open_inotify_watcher(directory, getattr(args, "watch_backend", "auto"))
 
-    print(f"👀 Watching {directory} for new images (processing after {WATCH_DELAY_SECONDS}s without sidecar)...")
+    delay = getattr(args, "watch_delay", WATCH_DELAY_SECONDS)
+    print(f"👀 Watching {directory} for new images (processing after {delay:g}s without sidecar)...")
     try:
-        while True:
-            current_images = find_images_in_directory(directory, recursive=True)
-            observed = set(current_images)
+        if watcher is None:
+            while True:
+                _rescan_watch_directory(directory, pending, processed, args, log_path)
+                time.sleep(WATCH_POLL_SECONDS)
 
-            # Drop pending entries for files that disappeared
-            for tracked in list(pending.keys()):
-                if tracked not in observed:
-                    pending.pop(tracked, None)
+        # Event-driven: one full scan for what is already there, then only
+        # changed paths plus the images still waiting out their delay.
+        _rescan_watch_directory(directory, pending, processed, args, log_path)
+        while True:
+            # Wake up in time for pending images whose delay is shorter than the poll interval.
+            timeout = min(WATCH_POLL_SECONDS, max(0.1, delay)) if pending else WATCH_POLL_SECONDS
+            events = watcher.read_events(timeout=timeout)
+            if watcher.overflowed:
+                watcher.overflowed = False
+                _rescan_watch_directory(directory, pending, processed, args, log_path)
+                continue
 
-            for image_path in current_images:
-                if image_path in processed:
+            changed: list[Path] = []
+            for event in events:
+                if event.is_dir or event.path.suffix.lower() not in SUPPORTED_IMAGE_EXTENSIONS:
                     continue
-                if has_sidecar(image_path):
-                    processed.add(image_path)
-                    pending.pop(image_path, None)
+                if is_embedded_copy(event.path):
                     continue
-
-                now = time.time()
-                first_seen = pending.get(image_path)
-                if first_seen is None:
-                    pending[image_path] = now
-                    print(f"📸 Detected new image: {image_path}")
+                if event.removed:
+                    pending.pop(event.path, None)
                     continue
+                changed.append(event.path)
 
-                if now - first_seen < WATCH_DELAY_SECONDS:
-                    continue
+            candidates = list(dict.fromkeys(changed + list(pending.keys())))
+            _consider_watch_candidates(candidates, pending, processed, args, log_path)
+    except KeyboardInterrupt:
+        print("\n👋 Stopping watch mode.")
+    finally:
+        if watcher is not None:
+            watcher.close()
 
-                if has_sidecar(image_path):
-                    processed.add(image_path)
-                    pending.pop(image_path, None)
-                    continue
 
-                print(f"⚙️  Processing {image_path} after wait period")
-                result = process_image(image_path, args, log_path)
-                if result.success:
-                    processed.add(image_path)
-                pending.pop(image_path, None)
+def _print_upload_savings() -> None:
+    saved = METRICS.snapshot()["counters"].get("upload_bytes_saved", 0)
+    if saved:
+        print(f"Re-encoding images before upload saved {int(saved):,} bytes.")
+
+
+def _write_metrics(args) -> None:
+    if not getattr(args, "metrics_out", None):
+        return
+    json_path, prom_path = write_metrics(Path(args.metrics_out).expanduser())
+    print(f"📈 Metrics written to: {json_path} and {prom_path}")
 
-            time.sleep(WATCH_POLL_SECONDS)
-    except KeyboardInterrupt:
-        print("\n👋 Stopping watch mode.")
+
+def _batch_provider(args):
+    if args.batch_provider == "local":
+        return LocalBatchProvider(Path(args.batch_dir).expanduser() / "local")
+    return OpenAIBatchProvider()
+
+
+def _collect_batch_results(args, log_path: Path) -> bool:
+    """Write sidecars for a finished batch. False if the batch failed for good."""
+
+    def write_sidecar(image_path: str, sidecar: dict) -> None:
+        issues = validate_or_print(sidecar)
+        if args.embed:
+            embed_metadata(image_path, sidecar, in_place=args.in_place)
+        create_json_sidecar(image_path, sidecar)
+        if issues:
+            log_validation_issues(str(log_path), str(Path(image_path).with_suffix(".json")), issues)
+            print("⚠️  Sidecar failed schema validation; kept file.")
+            print(f"   Logged to: {log_path}")
+        # Record as the equivalent interactive run so later batches skip it.
+        actions = "auto,embed,json" if args.embed else "auto,json"
+        args.manifest.record(Path(image_path), "ok", sidecar["ai_details"]["model"], actions)
+
+    summary = collect_batch(args.collect_batch, _batch_provider(args), Path(args.batch_dir).expanduser(), write_sidecar)
+    if summary.status in FAILED_STATUSES:
+        print(f"❌ Batch {args.collect_batch} {summary.status}; submit its images again.")
+        return False
+    if summary.status != "completed":
+        print(f"⏳ Batch {args.collect_batch} is {summary.status}; collect again later.")
+        return True
+    print(
+        f"✅ Collected batch {args.collect_batch}. "
+        f"Generated: {summary.written} JSON sidecar file{'s' if summary.written != 1 else ''}. "
+        f"Failed: {summary.failed}. Missing results: {summary.missing}."
+    )
+    return True
 
 
 def main():
-    parser = argparse.ArgumentParser(description="AI-powered Image Metadata Generator")
+    if sys.argv[1:2] == ["validate"]:
+        # Imported here so the generator modes never load it.
+        from cli.validate import main as validate_main
+
+        sys.exit(validate_main(sys.argv[2:]))
+
+    parser = argparse.ArgumentParser(
+        description="AI-powered Image Metadata Generator",
+        epilog="Audit existing sidecars with: main.py validate DIRECTORY (see main.py validate --help)",
+    )
     parser.add_argument("image_path", nargs="?", help="Path to a single image file")
     parser.add_argument("--batch", nargs="+", help="Paths to multiple image files to process")
     parser.add_argument("--csv", dest="csv_path", help="CSV file with an 'image_path' column or single column of paths")
@@ -263,6 +701,11 @@ def main():
         action="store_true",
         help="Write metadata to a JSON sidecar file",
     )
+    parser.add_argument(
+        "--in-place",
+        action="store_true",
+        help="With --embed, rewrite the original file atomically instead of writing a <name>_with_meta copy",
+    )
     # Convenience combo flag
     parser.add_argument(
         "-f",
@@ -277,7 +720,207 @@ def main():
         default="gpt-4o-mini",
         help="OpenAI model to use (multimodal, e.g. gpt-4o or gpt-4o-mini)",
     )
+    parser.add_argument(
+        "--max-edge",
+        type=int,
+        default=DEFAULT_MAX_EDGE,
+        metavar="PIXELS",
+        help=f"Downscale images so their longest edge is at most this before upload (default: {DEFAULT_MAX_EDGE})",
+    )
+    parser.add_argument(
+        "--upload-format",
+        choices=sorted(UPLOAD_FORMATS),
+        default="jpeg",
+        help="Format used when an image has to be re-encoded for upload (default: jpeg)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of images to keep in flight during --auto batch runs (default: 1)",
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=4,
+        metavar="N",
+        help="Retries per image for rate limits, 5xx errors and timeouts, with exponential backoff (default: 4)",
+    )
+    parser.add_argument(
+        "--watch-backend",
+        choices=("auto", "inotify", "poll"),
+        default="auto",
+        help="How watch mode detects new files: inotify events on Linux, or polling (default: auto)",
+    )
+    parser.add_argument(
+        "--watch-delay",
+        type=float,
+        default=WATCH_DELAY_SECONDS,
+        help=f"Seconds a new image must stay without a sidecar before watch mode processes it "
+        f"(default: {WATCH_DELAY_SECONDS})",
+    )
+    parser.add_argument(
+        "--manifest",
+        default=str(CACHE_DIR / "manifest.sqlite3"),
+        help="SQLite manifest of processed images (default: .cache/manifest.sqlite3 in the app folder)",
+    )
+    parser.add_argument(
+        "--only-changed",
+        dest="only_changed",
+        action="store_true",
+        help=(
+            "Skip images that already succeeded with the same model and actions and are unchanged "
+            "(default; not in manual mode or for a single image path)"
+        ),
+    )
+    parser.add_argument(
+        "--force",
+        dest="only_changed",
+        action="store_false",
+        help="Process every image even if the manifest says it is unchanged",
+    )
+    parser.set_defaults(only_changed=True)
+    parser.add_argument(
+        "--dedupe",
+        action="store_true",
+        help="Describe one image per group of near-duplicates (bursts, crops, exports) and reuse its metadata "
+        "for the others (needs --auto and --write-json)",
+    )
+    parser.add_argument(
+        "--dedupe-distance",
+        type=int,
+        default=DEFAULT_DISTANCE,
+        help=f"Max differing perceptual-hash bits (0-64) for images to count as near-duplicates (default: {DEFAULT_DISTANCE})",
+    )
+    parser.add_argument(
+        "--resume",
+        metavar="RUN_ID",
+        help="Continue an interrupted batch run: skip images it completed and retry its failures",
+    )
+    parser.add_argument(
+        "--submit-batch",
+        action="store_true",
+        help="Pack the selected images into Batch API request files and submit them instead of calling OpenAI now",
+    )
+    parser.add_argument(
+        "--collect-batch",
+        metavar="BATCH_ID",
+        help="Write sidecars from a completed batch submitted with --submit-batch",
+    )
+    parser.add_argument(
+        "--runs-dir",
+        default=str(RUNS_DIR),
+        help="Directory for run journals used by --resume (default: logs/runs in the app folder)",
+    )
+    parser.add_argument(
+        "--batch-provider",
+        choices=("openai", "local"),
+        default="openai",
+        help="Where --submit-batch/--collect-batch send work; 'local' is a file-based stand-in (default: openai)",
+    )
+    parser.add_argument(
+        "--batch-dir",
+        default=str(BATCHES_DIR),
+        help="Directory for batch request files and submission records (default: logs/batches in the app folder)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Do not read or write the on-disk response cache",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached responses and call OpenAI again (new results are still cached)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(CACHE_DIR / "responses"),
+        help="Directory for cached OpenAI responses (default: .cache/responses in the app folder)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=512,
+        help="Evict least recently used cache entries beyond this size (default: 512)",
+    )
+    parser.add_argument(
+        "--cache-max-age-days",
+        type=float,
+        default=90,
+        help="Evict cache entries stored more than this many days ago (default: 90)",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="With --auto, replace per-image output with a progress line (images/sec, ETA, errors) on stderr",
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="json: write one JSON event per image outcome and stage to stdout (or --events-out) "
+        "and move all other output to stderr (default: text)",
+    )
+    parser.add_argument(
+        "--events-out",
+        help="Append JSONL events (image outcomes and stage timings) to this file",
+    )
+    parser.add_argument(
+        "--metrics-out",
+        help="Write per-stage timings and token usage as JSON to this path, plus a Prometheus .prom file beside it",
+    )
     args = parser.parse_args()
+    if args.concurrency < 1:
+        parser.error("--concurrency must be at least 1.")
+    if args.max_retries < 0:
+        parser.error("--max-retries cannot be negative.")
+    if args.max_edge < 64:
+        parser.error("--max-edge must be at least 64 pixels.")
+    if args.watch_delay < 0:
+        parser.error("--watch-delay cannot be negative.")
+    if not 0 <= args.dedupe_distance <= 64:
+        parser.error("--dedupe-distance must be between 0 and 64.")
+
+    events = _open_event_log(args)
+    args.events = events
+    args.progress = None
+    if events is not None:
+        METRICS.add_listener(events.record_stage)
+    try:
+        # In JSON mode stdout carries only events; human-readable output goes to stderr.
+        with redirect_stdout(sys.stderr) if args.log_format == "json" else nullcontext():
+            _run(args, parser)
+    finally:
+        if events is not None:
+            METRICS.remove_listener(events.record_stage)
+            events.close()
+
+
+def _open_event_log(args) -> EventLog | None:
+    if args.events_out:
+        return EventLog.open(Path(args.events_out).expanduser())
+    if args.log_format == "json":
+        return EventLog(sys.stdout)
+    return None
+
+
+def _run(args, parser) -> None:
+    journal = None
+    completed: set[str] = set()
+    if args.resume:
+        if args.watch_folder_path:
+            parser.error("--resume applies to batch runs, not watch mode.")
+        try:
+            journal, stored_inputs, completed = RunJournal.resume(Path(args.runs_dir).expanduser(), args.resume)
+        except ValueError as err:
+            print(f"❌ {err}")
+            return
+        for name in JOURNAL_FIELDS:
+            if name in stored_inputs:
+                setattr(args, name, stored_inputs[name])
 
     # Expand combo flag
     if args.full:
@@ -285,24 +928,54 @@ def main():
         args.embed = True
         args.write_json = True
 
+    if args.dedupe and not (args.auto and args.write_json):
+        print("❌ --dedupe needs --auto and --write-json: near-duplicates copy their source's sidecar.")
+        return
+
     # Guard for API key when auto-generation is requested
-    if args.auto and not os.getenv("OPENAI_API_KEY"):
+    uses_batch_api = (args.submit_batch or args.collect_batch) and args.batch_provider == "openai"
+    if (args.auto or uses_batch_api) and not os.getenv("OPENAI_API_KEY"):
         print("❌ OPENAI_API_KEY not set. Add it to .env or environment.")
         return
+    if args.auto:
+        configure_client_pool(args.concurrency)
+        configure_retries(RetryPolicy(max_attempts=args.max_retries + 1))
+
+    args.manifest = ProcessingManifest(Path(args.manifest).expanduser())
+    args.response_cache = None
+    if args.auto and args.use_cache:
+        args.response_cache = ResponseCache(
+            Path(args.cache_dir).expanduser(),
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+            max_age_seconds=args.cache_max_age_days * 24 * 3600,
+            refresh=args.refresh,
+        )
 
     log_path = Path(__file__).resolve().parent / "logs" / "validation_failures.log"
     log_path.parent.mkdir(parents=True, exist_ok=True)
 
+    if args.collect_batch:
+        collected = _collect_batch_results(args, log_path)
+        args.manifest.close()
+        if not collected:
+            sys.exit(1)
+        return
+
     watch_directory_arg = args.watch_folder_path
     if watch_directory_arg:
         if not args.auto:
             print("❌ Watch mode requires --auto so metadata can be generated unattended.")
             return
         directory = Path(watch_directory_arg).expanduser()
+        if _wants_progress(args):
+            args.progress = ProgressReporter(None)
         try:
             watch_folder(directory, args, log_path)
         except ValueError as err:
             print(f"❌ {err}")
+        if args.progress is not None:
+            args.progress.finish()
+        _write_metrics(args)
         return
 
     try:
@@ -313,30 +986,106 @@ def main():
 
     if not images:
         parser.error("No images provided. Supply a path, --batch, --csv, or --directory.")
+    collected = images
 
-    results: list[ProcessResult] = []
-    for path in images:
-        try:
-            result = process_image(path, args, log_path)
-        except Exception as exc:  # noqa: BLE001
-            print(f"❌ Unexpected error while processing {path}: {exc}")
-            results.append(ProcessResult(success=False, sidecar_written=False, excluded=False))
-            continue
-        results.append(result)
+    if args.submit_batch:
+        if args.only_changed:
+            images = [path for path in images if not _is_unchanged(path, args)]
+        submittable = [path for path in images if _can_submit(path)]
+        excluded = len(images) - len(submittable)
+        images = submittable
+        submissions = submit_batch(
+            images,
+            _batch_provider(args),
+            Path(args.batch_dir).expanduser(),
+            model=args.model,
+            max_edge=args.max_edge,
+            upload_format=args.upload_format,
+        )
+        for submission in submissions:
+            print(
+                f"📦 Submitted batch {submission.batch_id} with {len(submission.items)} image(s). "
+                f"Collect with --collect-batch {submission.batch_id}"
+            )
+        if excluded:
+            print(f"⚠️  Excluded {excluded} missing or unreadable image(s) from the batch.")
+        _print_upload_savings()
+        args.manifest.close()
+        return
+
+    already_done = 0
+    if journal is None:
+        if _wants_journal(args):
+            journal = RunJournal.start(Path(args.runs_dir).expanduser(), _journal_inputs(args))
+            print(f"🧾 Run {journal.run_id} (resume with --resume {journal.run_id})")
+    else:
+        remaining = [path for path in images if journal_key(path) not in completed]
+        already_done = len(images) - len(remaining)
+        images = remaining
+        print(f"🧾 Resuming run {journal.run_id}: {already_done} image(s) already completed.")
+    args.journal = journal
+
+    skipped = 0
+    if args.only_changed:
+        changed = [path for path in images if not _is_unchanged(path, args)]
+        skipped = len(images) - len(changed)
+        images = changed
+
+    if _wants_progress(args):
+        args.progress = ProgressReporter(len(images))
+    if args.dedupe:
+        pending = set(images)
+        described = [path for path in collected if path not in pending and has_sidecar(path)]
+        results = process_batch_with_reuse(images, described, args, log_path)
+    else:
+        results = process_batch(images, args, log_path)
+    if args.progress is not None:
+        args.progress.finish()
+    flush_sidecars()
+    args.manifest.close()
 
-    total_files = len(images)
+    total_files = len(results)
+    not_started = len(images) - total_files
+    if journal is not None:
+        journal.close(interrupted=bool(not_started))
     sidecars_created = sum(1 for item in results if item.sidecar_written)
     errors = sum(1 for item in results if not item.success and not item.excluded)
     excluded = sum(1 for item in results if item.excluded)
+    reused = sum(1 for item in results if item.reused)
 
     summary = (
         "✅ Finished processing all images.\n"
         f"Processed {total_files} file{'s' if total_files != 1 else ''}. "
         f"Generated: {sidecars_created} JSON sidecar file{'s' if sidecars_created != 1 else ''}. "
         f"Errors: {errors}. "
-        f"Excluded: {excluded}."
+        f"Excluded: {excluded}. "
+        f"Skipped (unchanged): {skipped}."
     )
+    if args.dedupe:
+        summary += f" Reused from near-duplicates: {reused}."
     print(summary)
+    if args.events is not None:
+        args.events.emit(
+            "summary",
+            processed=total_files,
+            sidecars=sidecars_created,
+            errors=errors,
+            excluded=excluded,
+            skipped=skipped,
+            reused=reused,
+            not_started=not_started,
+        )
+    cache = args.response_cache
+    if cache is not None:
+        print(f"Cache hits: {cache.hits}. Cache misses: {cache.misses}.")
+        cache.evict()
+    _print_upload_savings()
+    if not_started:
+        print(
+            f"🛑 Interrupted before {not_started} image{'s' if not_started != 1 else ''} could start"
+            + (f"; continue with --resume {journal.run_id}." if journal is not None else ".")
+        )
+    _write_metrics(args)
     if errors:
         print("⚠️  Finished with some errors. Review the log above.")
 
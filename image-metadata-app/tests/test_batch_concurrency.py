@@ -0,0 +1,49 @@
+import threading
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import main
+
+
+def test_process_batch_keeps_n_in_flight(monkeypatch):
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def fake_process_image(image_path, args, log_path):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.02)
+        with lock:
+            state["active"] -= 1
+        if image_path.name == "bad.png":
+            raise RuntimeError("boom")
+        return main.ProcessResult(success=True, sidecar_written=True)
+
+    monkeypatch.setattr(main, "process_image", fake_process_image)
+
+    images = [Path(f"img{i}.png") for i in range(11)] + [Path("bad.png")]
+    args = SimpleNamespace(auto=True, concurrency=4)
+    results = main.process_batch(images, args, Path("unused.log"))
+
+    assert len(results) == len(images)
+    assert state["peak"] == 4
+    assert sum(1 for r in results if r.sidecar_written) == 11
+    assert sum(1 for r in results if not r.success and not r.excluded) == 1
+
+
+def test_process_batch_manual_mode_runs_serially(monkeypatch):
+    calls = []
+
+    def fake_process_image(image_path, args, log_path):
+        calls.append(threading.current_thread().name)
+        return main.ProcessResult(success=True, sidecar_written=False)
+
+    monkeypatch.setattr(main, "process_image", fake_process_image)
+
+    args = SimpleNamespace(auto=False, concurrency=8)
+    results = main.process_batch([Path("a.png"), Path("b.png")], args, Path("unused.log"))
+
+    assert len(results) == 2
+    assert set(calls) == {threading.main_thread().name}
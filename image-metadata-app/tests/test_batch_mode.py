@@ -0,0 +1,120 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+from PIL import Image
+
+from core import batch
+
+
+def _responder(body: dict) -> dict:
+    assert "response_format" not in body
+    assert body["text"]["format"]["type"] == "json_schema"
+    assert body["text"]["format"]["schema"]["properties"]["title"]
+    image_part = body["input"][0]["content"][1]
+    assert image_part["image_url"].startswith("data:image/png;base64,")
+    return {
+        "id": "resp_batch",
+        "created_at": 1_700_000_000,
+        "output": [
+            {
+                "type": "message",
+                "content": [
+                    {"type": "output_text", "text": json.dumps({"title": "Batch", "description": "Offline"})}
+                ],
+            }
+        ],
+    }
+
+
+def test_submit_and_collect_with_local_provider():
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        images = []
+        for i in range(3):
+            path = td_path / f"img{i}.png"
+            Image.new("RGB", (4, 4), (i, i, i)).save(path, "PNG")
+            images.append(path)
+
+        state_dir = td_path / "batches"
+        provider = batch.LocalBatchProvider(state_dir / "local", responder=_responder)
+        submissions = batch.submit_batch(images, provider, state_dir, model="gpt-4o-mini")
+        assert len(submissions) == 1
+        assert sorted(submissions[0].items.values()) == sorted(str(p) for p in images)
+
+        written = {}
+        summary = batch.collect_batch(
+            submissions[0].batch_id, provider, state_dir, lambda path, sidecar: written.setdefault(path, sidecar)
+        )
+
+        assert (summary.status, summary.written, summary.failed, summary.missing) == ("completed", 3, 0, 0)
+        sidecar = written[str(images[0])]
+        assert sidecar["title"] == "Batch"
+        assert sidecar["ai_details"]["response_id"] == "resp_batch"
+        assert sidecar["ai_details"]["model"] == "gpt-4o-mini"
+
+
+def test_collect_reports_pending_batches(monkeypatch):
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        image = td_path / "img.png"
+        Image.new("RGB", (4, 4)).save(image, "PNG")
+        provider = batch.LocalBatchProvider(td_path / "local")
+        monkeypatch.setattr(batch, "MAX_REQUESTS_PER_BATCH", 1)
+
+        submissions = batch.submit_batch([image, image], provider, td_path)
+        assert len(submissions) == 2
+
+        summary = batch.collect_batch(submissions[0].batch_id, provider, td_path, lambda *_: None)
+        assert summary.status == "in_progress"
+        assert summary.written == 0
+
+
+def test_missing_images_are_left_out_of_the_batch(capsys):
+    import main
+
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        image = td_path / "img.png"
+        Image.new("RGB", (4, 4)).save(image, "PNG")
+        missing = td_path / "gone.png"
+        assert [p for p in [image, missing, td_path] if main._can_submit(p)] == [image]
+
+        provider = batch.LocalBatchProvider(td_path / "local", responder=_responder)
+        submissions = batch.submit_batch([missing, image], provider, td_path)
+        assert list(submissions[0].items.values()) == [str(image)]
+        assert "Skipping" in capsys.readouterr().out
+
+
+def test_collect_logs_invalid_sidecars_and_fails_on_dead_batches(tmp_path, monkeypatch, capsys):
+    import main
+    from core.manifest import ProcessingManifest
+
+    image = tmp_path / "img.png"
+    Image.new("RGB", (4, 4)).save(image, "PNG")
+
+    def invalid_responder(body: dict) -> dict:
+        reply = _responder(body)
+        reply["output"][0]["content"][0]["text"] = json.dumps({"title": 5, "description": "Offline"})
+        return reply
+
+    provider = batch.LocalBatchProvider(tmp_path / "local", responder=invalid_responder)
+    submission = batch.submit_batch([image], provider, tmp_path)[0]
+    args = SimpleNamespace(
+        collect_batch=submission.batch_id,
+        batch_provider="local",
+        batch_dir=str(tmp_path),
+        embed=False,
+        in_place=False,
+        manifest=ProcessingManifest(tmp_path / "manifest.sqlite3"),
+    )
+    log_path = tmp_path / "validation_failures.log"
+
+    assert main._collect_batch_results(args, log_path)
+    assert str(image.with_suffix(".json")) in log_path.read_text(encoding="utf-8")
+
+    monkeypatch.setattr(batch.LocalBatchProvider, "status", lambda self, batch_id: "expired")
+    assert not main._collect_batch_results(args, log_path)
+    assert f"Batch {submission.batch_id} expired" in capsys.readouterr().out
+    args.manifest.close()
@@ -0,0 +1,118 @@
+import json
+import random
+from pathlib import Path
+from types import SimpleNamespace
+
+from PIL import Image, ImageDraw
+
+import main
+from core.dedupe import BKTree, dhash, hamming, image_hashes, plan_reuse, reused_sidecar
+from core.manifest import ProcessingManifest
+from utils.validation import validation_issues
+
+
+def _scene(seed: int) -> Image.Image:
+    rng = random.Random(seed)
+    img = Image.new("RGB", (320, 240), (rng.randint(0, 255),) * 3)
+    draw = ImageDraw.Draw(img)
+    for _ in range(10):
+        x, y = rng.randint(0, 300), rng.randint(0, 220)
+        fill = (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255))
+        draw.rectangle([x, y, x + rng.randint(20, 120), y + rng.randint(20, 120)], fill=fill)
+    return img
+
+
+def _burst(directory: Path, seed: int) -> list[Path]:
+    base = _scene(seed)
+    paths = [directory / f"shot{seed}_a.jpg", directory / f"shot{seed}_b.jpg", directory / f"shot{seed}_c.png"]
+    base.save(paths[0], quality=90)
+    base.resize((300, 225)).save(paths[1], quality=60)
+    base.crop((3, 3, 317, 237)).save(paths[2])
+    return paths
+
+
+def test_dhash_is_close_for_edits_and_far_for_other_images(tmp_path):
+    first = [dhash(p) for p in _burst(tmp_path, 1)]
+    other = dhash(_burst(tmp_path, 2)[0])
+    assert all(hamming(first[0], h) <= 6 for h in first[1:])
+    assert hamming(first[0], other) > 12
+    (tmp_path / "not-an-image.jpg").write_bytes(b"nope")
+    assert dhash(tmp_path / "not-an-image.jpg") is None
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(7)
+    values = [rng.getrandbits(64) for _ in range(500)]
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:50]]
+    tree = BKTree()
+    for i, value in enumerate(values):
+        tree.add(value, i)
+    for query in values[:20] + [rng.getrandbits(64) for _ in range(5)]:
+        expected = sorted((hamming(query, v), i) for i, v in enumerate(values) if hamming(query, v) <= 10)
+        assert sorted(tree.search(query, 10)) == expected
+
+
+def test_plan_reuse_prefers_described_images_and_keeps_unhashable():
+    described, a, b, c, odd = Path("old.jpg"), Path("a.jpg"), Path("b.jpg"), Path("c.jpg"), Path("odd.heic")
+    hashes = {described: 0b1111, a: 0b1110, b: 0xFFFF_0000_0000_0000, c: 0xFFFF_0000_0000_0001}
+    representatives, reuse = plan_reuse([a, b, c, odd], [described], hashes, max_distance=2)
+    assert representatives == [b, odd]
+    assert reuse[a].source == described and reuse[a].distance == 1
+    assert reuse[c].source == b
+
+
+def test_image_hashes_are_cached_in_manifest(tmp_path, monkeypatch):
+    paths = _burst(tmp_path, 3)
+    manifest = ProcessingManifest(tmp_path / "m.sqlite3")
+    first = image_hashes(paths, manifest)
+
+    monkeypatch.setattr("core.dedupe.dhash", lambda path: (_ for _ in ()).throw(AssertionError(path)))
+    assert image_hashes(paths, manifest) == first
+    manifest.close()
+
+
+def test_reused_sidecar_is_valid_and_records_provenance():
+    source = {
+        "title": "Harbour at dusk",
+        "description": "Boats in a harbour.",
+        "ai_generated": True,
+        "ai_details": {"provider": "openai", "model": "gpt-4o-mini", "response_id": "resp_1", "status": "ok"},
+        "reviewed": True,
+        "detected_at": 1,
+    }
+    sidecar = reused_sidecar(source, Path("/g/a.jpg"), 3)
+    assert validation_issues(sidecar) == []
+    assert sidecar["title"] == "Harbour at dusk" and sidecar["reviewed"] is False
+    assert sidecar["ai_details"]["status"] == "reused"
+    assert sidecar["ai_details"]["response_id"] == "resp_1"
+    assert sidecar["ai_details"]["raw_response"] == {"reused_from": "/g/a.jpg", "phash_distance": 3}
+
+
+def test_batch_with_reuse_calls_the_api_once_per_cluster(tmp_path, monkeypatch):
+    images = _burst(tmp_path, 4) + _burst(tmp_path, 5)
+    calls: list[str] = []
+
+    def fake_generate(image_path, **kwargs):
+        calls.append(Path(image_path).name)
+        return {
+            "title": f"Title for {Path(image_path).stem}",
+            "description": "d",
+            "ai_generated": True,
+            "ai_details": {"provider": "openai", "model": "m", "status": "ok"},
+            "reviewed": False,
+            "detected_at": 0,
+        }
+
+    monkeypatch.setattr(main, "generate_metadata_from_image", fake_generate)
+    args = SimpleNamespace(
+        auto=True, embed=False, write_json=True, model="m", max_edge=1536, upload_format="jpeg",
+        concurrency=2, dedupe_distance=6,
+    )
+    results = main.process_batch_with_reuse(images, [], args, tmp_path / "v.log")
+
+    assert sorted(calls) == ["shot4_a.jpg", "shot5_a.jpg"]
+    assert len(results) == 6 and all(r.success and r.sidecar_written for r in results)
+    assert sum(r.reused for r in results) == 4
+    copy = json.loads((tmp_path / "shot4_c.json").read_text(encoding="utf-8"))
+    assert copy["title"] == "Title for shot4_a"
+    assert copy["ai_details"]["raw_response"]["reused_from"] == str(tmp_path / "shot4_a.jpg")
@@ -0,0 +1,205 @@
+import json
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from PIL import Image, PngImagePlugin
+
+from core.embedder import SidecarWriter, create_json_sidecar, embed_metadata, is_embedded_copy
+
+METADATA = {"title": "Harbour at dusk", "description": "Boats & <lights> on still water."}
+EXISTING_XMP = (
+    '<?xpacket begin="\ufeff" id="W5M0MpCehiHzreSzNTczkc9d"?>'
+    '<x:xmpmeta xmlns:x="adobe:ns:meta/"><rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#">'
+    '<rdf:Description rdf:about="" xmlns:dc="http://purl.org/dc/elements/1.1/">'
+    "<dc:creator><rdf:Seq><rdf:li>Ada Lovelace</rdf:li></rdf:Seq></dc:creator>"
+    '<dc:title><rdf:Alt><rdf:li xml:lang="x-default">Old title</rdf:li>'
+    '<rdf:li xml:lang="de">Alter Titel</rdf:li></rdf:Alt></dc:title>'
+    '</rdf:Description></rdf:RDF></x:xmpmeta><?xpacket end="w"?>'
+)
+
+
+def _scan_data(jpeg_bytes: bytes) -> bytes:
+    return jpeg_bytes[jpeg_bytes.index(b"\xff\xda"):]
+
+
+def test_jpeg_embed_inserts_xmp_without_reencoding():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "photo.jpg"
+        Image.new("RGB", (64, 48), (200, 120, 40)).save(src, "JPEG", quality=90)
+
+        embed_metadata(str(src), METADATA)
+        out = Path(td) / "photo_with_meta.jpg"
+
+        assert _scan_data(out.read_bytes()) == _scan_data(src.read_bytes())
+        with Image.open(out) as img:
+            xmp = img.info["xmp"].decode("utf-8")
+            assert "Harbour at dusk" in xmp
+            assert "Boats &amp; &lt;lights&gt;" in xmp
+
+        # Re-embedding replaces the packet instead of stacking another one.
+        embed_metadata(str(out), {"title": "Second", "description": ""})
+        again = (Path(td) / "photo_with_meta_with_meta.jpg").read_bytes()
+        assert again.count(b"http://ns.adobe.com/xap/1.0/\x00") == 1
+        assert b"Second" in again and b"Harbour" not in again
+
+
+def test_png_embed_writes_itxt_and_keeps_image_data():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "art.png"
+        Image.new("RGBA", (16, 16), (0, 0, 255, 128)).save(src, "PNG")
+
+        embed_metadata(str(src), METADATA)
+        out = Path(td) / "art_with_meta.png"
+
+        original = src.read_bytes()
+        written = out.read_bytes()
+        assert written[written.index(b"IDAT") - 4:] == original[original.index(b"IDAT") - 4:]
+        with Image.open(out) as img:
+            assert img.text["Title"] == "Harbour at dusk"
+            assert img.text["Description"] == METADATA["description"]
+            assert "dc:title" in img.text["XML:com.adobe.xmp"]
+            assert img.mode == "RGBA"
+
+
+def test_jpeg_and_png_embed_merge_existing_metadata():
+    with TemporaryDirectory() as td:
+        jpeg = Path(td) / "photo.jpg"
+        Image.new("RGB", (8, 8)).save(jpeg, "JPEG", xmp=EXISTING_XMP.encode("utf-8"))
+        png = Path(td) / "art.png"
+        info = PngImagePlugin.PngInfo()
+        info.add_itxt("XML:com.adobe.xmp", EXISTING_XMP)
+        info.add_text("Description", "Written by hand")
+        Image.new("RGB", (8, 8)).save(png, "PNG", pnginfo=info)
+
+        with Image.open(embed_metadata(str(jpeg), METADATA)) as img:
+            xmp = img.info["xmp"].decode("utf-8")
+        assert "Ada Lovelace" in xmp and "Alter Titel" in xmp
+        assert "Harbour at dusk" in xmp and "Old title" not in xmp
+        assert xmp.count("dc:title>") == 2
+
+        with Image.open(embed_metadata(str(png), {"title": "Harbour at dusk", "description": ""})) as img:
+            assert img.text["Description"] == "Written by hand"
+            assert img.text["Title"] == "Harbour at dusk"
+            assert "Ada Lovelace" in img.text["XML:com.adobe.xmp"]
+
+
+def test_webp_embed_adds_xmp_chunk_and_keeps_bitstream():
+    with TemporaryDirectory() as td:
+        for name, kwargs, mode in (
+            ("lossy.webp", {"quality": 80}, "RGB"),
+            ("lossless.webp", {"lossless": True}, "RGBA"),
+        ):
+            src = Path(td) / name
+            Image.new(mode, (30, 20), (10, 200, 30) + ((90,) if mode == "RGBA" else ())).save(src, "WEBP", **kwargs)
+            original_pixels = Image.open(src).convert(mode).tobytes()
+
+            out = embed_metadata(str(src), METADATA)
+
+            with Image.open(out) as img:
+                assert img.size == (30, 20)
+                assert img.mode == mode
+                assert "Harbour at dusk" in img.info["xmp"].decode("utf-8")
+                assert img.convert(mode).tobytes() == original_pixels
+
+
+def test_tiff_embed_keeps_format_and_pixels():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "scan.tiff"
+        Image.new("RGBA", (12, 9), (1, 2, 3, 4)).save(src, "TIFF", compression="tiff_lzw")
+
+        out = embed_metadata(str(src), METADATA)
+
+        with Image.open(src) as before, Image.open(out) as after:
+            assert after.format == "TIFF"
+            assert after.tobytes() == before.tobytes()
+            assert after.tag_v2[270] == METADATA["description"]
+            assert b"Harbour at dusk" in bytes(after.tag_v2[700])
+
+
+def test_tiff_and_webp_embed_keep_existing_metadata_and_compressed_data():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "scan.tiff"
+        tags = {33432: "(c) Studio", 271: "Canon", 700: EXISTING_XMP.encode("utf-8")}
+        Image.new("RGB", (40, 30), (10, 120, 200)).save(src, "TIFF", compression="jpeg", tiffinfo=tags)
+
+        out = embed_metadata(str(src), METADATA)
+
+        original = src.read_bytes()
+        assert out.read_bytes()[8 : len(original)] == original[8:]
+        with Image.open(out) as after:
+            assert after.tag_v2[33432] == "(c) Studio" and after.tag_v2[271] == "Canon"
+            assert after.tag_v2[270] == METADATA["description"]
+            xmp = bytes(after.tag_v2[700])
+            assert b"Ada Lovelace" in xmp and b"Harbour at dusk" in xmp
+
+        webp = Path(td) / "art.webp"
+        Image.new("RGB", (8, 8)).save(webp, "WEBP", xmp=EXISTING_XMP.encode("utf-8"))
+        written = embed_metadata(str(webp), METADATA).read_bytes()
+        assert written.count(b"XMP ") == 1
+        assert b"Ada Lovelace" in written and b"Harbour at dusk" in written
+
+
+def test_in_place_embed_replaces_original_atomically():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "photo.jpg"
+        Image.new("RGB", (8, 8)).save(src, "JPEG")
+
+        out = embed_metadata(str(src), METADATA, in_place=True)
+
+        assert out == src
+        assert sorted(p.name for p in Path(td).iterdir()) == ["photo.jpg"]
+        with Image.open(src) as img:
+            assert "Harbour at dusk" in img.info["xmp"].decode("utf-8")
+
+
+def test_unsupported_formats_are_left_alone():
+    with TemporaryDirectory() as td:
+        src = Path(td) / "anim.gif"
+        Image.new("P", (4, 4)).save(src, "GIF")
+
+        assert embed_metadata(str(src), METADATA) is None
+        assert sorted(p.name for p in Path(td).iterdir()) == ["anim.gif"]
+
+
+def test_embedded_copies_are_recognised():
+    assert is_embedded_copy(Path("/g/photo_with_meta.jpg"))
+    assert not is_embedded_copy(Path("/g/photo.jpg"))
+
+
+def test_sidecar_write_keeps_regular_file_permissions(monkeypatch):
+    import core.embedder as embedder
+
+    monkeypatch.setattr(embedder, "_UMASK", 0o022)
+    with TemporaryDirectory() as td:
+        image = Path(td) / "photo.jpg"
+        sidecar = image.with_suffix(".json")
+        writer = SidecarWriter()
+
+        create_json_sidecar(str(image), {"title": "new"}, writer=writer)
+        assert sidecar.stat().st_mode & 0o777 == 0o644
+
+        os.chmod(sidecar, 0o640)
+        create_json_sidecar(str(image), {"title": "changed"}, writer=writer)
+        assert sidecar.stat().st_mode & 0o777 == 0o640
+
+
+def test_sidecar_write_is_atomic_and_skips_identical_content():
+    with TemporaryDirectory() as td:
+        image = Path(td) / "photo.jpg"
+        sidecar = image.with_suffix(".json")
+        writer = SidecarWriter(fsync_every=1000, fsync_interval=3600)
+
+        assert create_json_sidecar(str(image), {"title": "Ünïcode"}, writer=writer) is True
+        assert json.loads(sidecar.read_text(encoding="utf-8")) == {"title": "Ünïcode"}
+        os.utime(sidecar, ns=(1, 1))
+
+        assert create_json_sidecar(str(image), {"title": "Ünïcode"}, writer=writer) is False
+        assert sidecar.stat().st_mtime_ns == 1
+
+        assert create_json_sidecar(str(image), {"title": "Changed"}, writer=writer) is True
+        assert json.loads(sidecar.read_text(encoding="utf-8")) == {"title": "Changed"}
+        assert sorted(p.name for p in Path(td).iterdir()) == ["photo.json"]
+        assert writer._dirty_dirs == {td}
+        writer.flush()
+        assert writer._dirty_dirs == set()
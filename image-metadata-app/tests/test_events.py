@@ -0,0 +1,74 @@
+import io
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import main
+from core.events import EventLog, ProgressReporter
+from core.metrics import METRICS
+
+
+def test_event_log_writes_every_record_in_order(tmp_path):
+    path = tmp_path / "events" / "run.jsonl"
+    log = EventLog.open(path)
+    for i in range(1000):
+        log.emit("image", path=f"img{i}.png", status="ok")
+    log.close()
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["path"] for r in records] == [f"img{i}.png" for i in range(1000)]
+    assert all(r["event"] == "image" and "ts" in r for r in records)
+
+
+def test_progress_reporter_throttles_and_reports_eta():
+    stream = io.StringIO()
+    progress = ProgressReporter(total=10, stream=stream, interval=3600)
+    for i in range(10):
+        progress.update(success=i != 3)
+    assert stream.getvalue() == ""  # throttled
+
+    progress.finish()
+    line = stream.getvalue()
+    assert line.endswith("\n") and line.count("\n") == 1
+    assert "10/10 images" in line and "img/s" in line and "ETA 0:00:00" in line
+    assert "errors 1" in line
+
+
+def test_quiet_batch_mutes_prints_and_emits_events(monkeypatch, tmp_path, capsys):
+    def fake_process_image(image_path, args, log_path):
+        print(f"per-image output for {image_path}")
+        with METRICS.timer("api"):
+            pass
+        if image_path.name == "bad.png":
+            raise RuntimeError("boom")
+        return main.ProcessResult(success=True, sidecar_written=True)
+
+    monkeypatch.setattr(main, "process_image", fake_process_image)
+
+    events_path = tmp_path / "events.jsonl"
+    events = EventLog.open(events_path)
+    progress_stream = io.StringIO()
+    args = SimpleNamespace(
+        auto=True,
+        concurrency=2,
+        events=events,
+        progress=ProgressReporter(total=3, stream=progress_stream, interval=0),
+    )
+    METRICS.add_listener(events.record_stage)
+    try:
+        results = main.process_batch([Path("a.png"), Path("b.png"), Path("bad.png")], args, Path("unused.log"))
+    finally:
+        METRICS.remove_listener(events.record_stage)
+        events.close()
+
+    assert len(results) == 3
+    assert "per-image output" not in capsys.readouterr().out
+    assert "3/3 images" in progress_stream.getvalue()
+    assert "❌ bad.png: boom\n" in progress_stream.getvalue()
+
+    records = [json.loads(line) for line in events_path.read_text().splitlines()]
+    outcomes = {r["path"]: r for r in records if r["event"] == "image"}
+    assert outcomes["bad.png"]["status"] == "error" and outcomes["bad.png"]["error"] == "boom"
+    assert outcomes["a.png"]["status"] == "ok"
+    api_stages = sorted(r["path"] for r in records if r["event"] == "stage" and r["stage"] == "api")
+    assert api_stages == ["a.png", "b.png", "bad.png"]
@@ -33,15 +33,18 @@ class _FakeResponses:
         self._payload_text = payload_text
 
     def create(self, **kwargs):
-        # Ensure response_format requests json_schema
-        rf = kwargs.get("response_format", {})
-        assert rf.get("type") == "json_schema"
-        assert "json_schema" in rf
+        # Ensure text.format requests json_schema
+        fmt = kwargs.get("text", {}).get("format", {})
+        assert fmt.get("type") == "json_schema"
+        assert "schema" in fmt
         return _FakeResp(self._payload_text)
 
 
 class _FakeOpenAI:
-    def __init__(self, api_key=None):
+    instances = 0
+
+    def __init__(self, api_key=None, **kwargs):
+        _FakeOpenAI.instances += 1
         # Emit minimal valid model JSON for sidecar fields the generator lifts
         payload = json.dumps({
             "title": "Test Title",
@@ -50,6 +53,13 @@ class _FakeOpenAI:
         self.responses = _FakeResponses(payload)
 
 
+@pytest.fixture(autouse=True)
+def _fresh_client_registry():
+    gen.reset_clients()
+    yield
+    gen.reset_clients()
+
+
 def _write_tiny_png(path: Path):
     # 1x1 transparent PNG bytes
     png_bytes = (
@@ -78,3 +88,126 @@ def test_generate_metadata_from_image_sidecar_shape(monkeypatch):
         assert isinstance(sidecar["detected_at"], int)
         assert isinstance(sidecar["reviewed"], bool)
 
+
+
+def test_generate_metadata_reuses_shared_client(monkeypatch):
+    monkeypatch.setattr(gen, "OpenAI", _FakeOpenAI)
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    _FakeOpenAI.instances = 0
+
+    with TemporaryDirectory() as td:
+        img_path = Path(td) / "img.png"
+        _write_tiny_png(img_path)
+
+        for _ in range(3):
+            gen.generate_metadata_from_image(str(img_path))
+
+    assert _FakeOpenAI.instances == 1
+    assert gen.get_client() is gen.get_client(api_key="sk-test")
+
+
+def test_register_client_is_used_for_matching_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-injected")
+    fake = _FakeOpenAI()
+    gen.register_client(fake)
+
+    assert gen.get_client() is fake
+    gen.configure_client_pool(16)
+    try:
+        assert gen.get_client() is not fake
+    finally:
+        gen.configure_client_pool(None)
+
+
+def test_prepare_image_for_upload_passes_small_png_through():
+    with TemporaryDirectory() as td:
+        img_path = Path(td) / "img.png"
+        _write_tiny_png(img_path)
+
+        prepared = gen.prepare_image_for_upload(str(img_path))
+
+        assert prepared.mime == "image/png"
+        assert prepared.data_url.startswith("data:image/png;base64,")
+        assert prepared.reencoded is False
+        assert prepared.detail == "low"
+
+
+def test_prepare_image_for_upload_downscales_large_tiff():
+    from PIL import Image
+
+    with TemporaryDirectory() as td:
+        img_path = Path(td) / "big.tiff"
+        Image.new("RGB", (3000, 2000), (120, 30, 200)).save(img_path, "TIFF")
+
+        prepared = gen.prepare_image_for_upload(str(img_path), max_edge=1024, upload_format="webp")
+
+        assert prepared.reencoded is True
+        assert prepared.mime == "image/webp"
+        assert (prepared.width, prepared.height) == (1024, 683)
+        assert prepared.detail == "high"
+        assert prepared.bytes_saved > 0
+        assert prepared.upload_bytes < prepared.original_bytes
+
+
+def test_generate_fields_requests_only_the_added_fields():
+    captured = {}
+
+    class _FieldResponses:
+        def create(self, **kwargs):
+            captured.update(kwargs)
+            return _FakeResp(json.dumps({"alt_text": "A red square"}))
+
+    class _Client:
+        responses = _FieldResponses()
+
+    with TemporaryDirectory() as td:
+        img_path = Path(td) / "img.png"
+        _write_tiny_png(img_path)
+
+        values = gen.generate_fields_for_image(
+            str(img_path),
+            {"alt_text": {"type": "string"}},
+            {"title": "Red square", "description": ""},
+            client=_Client(),
+        )
+
+    assert values == {"alt_text": "A red square"}
+    schema = captured["text"]["format"]["schema"]
+    assert schema["properties"] == {"alt_text": {"type": "string"}}
+    assert schema["required"] == ["alt_text"]
+    assert captured["max_output_tokens"] == gen.FIELD_OUTPUT_TOKENS
+    prompt = captured["input"][0]["content"][0]["text"]
+    assert '"title": "Red square"' in prompt and "description" not in prompt
+
+
+def test_generate_fields_names_the_fields_when_the_sdk_rejects_the_schema():
+    calls = []
+
+    class _OldSDKResponses:
+        def create(self, **kwargs):
+            calls.append(kwargs)
+            if "response_format" in kwargs or "text" in kwargs:
+                key = "response_format" if "response_format" in kwargs else "text"
+                raise TypeError(f"create() got an unexpected keyword argument '{key}'")
+            return _FakeResp(json.dumps({"alt_text": "A red square", "keywords": ["red"]}))
+
+    class _Client:
+        responses = _OldSDKResponses()
+
+    with TemporaryDirectory() as td:
+        img_path = Path(td) / "img.png"
+        _write_tiny_png(img_path)
+
+        values = gen.generate_fields_for_image(
+            str(img_path),
+            {"alt_text": {"type": "string"}, "keywords": {"type": "array", "items": {"type": "string"}}},
+            {},
+            client=_Client(),
+        )
+
+    assert values == {"alt_text": "A red square", "keywords": ["red"]}
+    assert "response_format" not in calls[0]
+    retried = calls[-1]
+    assert "text" not in retried and "response_format" not in retried
+    prompt = retried["input"][0]["content"][0]["text"]
+    assert "alt_text" in prompt and "keywords" in prompt and "raw JSON" in prompt
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+from tests.conftest import ROOT
+
+# Cold-start budget for `import main` (microseconds, cumulative per -X importtime).
+# Importing the openai SDK alone costs several times this.
+IMPORT_BUDGET_US = 400_000
+# Only the modes that need them may import these.
+HEAVY_MODULES = {"openai", "httpx", "pydantic", "jsonschema", "PIL"}
+
+
+def _importtime(code: str) -> dict[str, int]:
+    """Run ``code`` in a fresh interpreter; return cumulative import time per top-level package."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, total, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        if total.isdigit():
+            cumulative[name] = int(total)
+    return cumulative
+
+
+def test_cli_import_skips_heavy_dependencies_and_stays_in_budget():
+    imported = _importtime("import main")
+    assert not HEAVY_MODULES & set(imported), sorted(HEAVY_MODULES & set(imported))
+    assert imported["main"] < IMPORT_BUDGET_US, f"import main took {imported['main']} us"
+
+
+def test_validating_a_valid_sidecar_needs_no_jsonschema():
+    code = (
+        "import sys\n"
+        "from utils.validation import validate_or_print\n"
+        "sidecar = {'title': 't', 'description': 'd', 'ai_generated': False, 'ai_details': {},"
+        " 'reviewed': False, 'detected_at': 0}\n"
+        "assert validate_or_print(sidecar) == []\n"
+        "assert 'jsonschema' not in sys.modules\n"
+    )
+    imported = _importtime(code)
+    assert "jsonschema" not in imported
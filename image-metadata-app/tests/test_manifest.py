@@ -0,0 +1,113 @@
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from core.manifest import ProcessingManifest
+
+
+def test_manifest_skips_only_unchanged_successes():
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        image = td_path / "photo.jpg"
+        image.write_bytes(b"original bytes")
+        image.with_suffix(".json").write_text("{}", encoding="utf-8")
+        manifest = ProcessingManifest(td_path / "manifest.sqlite3")
+
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,json") is False
+
+        manifest.record(image, "ok", "gpt-4o-mini", "auto,json")
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,json") is True
+        assert manifest.is_current(image, "gpt-4o", "auto,json") is False
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,embed,json") is False
+
+        # A touch changes mtime but not content: still current via the content hash.
+        stat = image.stat()
+        os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,json") is True
+
+        image.write_bytes(b"edited  bytes!")
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,json") is False
+
+        manifest.record(image, "error", "gpt-4o-mini", "auto,json")
+        assert manifest.is_current(image, "gpt-4o-mini", "auto,json") is False
+        manifest.close()
+
+        reopened = ProcessingManifest(td_path / "manifest.sqlite3")
+        reopened.record(image, "ok", "gpt-4o-mini", "auto,json")
+        assert reopened.is_current(image, "gpt-4o-mini", "auto,json") is True
+
+        # A deleted sidecar has to be written again.
+        image.with_suffix(".json").unlink()
+        assert reopened.is_current(image, "gpt-4o-mini", "auto,json") is False
+        assert reopened.is_current(image, "gpt-4o-mini", "auto") is False
+        reopened.record(image, "ok", "gpt-4o-mini", "auto,embed", content_hash="given")
+        assert reopened.is_current(image, "gpt-4o-mini", "auto,embed") is True
+        reopened.close()
+
+
+def test_sidecar_index_tracks_schema_fingerprint_and_file_changes():
+    from core.embedder import create_json_sidecar
+    from utils.validation import schema_fingerprint
+
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        manifest = ProcessingManifest(td_path / "manifest.sqlite3")
+        create_json_sidecar(str(td_path / "a.jpg"), {"title": "a"}, index=manifest)
+        create_json_sidecar(str(td_path / "b.jpg"), {"title": "b"}, index=manifest)
+        sidecars = [td_path / "a.json", td_path / "b.json", td_path / "c.json"]
+
+        current = manifest.current_sidecars(sidecars, schema_fingerprint())
+        assert current == {str(td_path / "a.json"), str(td_path / "b.json")}
+        assert manifest.current_sidecars(sidecars, "older-schema") == set()
+
+        (td_path / "b.json").write_text('{"title": "edited by hand"}', encoding="utf-8")
+        assert manifest.current_sidecars(sidecars, schema_fingerprint()) == {str(td_path / "a.json")}
+        manifest.close()
+
+
+def test_processing_hashes_once_and_skips_only_batch_auto_runs(tmp_path, monkeypatch):
+    image = tmp_path / "photo.jpg"
+    image.write_bytes(b"original bytes")
+    manifest = ProcessingManifest(tmp_path / "manifest.sqlite3")
+    seen = {}
+
+    def fake_generate(image_path, **kwargs):
+        seen.update(kwargs)
+        return {"title": "t", "description": "d", "ai_generated": True, "ai_details": {}, "reviewed": False, "detected_at": 0}
+
+    monkeypatch.setattr(main, "generate_metadata_from_image", fake_generate)
+    monkeypatch.setattr("core.manifest.hash_file", lambda path: pytest.fail("hashed twice"))
+    args = SimpleNamespace(
+        auto=True, embed=False, write_json=True, model="m", max_edge=1536, upload_format="jpeg",
+        manifest=manifest, response_cache=None, only_changed=True, image_path=None,
+    )
+    result = main.process_image(image, args, tmp_path / "v.log")
+    main._record_outcome(image, args, result)
+
+    assert seen["image_hash"] == result.content_hash and len(result.content_hash) == 64
+    assert main._is_unchanged(image, args)
+    assert not main._is_unchanged(image, SimpleNamespace(**{**vars(args), "image_path": str(image)}))
+    assert not main._is_unchanged(image, SimpleNamespace(**{**vars(args), "auto": False}))
+    manifest.close()
+
+
+def test_in_place_embed_records_the_hash_of_the_embedded_file(tmp_path, monkeypatch):
+    image = tmp_path / "photo.jpg"
+    image.write_bytes(b"original bytes")
+    manifest = ProcessingManifest(tmp_path / "manifest.sqlite3")
+    sidecar = {"title": "t", "description": "d", "ai_generated": True, "ai_details": {}, "reviewed": False, "detected_at": 0}
+    monkeypatch.setattr(main, "generate_metadata_from_image", lambda image_path, **kwargs: sidecar)
+    monkeypatch.setattr(main, "embed_metadata", lambda path, metadata, in_place: image.write_bytes(b"embedded bytes"))
+    args = SimpleNamespace(
+        auto=True, embed=True, in_place=True, write_json=True, model="m", max_edge=1536, upload_format="jpeg",
+        manifest=manifest, response_cache=None, only_changed=True, image_path=None,
+    )
+    main._record_outcome(image, args, main.process_image(image, args, tmp_path / "v.log"))
+
+    os.utime(image, ns=(0, 0))  # same bytes, new mtime: the stored hash decides
+    assert main._is_unchanged(image, args)
+    manifest.close()
@@ -0,0 +1,121 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import core.generator as gen
+from core import metrics
+from core.embedder import create_json_sidecar
+from core.metrics import MetricsRegistry, write_metrics
+
+
+@pytest.fixture(autouse=True)
+def _fresh_metrics():
+    metrics.METRICS.reset()
+    yield
+    metrics.METRICS.reset()
+
+
+def test_histogram_buckets_and_prometheus_text(tmp_path):
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        registry.observe("api", seconds)
+    registry.count("input_tokens", 120)
+    registry.count("input_tokens", 80)
+    registry.count("request_bytes", 123_456_789)
+
+    stage = registry.snapshot()["stages"]["api"]
+    assert stage["count"] == 4
+    assert stage["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+    assert stage["max_seconds"] == 3.0
+    assert 0.1 <= stage["p50_seconds"] <= 1.0
+
+    text = registry.prometheus_text()
+    assert "# TYPE image_metadata_stage_seconds histogram" in text
+    assert 'image_metadata_stage_seconds_bucket{stage="api",le="1.0"} 3' in text
+    assert 'image_metadata_stage_seconds_bucket{stage="api",le="+Inf"} 4' in text
+    assert 'image_metadata_stage_seconds_count{stage="api"} 4' in text
+    assert "image_metadata_input_tokens_total 200" in text
+    assert "image_metadata_request_bytes_total 123456789" in text
+
+    json_path, prom_path = write_metrics(tmp_path / "run.json", registry)
+    assert prom_path == tmp_path / "run.prom"
+    assert json.loads(json_path.read_text())["counters"] == {"input_tokens": 200, "request_bytes": 123_456_789}
+    assert prom_path.read_text() == text
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["run.json", "run.prom"]
+
+
+def test_timer_records_when_block_raises():
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        with registry.timer("embed"):
+            raise ValueError("boom")
+    assert registry.snapshot()["stages"]["embed"]["count"] == 1
+
+
+class _UsageResponses:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        return SimpleNamespace(
+            output_text=json.dumps({"title": "T", "description": "D"}),
+            id="resp_1",
+            created=0,
+            output=[],
+            usage=SimpleNamespace(input_tokens=321, output_tokens=12, total_tokens=333),
+        )
+
+
+def test_generation_records_stages_tokens_and_request_bytes(tmp_path):
+    from PIL import Image
+
+    image = tmp_path / "photo.png"
+    Image.new("RGB", (32, 32), (10, 20, 30)).save(image)
+    client = SimpleNamespace(responses=_UsageResponses())
+
+    sidecar = gen.generate_metadata_from_image(str(image), client=client)
+    create_json_sidecar(str(image), sidecar)
+
+    snapshot = metrics.METRICS.snapshot()
+    assert {"read", "encode", "api", "write"} <= set(snapshot["stages"])
+    counters = snapshot["counters"]
+    assert counters["api_requests"] == 1
+    assert counters["input_tokens"] == 321
+    assert counters["output_tokens"] == 12
+    request = gen.build_metadata_request(str(image))
+    assert counters["request_bytes"] == len(json.dumps(request))
+
+
+def test_request_bytes_count_what_was_sent_after_the_fallback(tmp_path):
+    from PIL import Image
+
+    image = tmp_path / "photo.png"
+    Image.new("RGB", (32, 32)).save(image)
+    sent = []
+
+    class _OldSDK(_UsageResponses):
+        def create(self, **kwargs):
+            if "text" in kwargs:
+                raise TypeError("create() got an unexpected keyword argument 'text'")
+            sent.append(json.loads(json.dumps(kwargs)))
+            return super().create(**kwargs)
+
+    gen.generate_metadata_from_image(str(image), client=SimpleNamespace(responses=_OldSDK()))
+
+    counters = metrics.METRICS.snapshot()["counters"]
+    assert counters["api_requests"] == 1
+    assert counters["request_bytes"] == len(json.dumps(sent[0]))
+
+
+def test_upload_savings_are_counted_not_printed(tmp_path, capsys):
+    from PIL import Image
+
+    image = tmp_path / "big.tiff"
+    Image.new("RGB", (3000, 2000), (120, 30, 200)).save(image, "TIFF")
+
+    gen.build_metadata_request(str(image), max_edge=1024)
+
+    assert capsys.readouterr().out == ""
+    assert metrics.METRICS.snapshot()["counters"]["upload_bytes_saved"] > 0
@@ -0,0 +1,210 @@
+import importlib.util
+import json
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.conftest import ROOT
+
+MODULE_NAME = "migrate_update_sidecarSchema"
+
+
+@pytest.fixture(scope="module")
+def migration():
+    spec = importlib.util.spec_from_file_location(MODULE_NAME, ROOT / "@wtils" / f"{MODULE_NAME}.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can unpickle the chunk function and results.
+    sys.modules[MODULE_NAME] = module
+    spec.loader.exec_module(module)
+    yield module
+    sys.modules.pop(MODULE_NAME, None)
+
+
+def _gallery(migration, root: Path, count: int) -> None:
+    schema = json.loads((ROOT / "schemas" / "ImageSidecarCopy.schema.json").read_text(encoding="utf-8"))
+    root.mkdir()
+    for i in range(count):
+        legacy = {"title": f"Image {i}", "description": "old", "obsolete": True}
+        if i % 3 == 0:
+            legacy = migration._coerce_to_schema({"title": f"Image {i}", "description": "current"}, schema)
+            legacy["ai_details"] = migration._coerce_to_schema({}, schema["properties"]["ai_details"])
+        (root / f"img{i:03d}.json").write_text(json.dumps(legacy), encoding="utf-8")
+    (root / "broken.json").write_text("{not json", encoding="utf-8")
+
+
+def _run(migration, tmp_path: Path, monkeypatch, capsys, workers: int, dry_run: bool):
+    gallery = tmp_path / f"gallery-{workers}-{dry_run}"
+    _gallery(migration, gallery, 40)
+    generator_copy = tmp_path / f"generator-{workers}-{dry_run}.py"
+    shutil.copyfile(ROOT / "core" / "generator.py", generator_copy)
+    monkeypatch.setattr(migration, "GENERATOR_PATH", generator_copy)
+    migration.migrate(
+        schema_path=ROOT / "schemas" / "ImageSidecarCopy.schema.json",
+        gallery_path=gallery,
+        snapshot_path=tmp_path / f"snapshot-{workers}-{dry_run}.json",
+        use_openai=False,
+        model="gpt-4o-mini",
+        dry_run=dry_run,
+        workers=workers,
+        manifest_path=tmp_path / f"manifest-{workers}-{dry_run}.sqlite3",
+    )
+    out, err = capsys.readouterr()
+    return gallery, out.replace(str(gallery), "<gallery>"), err.replace(str(gallery), "<gallery>")
+
+
+def test_parallel_migration_matches_serial_output(migration, tmp_path, monkeypatch, capsys):
+    serial_gallery, serial_out, serial_err = _run(migration, tmp_path, monkeypatch, capsys, 1, False)
+    parallel_gallery, parallel_out, parallel_err = _run(migration, tmp_path, monkeypatch, capsys, 4, False)
+
+    assert parallel_out.replace("-4-False", "-1-False") == serial_out
+    assert parallel_err == serial_err
+    assert "Summary: 26 updated, 14 unchanged, 0 already current, 1 failed" in parallel_out
+    assert "broken.json" in parallel_err
+    for path in serial_gallery.glob("img*.json"):
+        migrated = json.loads((parallel_gallery / path.name).read_text(encoding="utf-8"))
+        assert migrated == json.loads(path.read_text(encoding="utf-8"))
+        assert "obsolete" not in migrated and migrated["reviewed"] is False
+
+
+def test_parallel_dry_run_reports_without_writing(migration, tmp_path, monkeypatch, capsys):
+    gallery, out, _ = _run(migration, tmp_path, monkeypatch, capsys, 3, True)
+
+    assert out.count("🛈 Would update") == 26
+    assert "Summary: 26 would update, 14 unchanged, 0 already current, 1 failed" in out
+    assert "obsolete" in (gallery / "img001.json").read_text(encoding="utf-8")
+    assert not (tmp_path / "manifest-3-True.sqlite3").exists()
+
+
+def test_rerun_skips_current_sidecars_and_migrates_only_stale_ones(migration, tmp_path, monkeypatch, capsys):
+    gallery, _, _ = _run(migration, tmp_path, monkeypatch, capsys, 1, False)
+    manifest = tmp_path / "manifest-1-False.sqlite3"
+
+    def rerun():
+        migration.migrate(
+            schema_path=ROOT / "schemas" / "ImageSidecarCopy.schema.json",
+            gallery_path=gallery,
+            snapshot_path=tmp_path / "snapshot-1-False.json",
+            use_openai=False,
+            model="gpt-4o-mini",
+            dry_run=False,
+            manifest_path=manifest,
+        )
+        return capsys.readouterr().out
+
+    load_json = migration._load_json
+
+    def fail_on_parse(path):
+        assert path.parent != gallery, f"current sidecar was parsed: {path}"
+        return load_json(path)
+
+    monkeypatch.setattr(migration, "_load_json", fail_on_parse)
+    (gallery / "broken.json").unlink()
+    assert "Summary: 0 updated, 0 unchanged, 40 already current, 0 failed" in rerun()
+
+    monkeypatch.undo()
+    monkeypatch.setattr(migration, "GENERATOR_PATH", tmp_path / "generator-1-False.py")
+    (gallery / "img005.json").write_text(json.dumps({"title": "stale", "description": "x"}), encoding="utf-8")
+    out = rerun()
+    assert "Summary: 1 updated, 0 unchanged, 39 already current, 0 failed" in out
+    assert "img005.json" in out
+
+
+def test_directory_index_answers_companion_lookups_from_one_scandir(migration, tmp_path, monkeypatch):
+    (tmp_path / "sub").mkdir()
+    for name in ["a.json", "a.jpg", "a.png", "b.json", "c.webp", "c_with_meta.webp", "sub/d.json", "sub/d.heic"]:
+        (tmp_path / name).write_bytes(b"")
+
+    scans = []
+    real_scandir = migration.os.scandir
+    monkeypatch.setattr(migration.os, "scandir", lambda path: scans.append(path) or real_scandir(path))
+    monkeypatch.setattr(Path, "exists", lambda self: pytest.fail(f"probed {self}"))
+
+    dir_index = migration.DirectoryIndex()
+    sidecars = list(migration._iter_sidecars_in_dir(tmp_path, True, dir_index))
+    assert [p.relative_to(tmp_path).as_posix() for p in sidecars] == ["a.json", "b.json", "sub/d.json"]
+    assert dir_index.companion_image(tmp_path / "a.json") == tmp_path / "a.png"
+    assert dir_index.companion_image(tmp_path / "b.json") is None
+    assert dir_index.companion_image(tmp_path / "sub" / "d.json") == tmp_path / "sub" / "d.heic"
+    assert dir_index.companion_sidecar(tmp_path / "c.webp") is None
+    assert sorted(p.name for p in migration._iter_images_in_dir(tmp_path, False, dir_index)) == [
+        "a.jpg",
+        "a.png",
+        "c.webp",
+    ]
+    assert len(scans) == 2
+
+
+def test_openai_enrichment_asks_only_for_added_empty_text_fields(migration, tmp_path, monkeypatch, capsys):
+    schema = json.loads((ROOT / "schemas" / "ImageSidecarCopy.schema.json").read_text(encoding="utf-8"))
+    previous = json.loads(json.dumps(schema))
+    schema["properties"]["alt_text"] = {"type": "string", "default": ""}
+    schema["properties"]["rating"] = {"type": "number", "default": 0}
+    diff = migration._diff_schemas(previous, schema)
+
+    sidecar = tmp_path / "photo.json"
+    current = migration._coerce_to_schema({"title": "Harbour", "description": "Boats"}, previous)
+    sidecar.write_text(json.dumps(current), encoding="utf-8")
+    (tmp_path / "photo.jpg").write_bytes(b"")
+
+    calls = []
+
+    def fake_fields(image_path, model, fields, context):
+        calls.append((image_path.name, sorted(fields), context))
+        return {"alt_text": "Boats in a harbour"}
+
+    monkeypatch.setattr(migration, "_generate_fields_for_image", fake_fields)
+    monkeypatch.setattr(migration, "_generate_metadata_for_image", lambda *a: pytest.fail("full generation"))
+    result = migration._migrate_one(sidecar, schema, diff, dry_run=False, use_openai=True)
+
+    assert result.status == "updated"
+    assert calls == [("photo.jpg", ["alt_text"], {"title": "Harbour", "description": "Boats"})]
+    migrated = json.loads(sidecar.read_text(encoding="utf-8"))
+    assert migrated["alt_text"] == "Boats in a harbour" and migrated["rating"] == 0
+
+
+def test_openai_enrichment_fills_arrays_and_retries_failures(migration, tmp_path, monkeypatch, capsys):
+    schema = json.loads((ROOT / "schemas" / "ImageSidecarCopy.schema.json").read_text(encoding="utf-8"))
+    previous = json.loads(json.dumps(schema))
+    schema["properties"]["keywords"] = {"type": "array", "items": {"type": "string"}}
+    schema["properties"]["rating"] = {"type": "number", "default": 0}
+    diff = migration._diff_schemas(previous, schema)
+    assert migration._fields_not_enriched(schema, diff) == ["rating"]
+
+    sidecar = tmp_path / "photo.json"
+    original = json.dumps(migration._coerce_to_schema({"title": "Harbour", "description": "Boats"}, previous))
+    sidecar.write_text(original, encoding="utf-8")
+    (tmp_path / "photo.jpg").write_bytes(b"")
+    replies = [None, {"keywords": ["boats", "harbour"]}]
+    monkeypatch.setattr(migration, "_generate_fields_for_image", lambda *args: replies.pop(0))
+
+    index = migration.ProcessingManifest(tmp_path / "manifest.sqlite3")
+    counts = migration._run_migrations([sidecar], schema, diff, True, "m", False, index=index)
+    assert counts["failed"] == 1
+    assert sidecar.read_text(encoding="utf-8") == original
+    assert not index.current_sidecars([sidecar], migration.fingerprint_schema(schema))
+
+    counts = migration._run_migrations([sidecar], schema, diff, True, "m", False, index=index)
+    assert counts["updated"] == 1
+    assert json.loads(sidecar.read_text(encoding="utf-8"))["keywords"] == ["boats", "harbour"]
+    assert index.current_sidecars([sidecar], migration.fingerprint_schema(schema))
+    index.close()
+
+
+def test_sidecars_left_unenriched_are_not_indexed_as_current(migration, tmp_path, monkeypatch, capsys):
+    schema = json.loads((ROOT / "schemas" / "ImageSidecarCopy.schema.json").read_text(encoding="utf-8"))
+    previous = json.loads(json.dumps(schema))
+    schema["properties"]["alt_text"] = {"type": "string", "default": ""}
+    diff = migration._diff_schemas(previous, schema)
+
+    sidecar = tmp_path / "orphan.json"  # no companion image
+    sidecar.write_text(json.dumps({"title": "Harbour", "description": "Boats"}), encoding="utf-8")
+    monkeypatch.setattr(migration, "_generate_fields_for_image", lambda *args: pytest.fail("no image to send"))
+
+    index = migration.ProcessingManifest(tmp_path / "manifest.sqlite3")
+    counts = migration._run_migrations([sidecar], schema, diff, True, "m", False, index=index)
+    assert counts["updated"] == 1
+    assert "No companion image" in capsys.readouterr().err
+    assert not index.current_sidecars([sidecar], migration.fingerprint_schema(schema))
+    index.close()
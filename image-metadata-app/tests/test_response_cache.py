@@ -0,0 +1,95 @@
+import json
+import os
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import core.generator as gen
+from core.cache import ResponseCache, make_cache_key
+
+
+class _CountingResponses:
+    def __init__(self):
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+
+        class _Resp:
+            output_text = json.dumps({"title": "Cached", "description": "From cache"})
+            id = "resp_cache"
+            created = 1_700_000_000
+            output = []
+
+        return _Resp()
+
+
+class _CountingClient:
+    def __init__(self):
+        self.responses = _CountingResponses()
+
+
+def test_second_generation_is_served_from_cache():
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        first = td_path / "a.png"
+        copy = td_path / "copy_of_a.png"
+        from PIL import Image
+
+        Image.new("RGB", (8, 8), (10, 20, 30)).save(first, "PNG")
+        copy.write_bytes(first.read_bytes())
+
+        cache = ResponseCache(td_path / "cache")
+        client = _CountingClient()
+
+        original = gen.generate_metadata_from_image(str(first), client=client, cache=cache)
+        reused = gen.generate_metadata_from_image(str(copy), client=client, cache=cache)
+
+        assert client.responses.calls == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert reused["title"] == original["title"] == "Cached"
+        assert reused["ai_details"]["response_id"] == "resp_cache"
+
+        refreshing = ResponseCache(td_path / "cache", refresh=True)
+        gen.generate_metadata_from_image(str(copy), client=client, cache=refreshing)
+        assert client.responses.calls == 2
+        assert (refreshing.hits, refreshing.misses) == (0, 1)
+
+
+def test_evict_drops_expired_then_least_recently_used():
+    with TemporaryDirectory() as td:
+        cache = ResponseCache(Path(td), max_bytes=None, max_age_seconds=60)
+        keys = [make_cache_key(str(i), "m", "p", "s", 1536, "jpeg") for i in range(3)]
+        for key in keys:
+            cache.put(key, {"title": "x" * 100})
+
+        stale = cache._entry_path(keys[0])
+        old = time.time() - 3600
+        os.utime(stale, (old, old))
+        assert cache.get(keys[0]) is None
+
+        older = time.time() - 30
+        os.utime(cache._entry_path(keys[1]), (older, older))
+        cache.max_bytes = cache._entry_path(keys[2]).stat().st_size
+
+        assert cache.evict() == 2
+        assert not cache._entry_path(keys[1]).exists()
+        assert cache.get(keys[2]) == {"title": "x" * 100}
+
+
+def test_hits_do_not_extend_an_entry_s_age_and_upload_settings_change_the_key():
+    assert make_cache_key("h", "m", "p", "s", 1536, "jpeg") != make_cache_key("h", "m", "p", "s", 1024, "jpeg")
+    assert make_cache_key("h", "m", "p", "s", 1536, "jpeg") != make_cache_key("h", "m", "p", "s", 1536, "webp")
+
+    with TemporaryDirectory() as td:
+        cache = ResponseCache(Path(td), max_bytes=None, max_age_seconds=60)
+        key = make_cache_key("h", "m", "p", "s", 1536, "jpeg")
+        cache.put(key, {"title": "x"})
+        stored = time.time() - 50
+        os.utime(cache._entry_path(key), (stored, stored))
+
+        assert cache.get(key) == {"title": "x"}
+        assert cache._entry_path(key).stat().st_mtime == stored
+        os.utime(cache._entry_path(key), (time.time(), stored - 20))
+        assert cache.get(key) is None
+        assert cache.evict() == 1
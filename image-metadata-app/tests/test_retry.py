@@ -0,0 +1,167 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import pytest
+
+import core.generator as gen
+import main
+from core.manifest import ProcessingManifest
+from core.retry import CircuitBreaker, RetryPolicy, call_with_retry
+from utils.validation import validate_response
+
+
+class _Response:
+    def __init__(self, headers):
+        self.headers = headers
+        self.text = '{"error": {"message": "slow down"}}'
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _Response(headers or {})
+        self.body = {"error": {"message": "slow down", "code": status_code}}
+
+
+def test_retries_transient_errors_and_honors_retry_after():
+    sleeps = []
+    outcomes = [_StatusError(429, {"retry-after": "7"}), _StatusError(503), "ok"]
+
+    def flaky():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=30.0)
+    assert call_with_retry(flaky, policy, sleep=sleeps.append) == "ok"
+    assert sleeps[0] == 7.0
+    assert 0 <= sleeps[1] <= 2.0
+
+
+def test_non_retryable_errors_fail_fast():
+    calls = []
+
+    def bad_request():
+        calls.append(1)
+        raise _StatusError(400)
+
+    with pytest.raises(_StatusError):
+        call_with_retry(bad_request, RetryPolicy(max_attempts=5), sleep=lambda _: None)
+    assert len(calls) == 1
+
+
+def test_circuit_breaker_pauses_callers_after_repeated_failures():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=60.0)
+    breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+
+    waited = []
+
+    def fake_sleep(seconds):
+        waited.append(seconds)
+        breaker.record_success()
+
+    breaker.wait_until_closed(sleep=fake_sleep)
+    assert waited and 0 < waited[0] <= 60.0
+    assert not breaker.is_open
+
+
+def test_final_failure_is_recorded_in_ai_details(monkeypatch):
+    class _AlwaysRateLimited:
+        class responses:
+            @staticmethod
+            def create(**kwargs):
+                raise _StatusError(429, {"retry-after-ms": "1"})
+
+    monkeypatch.setattr(gen, "_RETRY_POLICY", RetryPolicy(max_attempts=2, max_delay=0.01))
+    monkeypatch.setattr(gen, "_BREAKER", CircuitBreaker(failure_threshold=100))
+
+    with TemporaryDirectory() as td:
+        from PIL import Image
+
+        img_path = Path(td) / "img.png"
+        Image.new("RGB", (4, 4)).save(img_path, "PNG")
+
+        with pytest.raises(gen.GenerationError) as excinfo:
+            gen.generate_metadata_from_image(str(img_path), client=_AlwaysRateLimited())
+
+    details = excinfo.value.sidecar["ai_details"]
+    assert details["status"] == "error"
+    assert "429" in details["error"]
+    assert json.loads(details["error_body"])["error"]["code"] == 429
+    assert validate_response(excinfo.value.sidecar) == (True, None)
+
+
+def test_circuit_breaker_lets_one_trial_call_through_after_cooldown():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.0)
+    breaker.record_failure()
+
+    breaker.wait_until_closed(sleep=lambda _: pytest.fail("the first caller is the trial"))
+    waits = []
+
+    def queued_sleep(seconds):
+        waits.append(seconds)
+        if len(waits) == 2:
+            breaker.record_success()
+
+    breaker.wait_until_closed(sleep=queued_sleep)
+    assert waits == [CircuitBreaker.TRIAL_POLL_INTERVAL] * 2
+    breaker.wait_until_closed(sleep=lambda _: pytest.fail("closed again"))
+
+
+def test_non_retryable_errors_leave_the_breaker_state_alone():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.0)
+    breaker.record_failure()
+
+    def bad_request():
+        raise _StatusError(400)
+
+    with pytest.raises(_StatusError):
+        call_with_retry(bad_request, RetryPolicy(max_attempts=3), breaker, sleep=lambda _: None)
+    breaker.record_failure()
+    assert breaker._half_open  # the 400 did not reset the count
+
+    with pytest.raises(_StatusError):
+        call_with_retry(bad_request, RetryPolicy(max_attempts=3), breaker, sleep=lambda _: None)
+    breaker.wait_until_closed(sleep=lambda _: pytest.fail("the trial slot was released"))
+
+
+def test_error_sidecars_do_not_stop_watch_mode_from_retrying(tmp_path, monkeypatch):
+    image = tmp_path / "img.png"
+    image.write_bytes(b"")
+    image.with_suffix(".json").write_text(json.dumps({"title": "", "ai_details": {"status": "error"}}), encoding="utf-8")
+    manifest = ProcessingManifest(tmp_path / "manifest.sqlite")
+    assert main.has_sidecar(image, manifest)  # nothing says the last run failed, so the file is not read
+    manifest.record(image, "error", "gpt", "json")
+    assert not main.has_sidecar(image, manifest)
+
+    retried = []
+    monkeypatch.setattr(main, "_process_safely", lambda path, *a: retried.append(path) or main.ProcessResult(True, True))
+    processed: set[Path] = set()
+    args = SimpleNamespace(watch_delay=0, manifest=manifest)
+    main._consider_candidates([image], {image: 0.0}, processed, args, tmp_path / "v.log")
+    assert retried == [image] and processed == {image}
+
+    image.with_suffix(".json").write_text(json.dumps({"title": "Done", "ai_details": {"status": "ok"}}), encoding="utf-8")
+    assert main.has_sidecar(image, manifest)
+    manifest.close()
+
+
+def test_failed_watch_images_stay_pending_for_another_attempt(tmp_path, monkeypatch):
+    image = tmp_path / "img.png"
+    image.write_bytes(b"")
+    outcomes = [main.ProcessResult(False, False, error="boom"), main.ProcessResult(True, True)]
+    monkeypatch.setattr(main, "_process_safely", lambda *a: outcomes.pop(0))
+    pending, processed = {image: 0.0}, set()
+    args = SimpleNamespace(watch_delay=0)
+
+    main._consider_candidates([image], pending, processed, args, tmp_path / "v.log")
+    assert image in pending and not processed
+    main._consider_candidates(list(pending), pending, processed, args, tmp_path / "v.log")
+    assert processed == {image} and not pending
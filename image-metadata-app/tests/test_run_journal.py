@@ -0,0 +1,58 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+
+import pytest
+
+import main
+from core.journal import RunJournal, journal_key, read_journal
+
+
+def test_resume_skips_completed_and_retries_failures():
+    with TemporaryDirectory() as td:
+        runs = Path(td)
+        inputs = {"directory": "/gallery", "recursive": True}
+        journal = RunJournal.start(runs, inputs, fsync_every=2)
+        journal.record(Path("/gallery/a.jpg"), "ok")
+        journal.record(Path("/gallery/b.jpg"), "error")
+        journal.record(Path("/gallery/c.jpg"), "ok")
+        # Simulate a crash mid-write: torn final line, no end record.
+        journal._file.write('{"event": "image", "path": "/gallery/d.jp')
+        journal._file.flush()
+
+        resumed, stored, completed = RunJournal.resume(runs, journal.run_id)
+        assert stored == inputs
+        assert completed == {journal_key("/gallery/a.jpg"), journal_key("/gallery/c.jpg")}
+
+        resumed.record(Path("/gallery/b.jpg"), "ok")
+        resumed.close()
+
+        _, statuses = read_journal(resumed.path)
+        assert statuses[journal_key("/gallery/b.jpg")] == "ok"
+
+
+def test_resume_unknown_run_raises():
+    with TemporaryDirectory() as td:
+        with pytest.raises(ValueError):
+            RunJournal.resume(Path(td), "does-not-exist")
+
+
+def test_only_multi_image_runs_get_a_journal():
+    def args(**inputs):
+        return SimpleNamespace(**{"directory": None, "csv_path": None, "batch": None, **inputs})
+
+    assert not main._wants_journal(args())
+    assert main._wants_journal(args(directory="gallery"))
+    assert main._wants_journal(args(csv_path="list.csv"))
+    assert main._wants_journal(args(batch=["a.jpg", "b.jpg"]))
+
+
+def test_failed_images_are_journaled_with_their_error(tmp_path):
+    journal = RunJournal.start(tmp_path, {"directory": "/gallery"})
+    args = SimpleNamespace(journal=journal, manifest=None)
+    main._record_outcome(Path("/gallery/a.jpg"), args, main.ProcessResult(False, False, error="HTTP 400: bad image"))
+    journal.close()
+
+    records = [json.loads(line) for line in journal.path.read_text(encoding="utf-8").splitlines()]
+    assert [record.get("error") for record in records if record["event"] == "image"] == ["HTTP 400: bad image"]
@@ -0,0 +1,84 @@
+import copy
+import json
+import random
+from pathlib import Path
+
+import pytest
+from jsonschema import Draft202012Validator
+
+from utils.schema_codegen import UnsupportedSchemaError, compile_schema
+from utils.validation import SCHEMA_PATH
+
+SIDECAR = {
+    "title": "Harbour",
+    "description": "Boats at dusk.",
+    "ai_generated": True,
+    "ai_details": {"provider": "openai", "model": "gpt-4o-mini", "created": 1.5, "raw_response": {"id": "r"}},
+    "reviewed": False,
+    "detected_at": 1700000000,
+}
+
+# Values that exercise JSON type edge cases: bool vs number, int vs float, containers.
+ODD_VALUES = [None, True, False, 0, 1, 1.0, 2.5, -3, "", "x", [], [1, "a"], {}, {"k": None}]
+
+
+def _mutations(doc: dict, rng: random.Random):
+    yield doc
+    for key in list(doc):
+        dropped = dict(doc)
+        del dropped[key]
+        yield dropped
+        for value in ODD_VALUES:
+            yield {**doc, key: value}
+    for value in ODD_VALUES:
+        yield {**doc, "extra": value}
+        yield value
+    for key in ["provider", "created", "attempted_at", "raw_response", "unknown"]:
+        for value in ODD_VALUES:
+            mutated = copy.deepcopy(doc)
+            mutated["ai_details"][key] = value
+            yield mutated
+    for _ in range(200):
+        mutated = copy.deepcopy(doc)
+        for key in rng.sample(list(mutated), rng.randint(1, 3)):
+            mutated[key] = rng.choice(ODD_VALUES)
+        yield mutated
+
+
+def test_generated_sidecar_validator_matches_jsonschema():
+    schema = json.loads(Path(SCHEMA_PATH).read_text(encoding="utf-8"))
+    reference = Draft202012Validator(schema)
+    fast = compile_schema(schema)
+
+    decisions = [(fast(doc), reference.is_valid(doc), doc) for doc in _mutations(SIDECAR, random.Random(7))]
+    assert any(ok for ok, _, _ in decisions) and not all(ok for ok, _, _ in decisions)
+    mismatches = [doc for ok, expected, doc in decisions if ok != expected]
+    assert mismatches == []
+
+
+def test_generated_validator_matches_jsonschema_for_other_keywords():
+    schema = {
+        "type": "object",
+        "required": ["n"],
+        "properties": {
+            "n": {"type": "integer", "minimum": 0, "exclusiveMaximum": 10},
+            "tag": {"enum": ["a", 1, None, True]},
+            "pin": {"const": 1},
+            "name": {"type": ["string", "null"], "minLength": 2, "maxLength": 4},
+            "items": {"type": "array", "items": {"type": "number"}, "minItems": 1, "maxItems": 2},
+            "loose": {"minimum": 3, "maxLength": 1},
+        },
+        "additionalProperties": {"type": "boolean"},
+    }
+    reference = Draft202012Validator(schema)
+    fast = compile_schema(schema)
+    rng = random.Random(11)
+    pool = ODD_VALUES + [3, 9, 10, 9.0, "ab", "abcde", [1.5], [1, 2, 3], ["x"], "a"]
+    for _ in range(3000):
+        doc = {key: rng.choice(pool) for key in rng.sample(["n", "tag", "pin", "name", "items", "loose", "x"], rng.randint(0, 7))}
+        assert fast(doc) == reference.is_valid(doc), doc
+
+
+def test_unsupported_keywords_are_rejected_not_ignored():
+    with pytest.raises(UnsupportedSchemaError):
+        compile_schema({"type": "object", "properties": {"a": {"pattern": "^x"}}})
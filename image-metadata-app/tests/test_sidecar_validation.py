@@ -2,7 +2,7 @@ import json
 from pathlib import Path
 from tempfile import TemporaryDirectory
 
-from utils.validation import validate_file_and_log
+from utils.validation import validate_and_log, validate_file_and_log
 
 
 def _write_json(path: Path, obj: dict) -> None:
@@ -54,3 +54,47 @@ def test_validate_file_and_log_invalid():
         assert str(json_path) in content
         assert content.strip() != ""
 
+
+def test_validate_and_log_returns_structured_issues_without_reading_back():
+    with TemporaryDirectory() as td:
+        td_path = Path(td)
+        json_path = td_path / "never_written.json"
+        log_path = td_path / "failures.log"
+
+        ok, issues = validate_and_log(
+            {"title": 5, "description": "d", "ai_generated": False, "ai_details": {}, "reviewed": False},
+            str(json_path),
+            str(log_path),
+        )
+        assert ok is False
+        assert {(issue.path, issue.validator) for issue in issues} == {("$", "required"), ("$.title", "type")}
+        assert not json_path.exists()
+        content = log_path.read_text(encoding="utf-8")
+        assert str(json_path) in content and "$.title" in content
+
+
+def test_compiled_validator_is_reused_until_schema_mtime_changes(monkeypatch):
+    import os
+
+    from utils import validation
+
+    with TemporaryDirectory() as td:
+        schema_path = Path(td) / "schema.json"
+        schema = json.loads(Path(validation.SCHEMA_PATH).read_text(encoding="utf-8"))
+        schema_path.write_text(json.dumps(schema), encoding="utf-8")
+        monkeypatch.setattr(validation, "SCHEMA_PATH", str(schema_path))
+        monkeypatch.setattr(validation, "_compiled", None)
+
+        first = validation.get_validator()
+        assert validation.get_validator() is first
+        fingerprint = validation.schema_fingerprint()
+
+        schema["required"] = ["title"]
+        schema_path.write_text(json.dumps(schema), encoding="utf-8")
+        stat = schema_path.stat()
+        os.utime(schema_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert validation.get_validator() is not first
+        assert validation.schema_fingerprint() != fingerprint
+        ok, err = validation.validate_response({"title": "only"})
+        assert ok is True and err is None
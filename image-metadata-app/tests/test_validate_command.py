@@ -0,0 +1,87 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from cli import validate
+from core.manifest import ProcessingManifest
+
+VALID = {
+    "title": "t",
+    "description": "d",
+    "ai_generated": False,
+    "ai_details": {},
+    "reviewed": False,
+    "detected_at": 0,
+}
+
+
+def _gallery(root: Path, valid: int = 6) -> None:
+    (root / "nested" / "deeper").mkdir(parents=True)
+    (root / ".cache").mkdir()
+    for i in range(valid):
+        folder = root / "nested" if i % 2 else root / "nested" / "deeper"
+        (folder / f"img{i}.json").write_text(json.dumps(VALID), encoding="utf-8")
+    (root / "bad.json").write_text(json.dumps({"title": 1}), encoding="utf-8")
+    (root / "broken.json").write_text("{", encoding="utf-8")
+    (root / ".cache" / "ignored.json").write_text("{", encoding="utf-8")
+
+
+def test_audit_reports_failures_and_reuses_cached_results(tmp_path, monkeypatch):
+    _gallery(tmp_path / "gallery")
+    manifest = ProcessingManifest(tmp_path / "manifest.sqlite3")
+
+    summary, failures = validate.audit(tmp_path / "gallery", manifest=manifest)
+    assert (summary.sidecars, summary.valid, summary.invalid, summary.validated) == (8, 6, 2, 8)
+    assert [Path(r.path).name for r in failures] == ["bad.json", "broken.json"]
+    assert failures[1].issues[0]["validator"] == "json"
+
+    checked: list[str] = []
+    original = validate.validate_sidecar_file
+
+    def tracking(sidecar):
+        checked.append(Path(sidecar.path).name)
+        return original(sidecar)
+
+    monkeypatch.setattr(validate, "validate_sidecar_file", tracking)
+    changed = tmp_path / "gallery" / "nested" / "img1.json"
+    changed.write_text(json.dumps({**VALID, "title": 5}), encoding="utf-8")
+    os.utime(changed, ns=(1, 1))
+
+    summary, failures = validate.audit(tmp_path / "gallery", manifest=manifest)
+    assert checked == ["img1.json"]
+    assert (summary.cached, summary.validated, summary.invalid) == (7, 1, 3)
+    assert any(r.cached and Path(r.path).name == "bad.json" for r in failures)
+    manifest.close()
+
+
+def test_parallel_audit_matches_serial(tmp_path, monkeypatch):
+    _gallery(tmp_path, valid=40)
+    serial, serial_failures = validate.audit(tmp_path, workers=1)
+    monkeypatch.setattr(validate, "MIN_PARALLEL_FILES", 0)
+    parallel, parallel_failures = validate.audit(tmp_path, workers=2)
+    assert parallel == serial
+    assert [r.path for r in parallel_failures] == [r.path for r in serial_failures]
+
+
+def test_validate_command_writes_report_and_exit_status(tmp_path, capsys):
+    _gallery(tmp_path / "gallery")
+    report = tmp_path / "report.json"
+    args = [str(tmp_path / "gallery"), "--report", str(report), "--manifest", str(tmp_path / "m.sqlite3")]
+
+    assert validate.main(args) == 1
+    data = json.loads(report.read_text(encoding="utf-8"))
+    assert data["totals"]["invalid"] == 2
+    assert {Path(item["path"]).name for item in data["invalid"]} == {"bad.json", "broken.json"}
+
+    (tmp_path / "gallery" / "bad.json").unlink()
+    (tmp_path / "gallery" / "broken.json").unlink()
+    assert validate.main(args) == 0
+    assert "All sidecars are valid" in capsys.readouterr().out
+
+
+def test_validate_command_rejects_missing_directory(tmp_path):
+    assert validate.main([str(tmp_path / "missing"), "--no-cache"]) == 2
+    with pytest.raises(SystemExit):
+        validate.main([str(tmp_path), "--workers", "0"])
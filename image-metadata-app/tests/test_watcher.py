@@ -0,0 +1,52 @@
+import time
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+import pytest
+
+from core.watcher import InotifyWatcher, inotify_available
+
+pytestmark = pytest.mark.skipif(not inotify_available(), reason="inotify is Linux-only")
+
+
+def _drain(watcher: InotifyWatcher, want: set[Path], timeout: float = 2.0) -> set[Path]:
+    seen: set[Path] = set()
+    deadline = time.monotonic() + timeout
+    while not want <= seen and time.monotonic() < deadline:
+        for event in watcher.read_events(timeout=0.1):
+            if not event.removed and not event.is_dir:
+                seen.add(event.path)
+    return seen
+
+
+def test_inotify_reports_finished_files_in_new_subdirectories():
+    with TemporaryDirectory() as td:
+        root = Path(td)
+        with InotifyWatcher(root) as watcher:
+            top = root / "top.jpg"
+            top.write_bytes(b"jpeg")
+            nested_dir = root / "shoot" / "day1"
+            nested_dir.mkdir(parents=True)
+            nested = nested_dir / "frame.png"
+            nested.write_bytes(b"png")
+
+            seen = _drain(watcher, {top, nested})
+            assert {top, nested} <= seen
+
+            later = nested_dir / "later.png"
+            later.write_bytes(b"png")
+            assert later in _drain(watcher, {later})
+
+
+def test_inotify_reports_removed_files():
+    with TemporaryDirectory() as td:
+        root = Path(td)
+        target = root / "gone.jpg"
+        target.write_bytes(b"jpeg")
+        with InotifyWatcher(root) as watcher:
+            target.unlink()
+            deadline = time.monotonic() + 2.0
+            removed = []
+            while not removed and time.monotonic() < deadline:
+                removed = [e.path for e in watcher.read_events(timeout=0.1) if e.removed]
+            assert removed == [target]
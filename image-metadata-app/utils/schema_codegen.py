@@ -0,0 +1,241 @@
+"""Generate a specialized Python validator from a JSON Schema.
+
+Inspired by fastjsonschema: rather than walking the schema for each document,
+the schema is turned into straight-line Python once and compiled. The
+generated function only answers valid/invalid. ``jsonschema`` stays the
+reference implementation and still produces the error messages.
+
+Only the keywords the sidecar schema family needs are supported. Any other
+keyword raises ``UnsupportedSchemaError`` so that callers can fall back to
+``jsonschema``. A keyword is never silently ignored.
+
+    python -m utils.schema_codegen schemas/ImageSidecarCopy.schema.json -o sidecar_validator.py
+"""
+
+import argparse
+import json
+from typing import Any, Callable
+
+ANNOTATION_KEYWORDS = frozenset(
+    {"$schema", "$id", "$comment", "title", "description", "default", "examples", "readOnly", "writeOnly", "deprecated"}
+)
+STRING_KEYWORDS = frozenset({"minLength", "maxLength"})
+NUMBER_KEYWORDS = frozenset({"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"})
+ARRAY_KEYWORDS = frozenset({"items", "minItems", "maxItems"})
+OBJECT_KEYWORDS = frozenset({"properties", "required", "additionalProperties"})
+SUPPORTED_KEYWORDS = (
+    ANNOTATION_KEYWORDS
+    | STRING_KEYWORDS
+    | NUMBER_KEYWORDS
+    | ARRAY_KEYWORDS
+    | OBJECT_KEYWORDS
+    | {"type", "enum", "const"}
+)
+
+# JSON Schema type semantics: booleans are not numbers, 1.0 is an integer.
+_TYPE_TESTS = {
+    "string": "isinstance({v}, str)",
+    "boolean": "isinstance({v}, bool)",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool)) or (isinstance({v}, float) and {v}.is_integer()))",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "null": "{v} is None",
+}
+
+_NUMBER_COMPARISONS = {"minimum": ">=", "maximum": "<=", "exclusiveMinimum": ">", "exclusiveMaximum": "<"}
+
+_JSON_EQUAL_SOURCE = '''\
+def _json_equal(a, b):
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, (list, dict)) or isinstance(b, (list, dict)):
+        return False
+    return a == b
+'''
+
+
+class UnsupportedSchemaError(ValueError):
+    """The schema uses a keyword this generator cannot compile."""
+
+
+class _Emitter:
+    def __init__(self):
+        self.lines: list[str] = []
+        self.constants: list[str] = []
+        self.uses_json_equal = False
+        self._counter = 0
+
+    def name(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("_C")
+        if isinstance(value, frozenset):
+            # Sorted so the generated module is byte-for-byte reproducible.
+            text = f"frozenset({tuple(sorted(value))!r})"
+        else:
+            text = repr(value)
+        self.constants.append(f"{name} = {text}")
+        return name
+
+    def line(self, indent: int, text: str) -> None:
+        self.lines.append("    " * indent + text)
+
+    def fail_unless(self, indent: int, condition: str) -> None:
+        if " or " in condition or " and " in condition:
+            condition = f"({condition})"
+        self.line(indent, f"if not {condition}:")
+        self.line(indent + 1, "return False")
+
+    def check(self, schema: Any, var: str, indent: int, where: str) -> None:
+        if schema is True:
+            return
+        if schema is False:
+            self.line(indent, "return False")
+            return
+        if not isinstance(schema, dict):
+            raise UnsupportedSchemaError(f"{where}: schema must be an object or boolean")
+        unknown = set(schema) - SUPPORTED_KEYWORDS
+        if unknown:
+            raise UnsupportedSchemaError(f"{where}: unsupported keywords {sorted(unknown)}")
+
+        known_type = None
+        if "type" in schema:
+            types = schema["type"]
+            types = [types] if isinstance(types, str) else list(types)
+            for t in types:
+                if t not in _TYPE_TESTS:
+                    raise UnsupportedSchemaError(f"{where}: unknown type {t!r}")
+            self.fail_unless(indent, " or ".join(_TYPE_TESTS[t].format(v=var) for t in types))
+            if len(types) == 1:
+                known_type = types[0]
+
+        if "const" in schema:
+            self.uses_json_equal = True
+            self.fail_unless(indent, f"_json_equal({var}, {self.constant(schema['const'])})")
+        if "enum" in schema:
+            self.uses_json_equal = True
+            options = self.constant(tuple(schema["enum"]))
+            self.fail_unless(indent, f"any(_json_equal({var}, option) for option in {options})")
+
+        self._guarded(schema, var, indent, known_type, "string", STRING_KEYWORDS, self._string_checks, where)
+        self._guarded(schema, var, indent, known_type, "number", NUMBER_KEYWORDS, self._number_checks, where)
+        self._guarded(schema, var, indent, known_type, "array", ARRAY_KEYWORDS, self._array_checks, where)
+        self._guarded(schema, var, indent, known_type, "object", OBJECT_KEYWORDS, self._object_checks, where)
+
+    def _guarded(self, schema, var, indent, known_type, kind, keywords, emit, where) -> None:
+        """Keywords only constrain instances of their own type, so guard them unless the type is known."""
+        if not keywords & schema.keys():
+            return
+        if known_type == kind or (kind == "number" and known_type == "integer"):
+            emit(schema, var, indent, where)
+            return
+        start = len(self.lines)
+        self.line(indent, f"if {_TYPE_TESTS[kind].format(v=var)}:")
+        mark = len(self.lines)
+        emit(schema, var, indent + 1, where)
+        if len(self.lines) == mark:
+            del self.lines[start:]
+
+    def _string_checks(self, schema, var, indent, where) -> None:
+        if "minLength" in schema:
+            self.fail_unless(indent, f"len({var}) >= {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            self.fail_unless(indent, f"len({var}) <= {int(schema['maxLength'])}")
+
+    def _number_checks(self, schema, var, indent, where) -> None:
+        for keyword, op in _NUMBER_COMPARISONS.items():
+            if keyword in schema:
+                self.fail_unless(indent, f"{var} {op} {schema[keyword]!r}")
+
+    def _array_checks(self, schema, var, indent, where) -> None:
+        if "minItems" in schema:
+            self.fail_unless(indent, f"len({var}) >= {int(schema['minItems'])}")
+        if "maxItems" in schema:
+            self.fail_unless(indent, f"len({var}) <= {int(schema['maxItems'])}")
+        if "items" in schema:
+            item = self.name("item")
+            start = len(self.lines)
+            self.line(indent, f"for {item} in {var}:")
+            mark = len(self.lines)
+            self.check(schema["items"], item, indent + 1, f"{where}/items")
+            if len(self.lines) == mark:
+                del self.lines[start:]
+
+    def _object_checks(self, schema, var, indent, where) -> None:
+        properties = schema.get("properties", {})
+        if "required" in schema and schema["required"]:
+            required = self.constant(frozenset(schema["required"]))
+            self.fail_unless(indent, f"{var}.keys() >= {required}")
+
+        additional = schema.get("additionalProperties", True)
+        if additional is not True:
+            allowed = self.constant(frozenset(properties))
+            if additional is False:
+                self.fail_unless(indent, f"{var}.keys() <= {allowed}")
+            else:
+                key, value = self.name("key"), self.name("value")
+                start = len(self.lines)
+                self.line(indent, f"for {key}, {value} in {var}.items():")
+                self.line(indent + 1, f"if {key} not in {allowed}:")
+                mark = len(self.lines)
+                self.check(additional, value, indent + 2, f"{where}/additionalProperties")
+                if len(self.lines) == mark:
+                    del self.lines[start:]
+
+        for prop, subschema in properties.items():
+            value = self.name("value")
+            start = len(self.lines)
+            self.line(indent, f"if {prop!r} in {var}:")
+            self.line(indent + 1, f"{value} = {var}[{prop!r}]")
+            mark = len(self.lines)
+            self.check(subschema, value, indent + 1, f"{where}/properties/{prop}")
+            if len(self.lines) == mark:
+                del self.lines[start:]
+
+
+def generate_source(schema: Any, name: str = "validate") -> str:
+    """Return Python source defining ``name(data) -> bool`` for ``schema``."""
+    emitter = _Emitter()
+    emitter.line(0, f"def {name}(data):")
+    emitter.check(schema, "data", 1, "#")
+    emitter.line(1, "return True")
+    parts = ['"""Generated by utils.schema_codegen; do not edit."""', ""]
+    if emitter.uses_json_equal:
+        parts += [_JSON_EQUAL_SOURCE]
+    parts += emitter.constants + ["", ""] + emitter.lines
+    return "\n".join(parts) + "\n"
+
+
+def compile_schema(schema: Any, name: str = "validate") -> Callable[[Any], bool]:
+    """Generate, compile and return the specialized validator for ``schema``."""
+    namespace: dict[str, Any] = {}
+    exec(compile(generate_source(schema, name), f"<schema_codegen:{name}>", "exec"), namespace)
+    return namespace[name]
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate a Python validator module from a JSON Schema.")
+    parser.add_argument("schema", help="Path to the JSON Schema file")
+    parser.add_argument("-o", "--output", help="Write the module here instead of stdout")
+    parser.add_argument("--name", default="validate", help="Name of the generated function")
+    args = parser.parse_args(argv)
+
+    with open(args.schema, "r", encoding="utf-8") as f:
+        source = generate_source(json.load(f), args.name)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(source)
+        print(f"[✓] Validator written to: {args.output}")
+    else:
+        print(source, end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,189 @@
+import atexit
+import hashlib
 import json
 import os
+import threading
+from dataclasses import dataclass
 from pathlib import Path
 from datetime import datetime, UTC
-from jsonschema import validate, ValidationError
+from typing import TYPE_CHECKING, Any, Callable
+
+from core import metrics
+from utils.schema_codegen import UnsupportedSchemaError, compile_schema
+
+if TYPE_CHECKING:
+    from jsonschema import Draft202012Validator
 
 SCHEMA_PATH = os.path.normpath(
     os.path.join(os.path.dirname(__file__), "..", "schemas", "ImageSidecarCopy.schema.json")
 )
 
 
-def _load_schema():
-    with open(SCHEMA_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+@dataclass
+class _CompiledSchema:
+    mtime_ns: int
+    schema: dict
+    fingerprint: str
+    # Generated accept/reject function; None if the schema uses keywords codegen cannot compile.
+    fast: Callable[[Any], bool] | None
+    _validator: Any = None
+
+    @property
+    def validator(self) -> "Draft202012Validator":
+        """The jsonschema validator, built on first use.
+
+        Valid documents never need it when ``fast`` exists, so importing
+        jsonschema is deferred until something fails or asks for messages.
+        """
+        if self._validator is None:
+            self._validator = _build_validator(self.schema)
+        return self._validator
+
+
+def _build_validator(schema: dict) -> "Draft202012Validator":
+    from jsonschema import Draft202012Validator
+
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema)
+
+
+_compiled: _CompiledSchema | None = None
+_compile_lock = threading.Lock()
+
+
+def fingerprint_schema(schema: dict) -> str:
+    """SHA-256 of a schema's canonical JSON (sorted keys, no whitespace)."""
+    canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _compiled_schema() -> _CompiledSchema:
+    """Return the compiled sidecar schema, rebuilding it only if the file changed."""
+    global _compiled
+    mtime_ns = os.stat(SCHEMA_PATH).st_mtime_ns
+    current = _compiled
+    if current is not None and current.mtime_ns == mtime_ns:
+        return current
+    with _compile_lock:
+        current = _compiled
+        if current is not None and current.mtime_ns == mtime_ns:
+            return current
+        with open(SCHEMA_PATH, "rb") as f:
+            raw = f.read()
+        schema = json.loads(raw)
+        try:
+            fast = compile_schema(schema)
+        except UnsupportedSchemaError:
+            fast = None
+        current = _CompiledSchema(
+            mtime_ns=mtime_ns,
+            schema=schema,
+            fingerprint=fingerprint_schema(schema),
+            fast=fast,
+        )
+        if fast is None:
+            # jsonschema is the only validator; build (and check) it now.
+            current._validator = _build_validator(schema)
+        _compiled = current
+        return current
+
+
+def load_schema() -> dict:
+    """Return the shared ImageSidecarCopy schema dict. Treat it as read-only."""
+    return _compiled_schema().schema
+
+
+def get_validator() -> "Draft202012Validator":
+    """Return the shared compiled validator for the sidecar schema."""
+    return _compiled_schema().validator
+
+
+def schema_fingerprint() -> str:
+    """SHA-256 of the canonical schema JSON; changes whenever the schema does."""
+    return _compiled_schema().fingerprint
+
+
+def is_valid(data: Any) -> bool:
+    """Accept/reject only, through the generated validator when available."""
+    compiled = _compiled_schema()
+    if compiled.fast is not None:
+        return compiled.fast(data)
+    return compiled.validator.is_valid(data)
+
 
+@dataclass(frozen=True)
+class ValidationIssue:
+    """One schema violation: where it is (``$``-rooted path) and what is wrong."""
 
+    path: str
+    message: str
+    validator: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+def _issue(error) -> ValidationIssue:
+    path = "$" + "".join(f"[{p}]" if isinstance(p, int) else f".{p}" for p in error.absolute_path)
+    return ValidationIssue(path=path, message=error.message, validator=str(error.validator))
+
+
+@metrics.timer("validate")
+def validation_issues(data: dict) -> list[ValidationIssue]:
+    """Validate once and return every violation, most relevant first."""
+    if is_valid(data):
+        return []
+    errors = list(get_validator().iter_errors(data))
+    if not errors:
+        return []
+    from jsonschema.exceptions import best_match
+
+    best = best_match(errors)
+    rest = sorted((e for e in errors if e is not best), key=lambda e: [str(p) for p in e.absolute_path])
+    return [_issue(best)] + [_issue(e) for e in rest]
+
+
+@metrics.timer("validate")
 def validate_response(data: dict):
-    schema = _load_schema()
-    try:
-        validate(instance=data, schema=schema)
+    if is_valid(data):
+        return True, None
+    from jsonschema.exceptions import best_match
+
+    error = best_match(get_validator().iter_errors(data))
+    if error is None:
         return True, None
-    except ValidationError as e:
-        return False, str(e)
+    return False, str(error)
 
 
-def validate_or_print(data: dict):
-    ok, err = validate_response(data)
-    if ok:
+def validate_or_print(data: dict) -> list[ValidationIssue]:
+    issues = validation_issues(data)
+    if not issues:
         print("✅ Metadata is valid.")
     else:
         print("❌ Validation failed:")
-        print(err)
+        for issue in issues:
+            print(f"   - {issue}")
+    return issues
+
+
+def log_validation_issues(log_path: str, json_path: str, issues: list[ValidationIssue]) -> None:
+    """Append already-computed issues for ``json_path`` to the failure log."""
+    if issues:
+        _append_log(log_path, json_path, "; ".join(str(issue) for issue in issues))
+
+
+def validate_and_log(data: dict, json_path: str, log_path: str) -> tuple[bool, list[ValidationIssue]]:
+    """Validate an in-memory sidecar and log failures under ``json_path``, without reading it back."""
+    issues = validation_issues(data)
+    log_validation_issues(log_path, json_path, issues)
+    return not issues, issues
 
 
 def validate_file_and_log(json_path: str, log_path: str) -> tuple[bool, str | None]:
     """Validate a JSON sidecar file and append failures to a logfile.
 
-    Returns (ok, error_message_or_None). Always keeps the file.
+    Returns (ok, error_message_or_None). Always keeps the file. For a sidecar
+    that is still in memory, use ``validate_and_log`` instead.
     """
     try:
         with open(json_path, "r", encoding="utf-8") as f:
@@ -45,15 +193,35 @@ def validate_file_and_log(json_path: str, log_path: str) -> tuple[bool, str | No
         _append_log(log_path, json_path, msg)
         return False, msg
 
-    ok, err = validate_response(data)
-    if not ok:
-        _append_log(log_path, json_path, err or "Unknown validation error")
-    return ok, err
+    ok, issues = validate_and_log(data, json_path, log_path)
+    return ok, (None if ok else str(issues[0]))
+
+
+_log_handles: dict[str, Any] = {}
+_log_lock = threading.Lock()
 
 
 def _append_log(log_path: str, json_path: str, message: str) -> None:
+    """Append a failure line, keeping one line-buffered handle open per log file."""
     ts = datetime.now(UTC).isoformat().replace("+00:00", "Z")
-    p = Path(log_path)
-    p.parent.mkdir(parents=True, exist_ok=True)
-    with open(p, "a", encoding="utf-8") as logf:
-        logf.write(f"[{ts}] {json_path}: {message}\n")
+    line = f"[{ts}] {json_path}: {message}\n"
+    key = os.path.abspath(log_path)
+    with _log_lock:
+        handle = _log_handles.get(key)
+        if handle is None or handle.closed:
+            p = Path(key)
+            p.parent.mkdir(parents=True, exist_ok=True)
+            handle = open(p, "a", encoding="utf-8", buffering=1)
+            _log_handles[key] = handle
+        handle.write(line)
+
+
+def close_logs() -> None:
+    """Close the validation log handles opened by ``_append_log``."""
+    with _log_lock:
+        for handle in _log_handles.values():
+            handle.close()
+        _log_handles.clear()
+
+
+atexit.register(close_logs)